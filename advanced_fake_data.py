@@ -1,275 +1,336 @@
-import sqlite3
-import random
-from datetime import datetime, timedelta
-import calendar
+"""
+Generador de datos sintéticos para pruebas de carga sobre el esquema real de la app.
+
+Crea N usuarios (demo1, demo2, ...) con M años de transacciones cada uno, generadas por
+lotes vectorizados (NumPy si está instalado, listas de Python si no) e insertadas con
+INSERTs de muchas filas en una sola transacción. Los totales por día salen del mismo lote,
+así que los rollups no se recalculan recorriendo transactions. El resultado depende solo de
+los argumentos: la misma semilla y el mismo --end producen la misma base.
+
+    python advanced_fake_data.py --users 100 --years 10 --seed 42
+    python advanced_fake_data.py --quick
+"""
+
 import argparse
+import calendar
+import random
+import sqlite3
+import time
+from datetime import datetime
+from itertools import chain, repeat
 
-def clear_all_data():
-    """Clear all existing transaction data"""
-    import os
-    db_path = 'ingresos.db'
-    print("🔍 Conectando a base de datos...")
-    
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    
-    # Check if table exists
-    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='transactions'")
-    if cursor.fetchone():
-        cursor.execute('DELETE FROM transactions')
-        print("🗑️ Todos los datos existentes han sido eliminados.")
-    else:
-        print("ℹ️ La tabla 'transactions' no existe aún, se creará.")
-    
-    conn.commit()
-    conn.close()
-
-def generate_smart_fake_data(months=6, min_daily_income=50, max_daily_income=800, clear_existing=False):
-    """Generate smart fake data with realistic patterns"""
-    
-    if clear_existing:
-        clear_all_data()
-    
-    import os
-    db_path = 'ingresos.db'
-    print("🔍 Conectando a base de datos...")
-    
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    
-    # Create table if it doesn't exist
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS transactions (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            year INTEGER NOT NULL,
-            month INTEGER NOT NULL,
-            day INTEGER NOT NULL,
-            amount REAL NOT NULL,
-            description TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    
-    print("✅ Tabla creada/verificada correctamente")
-    
-    # Realistic job descriptions by category
-    freelance_work = [
-        "Desarrollo web freelance", "Diseño de logo", "Programación Python", 
-        "Consultoría IT", "Desarrollo app móvil", "Mantenimiento web",
-        "Optimización SEO", "Diseño UX/UI", "Integración API", "Bug fixing"
-    ]
-    
-    sales_work = [
-        "Venta producto digital", "Comisión por referido", "Venta curso online",
-        "E-commerce dropshipping", "Afiliado Amazon", "Venta template",
-        "Licencia software", "Servicio premium", "Consulta paga", "Membresía"
-    ]
-    
-    content_work = [
-        "Artículo blog", "Video YouTube", "Podcast sponsorship", 
-        "Curso online", "Webinar", "Tutorial premium", "Newsletter",
-        "Social media content", "Traducción", "Copywriting"
-    ]
-    
-    tech_services = [
-        "Soporte técnico", "Instalación software", "Reparación PC",
-        "Backup y recuperación", "Migración datos", "Configuración red",
-        "Auditoría seguridad", "Capacitación", "Automatización", "Script custom"
-    ]
-    all_descriptions = freelance_work + sales_work + content_work + tech_services
-    print(f"🚀 Generando {months} meses de datos inteligentes...")
-    print(f"💰 Rango diario: ${min_daily_income} - ${max_daily_income}")
-    
-    # Start from 2025 and go backwards
-    current_date = datetime(2025, 12, 31)  # Start from end of 2025
-    total_transactions = 0
-    total_amount = 0
-    
-    for month_offset in range(months):
-        # Calculate target date by going backwards month by month
-        year = 2025
-        month = 12 - month_offset
-        
-        # Handle year rollover
-        while month <= 0:
-            month += 12
-            year -= 1
-        
-        days_in_month = calendar.monthrange(year, month)[1]
-        
-        # Realistic working pattern: 20-25 working days per month
-        working_days = random.randint(20, min(25, days_in_month - 2))
-        
-        # Select random working days within the valid range for this month
-        available_days = list(range(1, days_in_month + 1))
-        work_days = random.sample(available_days, min(working_days, len(available_days)))
-        
-        month_total = 0
-        month_transactions = 0
-        
-        for day in sorted(work_days):
-            # Target daily income
-            target_daily = random.uniform(min_daily_income, max_daily_income)
-            
-            # Number of transactions per day (1-5, weighted towards 1-3)
-            num_transactions = random.choices([1, 2, 3, 4, 5], weights=[40, 30, 20, 7, 3])[0]
-            
-            # Distribute daily income across transactions
-            daily_amounts = []
-            remaining = target_daily
-            
-            for i in range(num_transactions):
-                if i == num_transactions - 1:
-                    # Last transaction gets remaining amount
-                    amount = remaining
-                else:
-                    # Random portion of remaining
-                    portion = random.uniform(0.2, 0.7)
-                    amount = remaining * portion
-                    remaining -= amount
-                
-                # Round to realistic values
-                amount = round(max(10, amount), 2)
-                daily_amounts.append(amount)
-            
-            # Create transactions for this day
-            for amount in daily_amounts:
-                # Choose description based on amount
-                if amount >= 300:
-                    description = random.choice(freelance_work + tech_services)
-                elif amount >= 100:
-                    description = random.choice(sales_work + content_work)
-                else:
-                    description = random.choice(all_descriptions)
-                
-                # 15% chance of no description
-                if random.random() < 0.15:
-                    description = ""
-                
-                cursor.execute('''
-                    INSERT INTO transactions (year, month, day, amount, description)
-                    VALUES (?, ?, ?, ?, ?)
-                ''', (year, month, day, amount, description))
-                
-                month_total += amount
-                month_transactions += 1
-                total_transactions += 1
-                total_amount += amount
-        
-        print(f"📅 {calendar.month_name[month]} {year}: {month_transactions} transacciones, ${month_total:.2f}")
-    
-    # Force commit all changes
-    conn.commit()
-    print("💾 Guardando datos en la base de datos...")
-    
-    # Verify data was saved
-    cursor.execute('SELECT COUNT(*) FROM transactions')
-    saved_count = cursor.fetchone()[0]
-    print(f"✅ Verificado: {saved_count} transacciones guardadas en la DB")
-    
-    conn.close()
-    
-    print(f"\n✅ ¡Datos inteligentes generados!")
-    print(f"📊 Resumen final:")
-    print(f"   • Total transacciones: {total_transactions}")
-    print(f"   • Ingreso total: ${total_amount:.2f}")
-    print(f"   • Promedio mensual: ${total_amount/months:.2f}")
-    print(f"   • Promedio por transacción: ${total_amount/total_transactions:.2f}")
-    print(f"   • Período: {months} meses")
-
-def quick_test_data():
-    """Generate quick test data for immediate testing"""
-    print("⚡ Generando datos de prueba rápidos...")
-    
-    import os
-    db_path = 'ingresos.db'
-    print("🔍 Conectando a base de datos...")
-    
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    
-    # Create table if it doesn't exist
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS transactions (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            year INTEGER NOT NULL,
-            month INTEGER NOT NULL,
-            day INTEGER NOT NULL,
-            amount REAL NOT NULL,
-            description TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    
-    current_date = datetime.now()
-    year = current_date.year
-    month = current_date.month
-    
-    print(f"📅 Agregando datos para {calendar.month_name[month]} {year}")
-    
-    transactions_added = 0
-    
-    # Add transactions for current month - last 15 days
-    for day_offset in range(15):
-        day = max(1, current_date.day - day_offset)
-        
-        # 1-3 transactions per day
-        daily_transactions = random.randint(1, 3)
-        for _ in range(daily_transactions):
-            amount = round(random.uniform(25, 250), 2)
-            descriptions = ["Test work", "Quick job", "Small project", "Consulting", ""]
-            description = random.choice(descriptions)
-            
-            cursor.execute('''
-                INSERT INTO transactions (year, month, day, amount, description)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (year, month, day, amount, description))
-            
-            transactions_added += 1
-    
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+from db import configure_connection
+from migrations import migrate
+from passwords import PasswordHasher
+from rollups import day_number, rebuild_monthly_totals
+from versions import bump_all_month_versions
+
+DATABASE = 'ingresos.db'
+DEMO_PASSWORD = 'Demo1234!'
+
+# Descripciones realistas por categoría
+FREELANCE_WORK = [
+    "Desarrollo web freelance", "Diseño de logo", "Programación Python",
+    "Consultoría IT", "Desarrollo app móvil", "Mantenimiento web",
+    "Optimización SEO", "Diseño UX/UI", "Integración API", "Bug fixing"
+]
+SALES_WORK = [
+    "Venta producto digital", "Comisión por referido", "Venta curso online",
+    "E-commerce dropshipping", "Afiliado Amazon", "Venta template",
+    "Licencia software", "Servicio premium", "Consulta paga", "Membresía"
+]
+CONTENT_WORK = [
+    "Artículo blog", "Video YouTube", "Podcast sponsorship",
+    "Curso online", "Webinar", "Tutorial premium", "Newsletter",
+    "Social media content", "Traducción", "Copywriting"
+]
+TECH_SERVICES = [
+    "Soporte técnico", "Instalación software", "Reparación PC",
+    "Backup y recuperación", "Migración datos", "Configuración red",
+    "Auditoría seguridad", "Capacitación", "Automatización", "Script custom"
+]
+
+# Todas las descripciones en una lista; cada pool es un rango [inicio, fin) de índices.
+# Montos >= 300 salen de freelance/técnicos, >= 100 de ventas/contenido, el resto de todas.
+DESCRIPTIONS = FREELANCE_WORK + TECH_SERVICES + SALES_WORK + CONTENT_WORK + [""]
+HIGH_POOL = (0, 20)
+MID_POOL = (20, 40)
+ALL_POOL = (0, 40)
+EMPTY_DESCRIPTION = 40
+EMPTY_RATIO = 0.15
+
+TX_PER_DAY = (1, 2, 3, 4, 5)
+TX_WEIGHTS = (40, 30, 20, 7, 3)
+WORK_HOURS = (8 * 3600, 22 * 3600)  # created_at entre las 08:00 y las 22:00
+CLOCK = [f'{s // 3600:02d}:{s // 60 % 60:02d}:{s % 60:02d}' for s in range(86400)]
+
+# Filas por INSERT: executemany ejecuta el statement una vez por fila y, con AUTOINCREMENT,
+# cada ejecución lee y escribe sqlite_sequence. 128 × 7 columnas entra en el límite de 999
+# variables de las versiones viejas de SQLite
+ROWS_PER_STATEMENT = 128
+TRANSACTION_COLUMNS = ('user_id', 'year', 'month', 'day', 'amount', 'description', 'created_at')
+DAILY_COLUMNS = ('user_id', 'year', 'month', 'day', 'total', 'tx_count', 'day_number')
+
+
+def month_periods(end, months):
+    """The (year, month) pairs of the `months` months ending at `end`, oldest first"""
+    year, month = end
+    index = year * 12 + month - 1
+    return [(i // 12, i % 12 + 1) for i in range(index - months + 1, index + 1)]
+
+
+class MonthTable:
+    """Per-month data shared by every user: days per month, day numbers and 'YYYY-MM-DD ' prefixes"""
+
+    def __init__(self, periods):
+        self.periods = periods
+        self.days_in_month = [calendar.monthrange(year, month)[1] for year, month in periods]
+        self.first_days = [day_number(year, month, 1) for year, month in periods]
+        # 31 columnas por mes; los días inexistentes quedan vacíos y nunca se eligen
+        self.prefixes = [
+            [f'{year}-{month:02d}-{day:02d} ' if day <= days else '' for day in range(1, 32)]
+            for (year, month), days in zip(periods, self.days_in_month)
+        ]
+        if NUMPY_AVAILABLE:
+            self.year_array = np.array([year for year, _ in periods])
+            self.month_array = np.array([month for _, month in periods])
+            self.days_array = np.array(self.days_in_month)
+            self.first_day_array = np.array(self.first_days)
+            self.prefix_array = np.array(self.prefixes, dtype=object)
+            self.clock_array = np.array(CLOCK, dtype=object)
+            self.description_array = np.array(DESCRIPTIONS, dtype=object)
+
+
+def _pool_pick(amount, pick):
+    """Description index from the amount's pool, given a uniform pick in [0, 1)"""
+    start, end = ALL_POOL
+    if amount >= 300:
+        start, end = HIGH_POOL
+    elif amount >= 100:
+        start, end = MID_POOL
+    return start + int(pick * (end - start))
+
+
+def _generate_numpy(rng, table, min_daily, max_daily):
+    """Transaction and day total columns for one user, every month at once"""
+    days_in_month = table.days_array
+
+    # 20-25 días trabajados por mes, elegidos al azar sin repetición
+    working_days = rng.integers(20, np.minimum(25, days_in_month - 2) + 1)
+    keys = rng.random((len(days_in_month), 31))
+    keys[np.arange(31)[None, :] >= days_in_month[:, None]] = 2.0
+    ranks = keys.argsort(axis=1).argsort(axis=1)
+    period_index, day_index = np.nonzero(ranks < working_days[:, None])
+
+    # Ingreso objetivo por día repartido entre 1-5 transacciones
+    day_count = len(period_index)
+    targets = rng.uniform(min_daily, max_daily, day_count)
+    weights = np.array(TX_WEIGHTS, dtype=float)
+    per_day = rng.choice(TX_PER_DAY, size=day_count, p=weights / weights.sum())
+    owner = np.repeat(np.arange(day_count), per_day)
+    shares = rng.uniform(0.2, 1.0, len(owner))
+    share_totals = np.bincount(owner, weights=shares, minlength=day_count)
+    amounts = np.maximum(10, np.round(targets[owner] * shares / share_totals[owner], 2))
+
+    picks = rng.random(len(owner))
+    descriptions = np.where(
+        amounts >= 300, HIGH_POOL[0] + (picks * (HIGH_POOL[1] - HIGH_POOL[0])).astype(int),
+        np.where(amounts >= 100, MID_POOL[0] + (picks * (MID_POOL[1] - MID_POOL[0])).astype(int),
+                 ALL_POOL[0] + (picks * (ALL_POOL[1] - ALL_POOL[0])).astype(int)))
+    descriptions[rng.random(len(owner)) < EMPTY_RATIO] = EMPTY_DESCRIPTION
+
+    # Horas crecientes dentro de cada día para que created_at siga el orden de inserción
+    # (owner ya viene ordenado: un solo sort con el día como parte alta de la clave)
+    offsets = owner * 86400
+    seconds = np.sort(offsets + rng.integers(WORK_HOURS[0], WORK_HOURS[1], len(owner))) - offsets
+
+    day_totals = (table.year_array[period_index].tolist(), table.month_array[period_index].tolist(),
+                  (day_index + 1).tolist(), np.bincount(owner, weights=amounts, minlength=day_count).tolist(),
+                  per_day.tolist(), (table.first_day_array[period_index] + day_index).tolist())
+
+    period_index, day_index = period_index[owner], day_index[owner]
+    created = table.prefix_array[period_index, day_index] + table.clock_array[seconds]
+    return (table.year_array[period_index].tolist(), table.month_array[period_index].tolist(),
+            (day_index + 1).tolist(), amounts.tolist(),
+            table.description_array[descriptions].tolist(), created.tolist()), day_totals
+
+
+def _generate_python(rng, table, min_daily, max_daily):
+    """Transaction and day total columns for one user built month by month with the stdlib random module"""
+    columns = ([], [], [], [], [], [])
+    years, months, days, amounts, descriptions, created = columns
+    day_totals = ([], [], [], [], [], [])
+    for (year, month), days_in_month, prefixes, first_day in zip(table.periods, table.days_in_month,
+                                                                   table.prefixes, table.first_days):
+        working_days = rng.randint(20, min(25, days_in_month - 2))
+        for day in sorted(rng.sample(range(1, days_in_month + 1), working_days)):
+            target = rng.uniform(min_daily, max_daily)
+            count = rng.choices(TX_PER_DAY, weights=TX_WEIGHTS)[0]
+            shares = [rng.uniform(0.2, 1.0) for _ in range(count)]
+            share_total = sum(shares)
+            day_amounts = [max(10, round(target * share / share_total, 2)) for share in shares]
+            years.extend(repeat(year, count))
+            months.extend(repeat(month, count))
+            days.extend(repeat(day, count))
+            amounts.extend(day_amounts)
+            descriptions.extend(
+                DESCRIPTIONS[EMPTY_DESCRIPTION if rng.random() < EMPTY_RATIO else _pool_pick(amount, rng.random())]
+                for amount in day_amounts
+            )
+            prefix = prefixes[day - 1]
+            created.extend(prefix + CLOCK[second] for second in sorted(rng.randrange(*WORK_HOURS) for _ in range(count)))
+            for column, value in zip(day_totals, (year, month, day, sum(day_amounts), count, first_day + day - 1)):
+                column.append(value)
+    return columns, day_totals
+
+
+def generate_user_columns(seed, user_index, table, min_daily, max_daily):
+    """One user's transactions as columns (year, month, day, amount, description, created_at)
+    and their day totals as columns (year, month, day, total, tx_count, day_number).
+    Each user draws from its own stream derived from the seed, so adding users doesn't change
+    the data of the existing ones."""
+    if NUMPY_AVAILABLE:
+        return _generate_numpy(np.random.default_rng([seed, user_index]), table, min_daily, max_daily)
+    return _generate_python(random.Random(f'{seed}-{user_index}'), table, min_daily, max_daily)
+
+
+def ensure_users(conn, count, prefix):
+    """Create (or reuse) the demo users and return their ids in order"""
+    password_hash = PasswordHasher().hash(DEMO_PASSWORD)
+    conn.executemany('''
+        INSERT OR IGNORE INTO users (username, email, password_hash) VALUES (?, ?, ?)
+    ''', ((f'{prefix}{n}', f'{prefix}{n}@example.com', password_hash) for n in range(1, count + 1)))
+    ids = [conn.execute('SELECT id FROM users WHERE username = ?', (f'{prefix}{n}',)).fetchone()[0]
+           for n in range(1, count + 1)]
     conn.commit()
-    
-    # Verify data was saved
-    cursor.execute('SELECT COUNT(*) FROM transactions')
-    total_count = cursor.fetchone()[0]
-    print(f"✅ {transactions_added} nuevas transacciones agregadas")
-    print(f"📊 Total en DB: {total_count} transacciones")
-    
-    conn.close()
-    
-    print("✅ Datos de prueba agregados para este mes!")
+    return ids
+
+
+def insert_rows(conn, table, columns, rows):
+    """Insert row tuples ROWS_PER_STATEMENT at a time, one multi-row INSERT per batch"""
+    head = f'INSERT INTO {table} ({", ".join(columns)}) VALUES '
+    placeholders = f'({", ".join("?" * len(columns))})'
+    values = list(chain.from_iterable(rows))
+    step = ROWS_PER_STATEMENT * len(columns)
+    full = len(values) - len(values) % step
+    conn.executemany(head + ', '.join([placeholders] * ROWS_PER_STATEMENT),
+                     (values[start:start + step] for start in range(0, full, step)))
+    if full < len(values):
+        conn.execute(head + ', '.join([placeholders] * ((len(values) - full) // len(columns))), values[full:])
+
+
+def bulk_pragmas(conn):
+    """PRAGMAs for a one-off load: no fsync, no FK checks, rollback journal in memory"""
+    conn.execute('PRAGMA foreign_keys = OFF')  # los user_id vienen de ensure_users
+    conn.execute('PRAGMA synchronous = OFF')
+    conn.execute('PRAGMA cache_size = -262144')  # 256 MB
+    try:
+        # Evita escribir cada página dos veces (WAL + checkpoint); requiere acceso exclusivo
+        conn.execute('PRAGMA journal_mode = MEMORY')
+    except sqlite3.OperationalError:
+        print("ℹ️ La base está en uso, se mantiene WAL")
+
+
+def restore_pragmas(conn):
+    conn.execute('PRAGMA journal_mode = WAL')
+    conn.execute('PRAGMA synchronous = NORMAL')
+    conn.execute('PRAGMA foreign_keys = ON')
+    # Estadísticas por muestreo: un ANALYZE completo recorre los índices recién cargados
+    conn.execute('PRAGMA analysis_limit = 1000')
+    conn.execute('PRAGMA optimize')
+
+
+def generate(database=DATABASE, users=1, months=24, end=None, seed=0, min_daily=50, max_daily=800,
+             clear=False, prefix='demo'):
+    """Fill the database with users × months of synthetic transactions"""
+    end = end or (datetime.now().year, datetime.now().month)
+    table = MonthTable(month_periods(end, months))
+    started = time.perf_counter()
+
+    print(f"🔍 Conectando a {database}...")
+    conn = configure_connection(sqlite3.connect(database))
+    migrate(conn)
+    user_ids = ensure_users(conn, users, prefix)
+    print(f"👥 {users} usuarios ({prefix}1..{prefix}{users}, contraseña {DEMO_PASSWORD})")
+    print(f"🚀 {months} meses hasta {end[0]}-{end[1]:02d}, semilla {seed}, "
+          f"{'NumPy' if NUMPY_AVAILABLE else 'Python puro'}")
+
+    bulk_pragmas(conn)
+    total_rows = 0
+    try:
+        conn.execute('BEGIN IMMEDIATE')
+        if clear:
+            for target in ('transactions', 'daily_totals', 'monthly_totals'):
+                conn.execute(f'DELETE FROM {target}')
+            print("🗑️ Todos los datos existentes han sido eliminados.")
+        else:
+            # Volver a generar reemplaza los datos de los usuarios demo, no los duplica
+            for target in ('transactions', 'daily_totals', 'monthly_totals'):
+                conn.executemany(f'DELETE FROM {target} WHERE user_id = ?', ((uid,) for uid in user_ids))
+
+        # Las filas llegan en el orden del índice (usuario, año, mes, día, id): mantenerlo
+        # durante la carga solo agrega al final del árbol y sale más barato que recrearlo
+        for user_index, user_id in enumerate(user_ids):
+            columns, day_totals = generate_user_columns(seed, user_index, table, min_daily, max_daily)
+            insert_rows(conn, 'transactions', TRANSACTION_COLUMNS, zip(repeat(user_id), *columns))
+            # Los rollups salen del lote en memoria en lugar de agrupar transactions al final
+            insert_rows(conn, 'daily_totals', DAILY_COLUMNS, zip(repeat(user_id), *day_totals))
+            rebuild_monthly_totals(conn, user_id)
+            total_rows += len(columns[0])
+            if (user_index + 1) % max(1, users // 10) == 0 or user_index + 1 == users:
+                print(f"📅 {user_index + 1}/{users} usuarios, {total_rows} transacciones "
+                      f"({time.perf_counter() - started:.1f}s)")
+
+        bump_all_month_versions(conn)
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    finally:
+        restore_pragmas(conn)
+        conn.close()
+
+    elapsed = time.perf_counter() - started
+    print(f"✅ {total_rows} transacciones en {elapsed:.1f}s ({total_rows / elapsed:,.0f} filas/s)")
+    return total_rows
+
+
+def parse_end(value):
+    year, _, month = value.partition('-')
+    return int(year), int(month)
+
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='Generar datos falsos para Income Tracker')
-    parser.add_argument('--months', type=int, default=12, help='Número de meses de datos (default: 12)')
-    parser.add_argument('--years', type=int, default=2, help='Número de años hacia atrás desde 2025 (default: 2)')
+    parser.add_argument('--db', default=DATABASE, help=f'Base de datos (default: {DATABASE})')
+    parser.add_argument('--users', type=int, default=1, help='Número de usuarios demo (default: 1)')
+    parser.add_argument('--years', type=int, help='Años de datos por usuario (tiene prioridad sobre --months)')
+    parser.add_argument('--months', type=int, default=24, help='Número de meses de datos (default: 24)')
+    parser.add_argument('--end', type=parse_end, help='Último mes generado, AAAA-MM (default: mes actual)')
+    parser.add_argument('--seed', type=int, default=0, help='Semilla del generador (default: 0)')
     parser.add_argument('--min-daily', type=float, default=50, help='Ingreso mínimo diario (default: 50)')
     parser.add_argument('--max-daily', type=float, default=800, help='Ingreso máximo diario (default: 800)')
-    parser.add_argument('--clear', action='store_true', help='Limpiar datos existentes primero')
-    parser.add_argument('--quick', action='store_true', help='Generar solo datos de prueba rápidos')
-    
+    parser.add_argument('--prefix', default='demo', help='Prefijo de los usuarios demo (default: demo)')
+    parser.add_argument('--clear', action='store_true', help='Borrar primero las transacciones de todos los usuarios')
+    parser.add_argument('--quick', action='store_true', help='Solo el mes actual para un usuario')
+
     args = parser.parse_args()
-    
+    months = 1 if args.quick else (args.years * 12 if args.years else args.months)
+    users = 1 if args.quick else args.users
+
     try:
-        if args.quick:
-            quick_test_data()
-        else:
-            # Calculate total months from years
-            total_months = args.years * 12 if args.years else args.months
-            generate_smart_fake_data(
-                months=total_months,
-                min_daily_income=args.min_daily,
-                max_daily_income=args.max_daily,
-                clear_existing=args.clear
-            )
-        
-        print(f"\n🎉 ¡Listo! Reinicia tu aplicación Flask para ver los nuevos datos.")
+        generate(args.db, users=users, months=months, end=args.end, seed=args.seed,
+                 min_daily=args.min_daily, max_daily=args.max_daily, clear=args.clear, prefix=args.prefix)
+        print(f"\n🎉 ¡Listo! Inicia sesión como {args.prefix}1 para ver los nuevos datos.")
         print(f"💡 Comandos útiles:")
         print(f"   python advanced_fake_data.py --quick  (datos rápidos)")
         print(f"   python advanced_fake_data.py --years 3 --clear  (3 años nuevos)")
-        print(f"   python advanced_fake_data.py --months 18  (18 meses)")
-        print(f"   python advanced_fake_data.py --years 2 --min-daily 100 --max-daily 1000  (más dinero)")
-        
+        print(f"   python advanced_fake_data.py --users 1000 --years 10 --seed 1  (prueba de carga)")
     except Exception as e:
         print(f"❌ Error: {e}")
-        print("🔧 Asegúrate de que la aplicación Flask no esté ejecutándose.")
\ No newline at end of file
@@ -0,0 +1,258 @@
+"""
+Analítica sobre rangos arbitrarios de fechas [desde, hasta]: totales por semana, mes o año,
+promedios móviles, comparación contra el año anterior y mejores/peores días.
+
+Todo sale de daily_totals por su clave entera day_number (índice user_id, day_number), así
+que un rango de varios años lee como mucho una fila por día con ingresos. Los totales se
+agrupan en SQL por una clave entera de periodo, los periodos sin ingresos se completan con
+ceros (CTE recursiva) y los acumulados y variaciones salen de funciones de ventana de
+SQLite: a Python solo llegan las filas de la respuesta. El promedio móvil diario usa NumPy
+(sumas acumuladas sobre los días con ingresos) si está instalado, o una ventana en SQL.
+"""
+
+import os
+import re
+from datetime import date, timedelta
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+ANALYTICS_MAX_DAYS = int(os.environ.get('ANALYTICS_MAX_DAYS', 366 * 20))  # largo máximo de un rango
+ANALYTICS_DEFAULT_DAYS = 365  # rango cuando no se indica ?from
+MAX_WINDOW = 365  # días máximos de un promedio móvil
+MAX_EXTREMES = 50
+
+# Clave entera de cada periodo, calculable desde las columnas de daily_totals
+PERIOD_KEYS = {
+    'week': 'day_number - (day_number - 1) % 7',  # day_number del lunes (el día 1 fue lunes)
+    'month': 'year * 12 + month - 1',
+    'year': 'year',
+}
+PERIOD_STEPS = {'week': 7, 'month': 1, 'year': 1}
+YOY_PERIODS = {'month': 12, 'year': 1}  # cuánto avanza la clave en un año
+
+_DATE = re.compile(r'^\d{4}-\d{2}-\d{2}$')
+
+# Un día por fila entre dos day_number (parámetros 1 y 2) con los totales del usuario (3), 0 si no hubo ingresos
+_SERIES = '''
+    WITH RECURSIVE days(day_number) AS (
+        SELECT ? UNION ALL SELECT day_number + 1 FROM days WHERE day_number < ?
+    ),
+    series AS (
+        SELECT days.day_number, COALESCE(d.total, 0.0) AS total, COALESCE(d.tx_count, 0) AS tx_count
+        FROM days LEFT JOIN daily_totals AS d
+        ON d.user_id = ? AND d.day_number = days.day_number
+    )
+'''
+
+# Claves de todos los periodos del rango (parámetros 1 y 2), para que los periodos sin ingresos salgan en 0
+_BUCKETS = '''
+    WITH RECURSIVE buckets(key) AS (
+        SELECT ? UNION ALL SELECT key + {step} FROM buckets WHERE key < ?
+    )
+'''
+
+# Totales de un usuario (parámetro 1) entre dos day_number (2 y 3) agrupados por periodo
+_GROUPED = '''
+    SELECT {key} AS key, SUM(total) AS total, SUM(tx_count) AS transactions, COUNT(*) AS active_days
+    FROM daily_totals WHERE user_id = ? AND day_number BETWEEN ? AND ?
+    GROUP BY 1
+'''
+
+
+def parse_day(value):
+    """'2024-03-15' -> date(2024, 3, 15)"""
+    try:
+        if not _DATE.match(value or ''):
+            raise ValueError
+        return date.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f'Fecha inválida: {value!r} (se espera AAAA-MM-DD)')
+
+
+def parse_range(args, today=None):
+    """Read ?from=&to= (defaults: the last 365 days up to today); returns (start, end) dates"""
+    end = parse_day(args['to']) if args.get('to') else (today or date.today())
+    start = parse_day(args['from']) if args.get('from') else end - timedelta(days=ANALYTICS_DEFAULT_DAYS - 1)
+    if start > end:
+        raise ValueError('La fecha inicial es posterior a la final')
+    if (end - start).days + 1 > ANALYTICS_MAX_DAYS:
+        raise ValueError(f'El rango no puede superar {ANALYTICS_MAX_DAYS} días')
+    return start, end
+
+
+def parse_int(args, name, default, low, high):
+    """Integer query parameter within [low, high]"""
+    try:
+        value = int(args.get(name, default))
+    except (TypeError, ValueError):
+        raise ValueError(f'{name} debe ser un número entero')
+    if not low <= value <= high:
+        raise ValueError(f'{name} debe estar entre {low} y {high}')
+    return value
+
+
+def parse_choice(args, name, default, choices):
+    value = args.get(name, default)
+    if value not in choices:
+        raise ValueError(f"{name} debe ser uno de: {', '.join(choices)}")
+    return value
+
+
+def _range(start, end):
+    return {'from': start.isoformat(), 'to': end.isoformat(), 'days': (end - start).days + 1}
+
+
+def _one_year_before(day):
+    try:
+        return day.replace(year=day.year - 1)
+    except ValueError:  # 29 de febrero
+        return day.replace(year=day.year - 1, day=28)
+
+
+def period_key(period, day):
+    """Python twin of PERIOD_KEYS for a date"""
+    if period == 'week':
+        ordinal = day.toordinal()
+        return ordinal - (ordinal - 1) % 7
+    if period == 'month':
+        return day.year * 12 + day.month - 1
+    return day.year
+
+
+def period_start(period, key):
+    """First day of the period with that key"""
+    if period == 'week':
+        return date.fromordinal(key)
+    if period == 'month':
+        return date(key // 12, key % 12 + 1, 1)
+    return date(key, 1, 1)
+
+
+def period_totals(conn, user_id, start, end, period='month'):
+    """Totals per week/month/year of the range, with running total and change vs the previous period"""
+    rows = conn.execute(f'''
+        {_BUCKETS.format(step=PERIOD_STEPS[period])},
+        grouped AS ({_GROUPED.format(key=PERIOD_KEYS[period])})
+        SELECT buckets.key, COALESCE(total, 0.0) AS total, COALESCE(transactions, 0), COALESCE(active_days, 0),
+               SUM(COALESCE(total, 0.0)) OVER w AS running_total,
+               COALESCE(total, 0.0) - LAG(COALESCE(total, 0.0)) OVER w AS change
+        FROM buckets LEFT JOIN grouped USING (key)
+        WINDOW w AS (ORDER BY buckets.key)
+        ORDER BY buckets.key
+    ''', (period_key(period, start), period_key(period, end),
+          user_id, start.toordinal(), end.toordinal())).fetchall()
+    return {
+        'range': _range(start, end),
+        'period': period,
+        'totals': [{
+            'start': period_start(period, row[0]).isoformat(),
+            'total': row[1],
+            'transactions': row[2],
+            'active_days': row[3],
+            'running_total': row[4],
+            'change': row[5],
+        } for row in rows],
+        'total': rows[-1][4] if rows else 0.0,
+    }
+
+
+def _moving_average_sql(conn, user_id, first, end, window):
+    rows = conn.execute(f'''
+        {_SERIES}
+        SELECT total, average FROM (
+            SELECT day_number, total,
+                   AVG(total) OVER (ORDER BY day_number ROWS BETWEEN {int(window) - 1} PRECEDING AND CURRENT ROW) AS average
+            FROM series
+        )
+        WHERE day_number >= ?
+        ORDER BY day_number
+    ''', (first - window + 1, end, user_id, first)).fetchall()
+    return [row[0] for row in rows], [row[1] for row in rows]
+
+
+def _moving_average_numpy(conn, user_id, first, end, window):
+    # Solo se leen los días con ingresos; la serie densa y la ventana se arman con sumas acumuladas
+    origin = first - window + 1
+    rows = conn.execute('''
+        SELECT day_number, total FROM daily_totals
+        WHERE user_id = ? AND day_number BETWEEN ? AND ?
+    ''', (user_id, origin, end)).fetchall()
+    series = np.zeros(end - origin + 1)
+    if rows:
+        days, totals = zip(*rows)
+        series[np.array(days) - origin] = totals
+    cumulative = np.concatenate(([0.0], np.cumsum(series)))
+    averages = (cumulative[window:] - cumulative[:-window]) / window
+    return series[window - 1:].tolist(), averages.tolist()
+
+
+def moving_average(conn, user_id, start, end, window=7):
+    """Daily totals of the range with the average of the last `window` days (days without income count as 0)"""
+    # La serie arranca window-1 días antes para que el primer promedio ya tenga la ventana completa
+    compute = _moving_average_numpy if NUMPY_AVAILABLE else _moving_average_sql
+    totals, averages = compute(conn, user_id, start.toordinal(), end.toordinal(), window)
+    first = start.toordinal()
+    return {
+        'range': _range(start, end),
+        'window': window,
+        'days': [{
+            'date': date.fromordinal(first + offset).isoformat(),
+            'total': total,
+            'average': average,
+        } for offset, (total, average) in enumerate(zip(totals, averages))],
+    }
+
+
+def year_over_year(conn, user_id, start, end, period='month'):
+    """Each month/year of the range against the same dates one year earlier"""
+    previous_start, previous_end = _one_year_before(start), _one_year_before(end)
+    key = PERIOD_KEYS[period]
+    # El año anterior se agrupa con la clave corrida un año, así cae en el periodo con el que se compara
+    rows = conn.execute(f'''
+        {_BUCKETS.format(step=1)},
+        this_year AS ({_GROUPED.format(key=key)}),
+        last_year AS ({_GROUPED.format(key=f'{key} + {YOY_PERIODS[period]}')})
+        SELECT buckets.key, COALESCE(this_year.total, 0.0), COALESCE(last_year.total, 0.0)
+        FROM buckets
+        LEFT JOIN this_year USING (key)
+        LEFT JOIN last_year USING (key)
+        ORDER BY buckets.key
+    ''', (period_key(period, start), period_key(period, end),
+          user_id, start.toordinal(), end.toordinal(),
+          user_id, previous_start.toordinal(), previous_end.toordinal())).fetchall()
+
+    def delta(total, previous):
+        return {
+            'total': total,
+            'previous_total': previous,
+            'delta': total - previous,
+            'delta_pct': round(100 * (total - previous) / previous, 2) if previous else None,
+        }
+
+    return {
+        'range': _range(start, end),
+        'previous_range': _range(previous_start, previous_end),
+        'period': period,
+        'periods': [dict(start=period_start(period, row[0]).isoformat(), **delta(row[1], row[2]))
+                    for row in rows],
+        'summary': delta(sum(row[1] for row in rows), sum(row[2] for row in rows)),
+    }
+
+
+def extreme_days(conn, user_id, start, end, limit=5):
+    """Best and worst days of the range, among days with income"""
+    def days(order):
+        rows = conn.execute(f'''
+            SELECT day_number, total, tx_count FROM daily_totals
+            WHERE user_id = ? AND day_number BETWEEN ? AND ?
+            ORDER BY total {order}, day_number
+            LIMIT ?
+        ''', (user_id, start.toordinal(), end.toordinal(), limit)).fetchall()
+        return [{'date': date.fromordinal(row[0]).isoformat(), 'total': row[1], 'transactions': row[2]}
+                for row in rows]
+
+    return {'range': _range(start, end), 'best': days('DESC'), 'worst': days('ASC')}
@@ -1,25 +1,65 @@
-from flask import Flask, render_template, request, jsonify, redirect, url_for, make_response, session, flash, send_from_directory
-import sqlite3
+from flask import Flask, Request, Response, render_template, request, jsonify, redirect, url_for, make_response, session, flash, g, has_app_context, stream_with_context
 import calendar
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 import os
 import json
 from functools import wraps
-import bcrypt
-import secrets
 import re
-try:
-    from PIL import Image
-    PIL_AVAILABLE = True
-except ImportError:
-    PIL_AVAILABLE = False
-    print("PIL not available. Logo upload feature will be disabled.")
-import io
-import base64
+import time
+import hashlib
+import hmac
+import math
+import threading
 from werkzeug.utils import secure_filename
+from werkzeug.http import is_resource_modified
+from werkzeug.middleware.proxy_fix import ProxyFix
+from markupsafe import Markup
+from passwords import PasswordHasher, HashPoolSaturated, HashTimeout
+from throttle import LoginThrottle, LOGIN_THROTTLE_ENABLED, LOGIN_USER_ATTEMPTS, LOGIN_LOCKOUT_MINUTES
+from db import (ConnectionPool, PooledConnection, DB_READ_POOL_ENABLED, DB_READ_POOL_SIZE, DB_READ_CACHE_SIZE_KB,
+                READ_YOUR_WRITES_SECONDS)
+from profiling import Profiler, profile_span, PROFILING_ENABLED, METRICS_TOKEN
+from migrations import migrate, import_legacy_data, check_query_plans
+from startup import prepare_database, migrate_shards, warm_up, WARM_UP_USERS
+from sharding import ShardRouter, MAIN_SHARD
+from rollups import rebuild_rollups, verify_rollups
+from versions import bump_all_month_versions, get_month_validator, get_user_validator
+from importer import parse_transaction, import_transactions, detect_format
+from export import iter_transactions, stream_csv, stream_xlsx, gzip_chunks, parse_period, XLSX_MIMETYPE
+from records import fetch_month_transactions, group_by_day
+from logos import remove_logo, load_logo, DEFAULT_VARIANT, LOGO_VARIANT
+from imaging import (LogoPipeline, LogoPipelineSaturated, InvalidLogo, spool_upload, inspect_logo, set_logo_job,
+                     PIL_AVAILABLE, LOGO_MAX_UPLOAD_BYTES)
+from cache import TTLCache, FragmentCache, Fragment, DASHBOARD_CACHE_SIZE, DASHBOARD_CACHE_TTL, FRAGMENT_CACHE_BYTES
+from pagination import fetch_reports_page, InvalidCursor
+from sessions import SQLiteSessionInterface, load_secret_key, recent_session_users
+from assets import AssetManifest
+import writer
+from writer import WriteQueue, WRITE_QUEUE_ENABLED
+from analytics import (PERIOD_KEYS, YOY_PERIODS, MAX_EXTREMES, MAX_WINDOW, parse_range, parse_int,
+                       parse_choice, period_totals, moving_average, year_over_year, extreme_days)
+
+class AppRequest(Request):
+    """Request whose body limit depends on the endpoint: the logo form is capped, bulk imports are not"""
+
+    @property
+    def max_content_length(self):
+        # Werkzeug corta la lectura al pasar el límite (también sin Content-Length, con chunked)
+        # antes de guardar el cuerpo en memoria o en un temporal
+        if self.endpoint == 'configuraciones':
+            return LOGO_MAX_UPLOAD_BYTES + LOGO_FORM_OVERHEAD
+        return super().max_content_length
 
 app = Flask(__name__)
-app.secret_key = secrets.token_hex(32)  # Clave secreta generada aleatoriamente
+app.request_class = AppRequest
+
+# Proxies (nginx, balanceador) delante de la app: request.remote_addr sale del X-Forwarded-For que
+# agregó el último de ellos. Sin proxies la cabecera se ignora, así un cliente no puede elegir la IP
+# que usa el throttle de login; detrás de uno sin esto todos comparten la IP del proxy
+TRUSTED_PROXIES = int(os.environ.get('TRUSTED_PROXIES', 0))
+if TRUSTED_PROXIES:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=TRUSTED_PROXIES, x_proto=TRUSTED_PROXIES)
+app.secret_key = load_secret_key()  # SECRET_KEY o un archivo compartido por todos los workers
 
 # Configuración de la aplicación
 
@@ -27,8 +67,8 @@ app.secret_key = secrets.token_hex(32)  # Clave secreta generada aleatoriamente
 SESSION_TIMEOUT = 3600  # 1 hora en segundos
 PASSWORD_MIN_LENGTH = 8
 UPLOAD_FOLDER = 'static/uploads'
+LOGO_FORM_OVERHEAD = 64 * 1024  # cabeceras multipart y demás campos del formulario del logo
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
-MAX_LOGO_SIZE = (64, 64)  # Tamaño máximo del logo en píxeles
 
 # Crear directorio de uploads si no existe
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
@@ -37,49 +77,24 @@ def allowed_file(filename):
     """Check if file extension is allowed"""
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
-def process_logo(file):
-    """Process and optimize logo image"""
-    if not PIL_AVAILABLE:
-        print("PIL not available - cannot process logo")
-        return None
-        
-    try:
-        # Abrir imagen con PIL
-        image = Image.open(file)
-        
-        # Convertir a RGBA si no lo está (para transparencias)
-        if image.mode != 'RGBA':
-            image = image.convert('RGBA')
-        
-        # Redimensionar manteniendo aspecto ratio
-        image.thumbnail(MAX_LOGO_SIZE, Image.Resampling.LANCZOS)
-        
-        # Crear imagen cuadrada con fondo transparente
-        new_image = Image.new('RGBA', MAX_LOGO_SIZE, (0, 0, 0, 0))
-        
-        # Centrar la imagen
-        x = (MAX_LOGO_SIZE[0] - image.size[0]) // 2
-        y = (MAX_LOGO_SIZE[1] - image.size[1]) // 2
-        new_image.paste(image, (x, y), image)
-        
-        # Convertir a base64 para almacenar en base de datos
-        buffer = io.BytesIO()
-        new_image.save(buffer, format='PNG', optimize=True)
-        img_data = base64.b64encode(buffer.getvalue()).decode()
-        
-        return f"data:image/png;base64,{img_data}"
-        
-    except Exception as e:
-        print(f"Error processing image: {e}")
-        return None
+password_hasher = PasswordHasher()
 
 def hash_password(password):
-    """Hash a password using bcrypt"""
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    """Hash a password using bcrypt (on the bounded hashing pool)"""
+    with profile_span('bcrypt'):
+        return password_hasher.hash(password)
 
 def verify_password(password, hashed):
-    """Verify a password against its hash"""
-    return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
+    """Verify a password against its hash (on the bounded hashing pool)"""
+    with profile_span('bcrypt'):
+        return password_hasher.verify(password, hashed)
+
+def hashing_busy(template):
+    """Fast 503 when the password hashing pool is saturated or a hash timed out in the queue"""
+    flash('El servidor está ocupado. Intenta nuevamente en unos segundos.', 'error')
+    response = make_response(render_template(template), 503)
+    response.headers['Retry-After'] = '1'
+    return response
 
 def validate_password(password):
     """Validate password strength"""
@@ -100,22 +115,31 @@ def validate_password(password):
     
     return True, "Contraseña válida"
 
-def get_user_logo():
-    """Get current user's logo data"""
+def get_user_logo(variant=DEFAULT_VARIANT):
+    """Get the URL of the current user's logo (hash cached in the session)"""
     if 'user_id' not in session:
         return None
     
-    conn = get_db_connection()
-    try:
-        user = conn.execute(
-            'SELECT logo_data FROM users WHERE id = ?',
-            (session['user_id'],)
-        ).fetchone()
-        return user['logo_data'] if user and user['logo_data'] else None
-    except:
+    # Sesiones anteriores al hash en sesión, o con un logo procesándose en segundo plano:
+    # se consulta hasta que el hash guardado sea el definitivo
+    if 'logo_hash' not in session or session.get('logo_pending'):
+        conn = get_db_connection()
+        try:
+            user = conn.execute(
+                'SELECT logo_hash, logo_status FROM users WHERE id = ?',
+                (session['user_id'],)
+            ).fetchone()
+            session['logo_hash'] = user['logo_hash'] if user else None
+            if not user or user['logo_status'] != 'pending':
+                session.pop('logo_pending', None)
+        except:
+            return None
+    
+    if not session['logo_hash']:
         return None
-    finally:
-        conn.close()
+    if variant == DEFAULT_VARIANT:
+        return url_for('user_logo', user_id=session['user_id'], logo_hash=session['logo_hash'])
+    return url_for('user_logo', user_id=session['user_id'], logo_hash=session['logo_hash'], variant=variant)
 
 def login_required(f):
     """Decorator to require login for protected routes"""
@@ -127,8 +151,11 @@ def login_required(f):
         
         # Verificar timeout de sesión
         if 'login_time' in session:
-            login_time = datetime.fromisoformat(session['login_time'])
-            if datetime.now() - login_time > timedelta(seconds=SESSION_TIMEOUT):
+            login_time = session['login_time']
+            if isinstance(login_time, str):
+                # Sesiones anteriores guardaban la hora en ISO
+                login_time = datetime.fromisoformat(login_time).timestamp()
+            if time.time() - login_time > SESSION_TIMEOUT:
                 session.clear()
                 flash('Tu sesión ha expirado. Por favor, inicia sesión nuevamente.', 'warning')
                 return redirect(url_for('login'))
@@ -141,149 +168,539 @@ def login_required(f):
 def inject_user_logo():
     return dict(get_user_logo=get_user_logo)
 
+# Bundles con hash generados por build.py (static/dist/manifest.json)
+assets = AssetManifest()
+app.add_template_global(assets.url, 'asset_url')
+
 # Database configuration
 DATABASE = 'ingresos.db'
+STARTUP_LOCK_FILE = os.environ.get('STARTUP_LOCK_FILE', DATABASE + '.lock')
+THROTTLE_FILE = os.environ.get('THROTTLE_FILE', DATABASE + '.throttle')
+db_pool = ConnectionPool(DATABASE)
+# Conexiones mode=ro para las páginas que solo leen (reportes, dashboard, analytics, exportación)
+read_pool = ConnectionPool(DATABASE, size=DB_READ_POOL_SIZE, read_only=True, cache_size_kb=DB_READ_CACHE_SIZE_KB)
+
+# Sesiones en user_sessions con LRU por proceso: sobreviven reinicios y sirven a varios workers
+app.session_interface = SQLiteSessionInterface(db_pool)
+
+# Instrumentación opcional (PROFILING=1): Server-Timing, /_metrics y stacks de requests lentos
+profiler = Profiler(app, PooledConnection) if PROFILING_ENABLED else None
+
+# Datos de cada usuario repartidos en shards (opcional, rebalance.py); sin mapa todo vive en DATABASE
+shard_router = ShardRouter(DATABASE)
+
+# Intentos de login fallidos por usuario e IP, compartidos entre workers (throttle.py)
+login_throttle = LoginThrottle(THROTTLE_FILE)
+
+# Variantes del logo (1x/2x/3x en PNG y WebP) generadas en segundo plano
+logo_pipeline = LogoPipeline(db_pool)
+
+# Cola de escrituras con commit agrupado (WRITE_QUEUE=1): un hilo escritor por proceso y shard
+write_queues = {}
+write_queues_lock = threading.Lock()
 
 def get_db_connection():
-    """Get database connection with row factory"""
-    conn = sqlite3.connect(DATABASE)
-    conn.row_factory = sqlite3.Row
-    return conn
+    """Get the pooled connection bound to the current request"""
+    if not has_app_context():
+        # Fuera de un request (scripts, init_db) se usa una conexión suelta que el llamador cierra
+        return db_pool.connect()
+    if 'db' not in g:
+        g.db = db_pool.acquire()
+    return g.db
+
+def load_shard_map():
+    """Read the shard map once per process from the main database"""
+    conn = db_pool.connect()
+    try:
+        shard_router.load(conn)
+    finally:
+        conn.close()
+
+def get_user_db(user_id):
+    """Connection to the database holding the user's transactions and rollups (their shard)"""
+    if not shard_router.loaded:
+        load_shard_map()
+    pool = shard_router.pool_for(user_id)
+    if pool is None:
+        return get_db_connection()
+    if not has_app_context():
+        return pool.connect()
+    shard_dbs = g.setdefault('shard_dbs', {})
+    if pool not in shard_dbs:
+        shard_dbs[pool] = pool.acquire()
+    return shard_dbs[pool]
+
+def note_write():
+    """Remember in the session that the user just wrote, so their next reads see it"""
+    if has_app_context() and session.get('user_id') is not None:
+        session['last_write'] = time.time()
+
+def wrote_recently():
+    return time.time() - session.get('last_write', 0) < READ_YOUR_WRITES_SECONDS
+
+def get_read_db(user_id):
+    """Read-only connection to the user's shard; the write connection right after a write"""
+    if not DB_READ_POOL_ENABLED or not has_app_context() or wrote_recently():
+        # Una conexión mode=ro puede tener abierta una lectura anterior al COMMIT propio
+        return get_user_db(user_id)
+    if not shard_router.loaded:
+        load_shard_map()
+    pool = shard_router.pool_for(user_id, read_only=True) or read_pool
+    read_dbs = g.setdefault('read_dbs', {})
+    if pool not in read_dbs:
+        read_dbs[pool] = pool.acquire()
+    return read_dbs[pool]
+
+def get_write_queue(user_id):
+    """Write queue of the user's shard"""
+    if not shard_router.loaded:
+        load_shard_map()
+    name = shard_router.shard_for(user_id)
+    write_queue = write_queues.get(name)
+    if write_queue is None:
+        with write_queues_lock:
+            write_queue = write_queues.get(name)
+            if write_queue is None:
+                write_queue = WriteQueue(db_pool if name == MAIN_SHARD else shard_router.pool(name))
+                write_queues[name] = write_queue
+    return write_queue
+
+def run_write(operation, user_id, *args):
+    """Run a write operation through the write queue, or directly on the request connection"""
+    if WRITE_QUEUE_ENABLED:
+        result = get_write_queue(user_id).run(operation, user_id, *args)
+    else:
+        conn = get_user_db(user_id)
+        try:
+            result = operation(conn, user_id, *args)
+            conn.commit()
+        except BaseException:
+            # Como el ROLLBACK TO de la cola: una transacción abierta retendría el lock de escritura
+            # hasta el teardown y bloquearía el guardado de la sesión en otra conexión
+            conn.rollback()
+            raise
+    # Solo después del COMMIT: un fallo no debe desviar las lecturas siguientes al pool de escritura
+    note_write()
+    return result
+
+@app.teardown_appcontext
+def release_db_connection(exception=None):
+    """Return the request connections to their pools"""
+    conn = g.pop('db', None)
+    if conn is not None:
+        db_pool.release(conn)
+    for pool, conn in g.pop('shard_dbs', {}).items():
+        pool.release(conn)
+    for pool, conn in g.pop('read_dbs', {}).items():
+        pool.release(conn)
 
 def init_db():
-    """Initialize database with new structure for multiple transactions and users"""
-    conn = get_db_connection()
-      # Crear tabla de usuarios
-    conn.execute('''
-        CREATE TABLE IF NOT EXISTS users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            username TEXT UNIQUE NOT NULL,
-            email TEXT UNIQUE NOT NULL,
-            password_hash TEXT NOT NULL,
-            is_active BOOLEAN DEFAULT 1,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            last_login TIMESTAMP,
-            failed_login_attempts INTEGER DEFAULT 0,
-            locked_until TIMESTAMP,
-            logo_filename TEXT,
-            logo_data TEXT
-        )
-    ''')
-    
-    # New table for individual transactions
-    conn.execute('''
-        CREATE TABLE IF NOT EXISTS transactions (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER NOT NULL,
-            year INTEGER NOT NULL,
-            month INTEGER NOT NULL,
-            day INTEGER NOT NULL,
-            amount REAL NOT NULL,
-            description TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (user_id) REFERENCES users (id)
-        )
-    ''')
-      # Tabla de sesiones activas (opcional, para mayor seguridad)
-    conn.execute('''
-        CREATE TABLE IF NOT EXISTS user_sessions (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER NOT NULL,
-            session_token TEXT UNIQUE NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            expires_at TIMESTAMP NOT NULL,
-            ip_address TEXT,
-            user_agent TEXT,
-            FOREIGN KEY (user_id) REFERENCES users (id)
-        )
-    ''')
-      # Check if old table exists and migrate data if necessary
-    cursor = conn.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='ingresos'")
-    if cursor.fetchone():
-        # Skip migration if no users exist - data will be preserved in old table
-        user_count = conn.execute('SELECT COUNT(*) FROM users').fetchone()[0]
-        if user_count > 0:
-            # Get first user for migration (if any users exist)
-            first_user = conn.execute('SELECT id FROM users ORDER BY created_at ASC LIMIT 1').fetchone()
-            if first_user:
-                user_id = first_user[0]
-                try:
-                    conn.execute('''
-                        INSERT INTO transactions (user_id, year, month, day, amount, description, created_at)
-                        SELECT ?, año, mes, dia, monto, 'Migrated automatically', fecha_registro
-                        FROM ingresos
-                        WHERE monto > 0
-                    ''', (user_id,))
-                    print("Data migrated successfully from 'ingresos' to 'transactions'")
-                except sqlite3.Error as e:
-                    print(f"Migration error: {e}")
-    
-    # Check if old 'transacciones' table exists and migrate
-    cursor = conn.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='transacciones'")
-    if cursor.fetchone():
-        user_count = conn.execute('SELECT COUNT(*) FROM users').fetchone()[0]
-        if user_count > 0:
-            first_user = conn.execute('SELECT id FROM users ORDER BY created_at ASC LIMIT 1').fetchone()
-            if first_user:
-                user_id = first_user[0]
-                try:
-                    conn.execute('''
-                        INSERT INTO transactions (user_id, year, month, day, amount, description, created_at)
-                        SELECT ?, año, mes, dia, monto, descripcion, fecha_registro
-                        FROM transacciones
-                        WHERE monto > 0
-                    ''', (user_id,))
-                    print("Data migrated successfully from 'transacciones' to 'transactions'")
-                except sqlite3.Error as e:
-                    print(f"Migration error: {e}")
-    
-    conn.commit()
-    conn.close()
+    """Initialize database applying pending schema migrations (also on every shard)"""
+    conn = db_pool.connect()
+    try:
+        migrate(conn)
+        import_legacy_data(conn)
+        migrate_shards(shard_router, conn)
+    finally:
+        conn.close()
+
+def warm_caches(limit=WARM_UP_USERS):
+    """Fill the dashboard and current-month fragment caches of the users with live sessions"""
+    started = time.perf_counter()
+    conn = db_pool.connect()
+    try:
+        user_ids = recent_session_users(conn, limit)
+    finally:
+        conn.close()
+    now = datetime.now()
+    for user_id in user_ids:
+        # Las vistas toman el usuario de la sesión: un request interno por usuario, sin guardar la sesión
+        with app.test_request_context():
+            session['user_id'] = user_id
+            session['login_time'] = time.time()
+            dashboard()
+            monthly_report(now.year, now.month)
+    print(f"🔥 Cachés de {len(user_ids)} usuarios con sesión activa en "
+          f"{(time.perf_counter() - started) * 1000:.0f} ms")
+    return len(user_ids)
+
+def warm_up_worker(connections):
+    """Open this process's pool connections before its first request (gunicorn post_fork)"""
+    db_pool.prefill(connections)
+    if DB_READ_POOL_ENABLED:
+        read_pool.prefill(connections)
+
+_app_ready = False
+
+def create_app():
+    """Get the app ready to serve: migrations once under a file lock, then warm-up"""
+    global _app_ready
+    if not _app_ready:
+        prepare_database(db_pool, STARTUP_LOCK_FILE, shard_router)
+        warm_up(app)
+        warm_caches()
+        # Ninguna conexión cruza el fork: cada worker abre las suyas en su propio pool
+        db_pool.close_all()
+        read_pool.close_all()
+        shard_router.close_all()
+        _app_ready = True
+    return app
+
+@app.cli.command('init-db')
+def init_db_command():
+    """Apply pending migrations"""
+    init_db()
+
+@app.cli.command('check-query-plans')
+def check_query_plans_command():
+    """Fail if any hot query does a full scan of transactions"""
+    conn = db_pool.connect()
+    try:
+        migrate(conn)
+        problems = check_query_plans(conn)
+    finally:
+        conn.close()
+    for name, plan in problems.items():
+        print(f"❌ {name}: {' | '.join(plan)}")
+    if problems:
+        raise SystemExit(1)
+    print("✅ Ninguna consulta caliente recorre la tabla completa")
+
+@app.cli.command('rebuild-rollups')
+def rebuild_rollups_command():
+    """Recompute daily/monthly rollups from transactions and verify them"""
+    conn = db_pool.connect()
+    try:
+        migrate(conn)
+        migrate_shards(shard_router, conn)
+    finally:
+        conn.close()
+    mismatches = []
+    # Cada shard tiene sus propias transacciones y rollups
+    for pool in [db_pool] + [shard_router.pool(name) for name in shard_router.shards()]:
+        conn = pool.connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            rebuild_rollups(conn)
+            bump_all_month_versions(conn)
+            conn.commit()
+            mismatches += verify_rollups(conn)
+        finally:
+            conn.close()
+    for mismatch in mismatches[:20]:
+        print(f"❌ {mismatch}")
+    if mismatches:
+        print(f"❌ {len(mismatches)} diferencias entre rollups y transacciones")
+        raise SystemExit(1)
+    print("✅ Rollups reconstruidos y verificados")
+
+dashboard_cache = TTLCache(DASHBOARD_CACHE_SIZE, DASHBOARD_CACHE_TTL)
+
+def get_dashboard_metrics(user_id, version=None):
+    """Dashboard metrics for a user, computed in one rollup read and cached per user and data version"""
+    now = datetime.now()
+    conn = get_read_db(user_id)
+    # El caché es de cada proceso: una escritura en otro worker solo se nota en month_versions
+    if version is None:
+        version = get_user_validator(conn, user_id)[0]
+    metrics = dashboard_cache.get(user_id)
+    # Al cambiar de mes la entrada en caché ya no describe el mes actual
+    if metrics is not None and metrics['version'] == version and metrics['period'] == (now.year, now.month):
+        return metrics
+    
+    months = conn.execute('''
+        SELECT year, month, total, tx_count
+        FROM monthly_totals
+        WHERE user_id = ?
+        ORDER BY year DESC, month DESC
+    ''', (user_id,)).fetchall()
+    
+    total_income = 0
+    total_transactions = 0
+    current_month_income = 0
+    for row in months:
+        total_income += row['total']
+        total_transactions += row['tx_count']
+        if (row['year'], row['month']) == (now.year, now.month):
+            current_month_income = row['total']
+    
+    metrics = {
+        'version': version,
+        'period': (now.year, now.month),
+        'total_income': total_income,
+        'current_month_income': current_month_income,
+        'recent_months': [
+            {'year': row['year'], 'month': row['month'], 'total': row['total']}
+            for row in months[:6]
+        ],
+        'total_transactions': total_transactions,
+    }
+    dashboard_cache.set(user_id, metrics)
+    return metrics
+
+def dashboard_payload(metrics):
+    """JSON-friendly version of the dashboard metrics"""
+    year, month = metrics['period']
+    days_elapsed = datetime.now().day
+    return {
+        'year': year,
+        'month': month,
+        'total_income': metrics['total_income'],
+        'current_month_income': metrics['current_month_income'],
+        'daily_average': metrics['current_month_income'] / days_elapsed if days_elapsed > 0 else 0,
+        'total_transactions': metrics['total_transactions'],
+        'recent_months': metrics['recent_months'],
+    }
+
+def get_report_aggregates(user_id, year, month, day=None):
+    """Day totals, month totals and dashboard metrics after a change in (year, month)"""
+    conn = get_read_db(user_id)
+    month_row = conn.execute(
+        'SELECT total, tx_count, active_days FROM monthly_totals WHERE user_id = ? AND year = ? AND month = ?',
+        (user_id, year, month)
+    ).fetchone()
+    
+    query = 'SELECT day, total, tx_count FROM daily_totals WHERE user_id = ? AND year = ? AND month = ?'
+    params = (user_id, year, month)
+    if day is not None:
+        query += ' AND day = ?'
+        params += (day,)
+    days = {
+        str(row['day']): {'total': row['total'], 'count': row['tx_count']}
+        for row in conn.execute(query, params)
+    }
+    # Un día que se quedó sin transacciones también es un cambio que el cliente debe ver
+    if day is not None and str(day) not in days:
+        days[str(day)] = {'total': 0, 'count': 0}
+    
+    total = month_row['total'] if month_row else 0
+    active_days = month_row['active_days'] if month_row else 0
+    return {
+        'year': year,
+        'month': month,
+        'days': days,
+        'month_summary': {
+            'total': total,
+            'total_transactions': month_row['tx_count'] if month_row else 0,
+            'active_days': active_days,
+            'daily_average': total / active_days if active_days > 0 else 0,
+        },
+        'dashboard': dashboard_payload(get_dashboard_metrics(user_id)),
+    }
+
+fragment_cache = FragmentCache(FRAGMENT_CACHE_BYTES)
+
+def cached_fragment(name, user_id, year, month, version, render):
+    """Rendered fragment of a month, reused until a write bumps the month's data version"""
+    # La versión se lee antes que los datos: si una escritura se cuela en medio, el
+    # fragmento queda guardado con la versión vieja y el próximo request lo vuelve a generar
+    key = (name, user_id, year, month)
+    fragment = fragment_cache.get(key, version)
+    if fragment is None:
+        fragment = render()
+        fragment_cache.set(key, version, fragment)
+    return fragment
+
+FRAGMENT_SLOT = '<!-- fragment -->'
+
+def render_with_fragment(template_name, fragment, **context):
+    """Render a page around a cached fragment without copying the fragment through Jinja"""
+    # Un mes con miles de transacciones son varios MB de HTML: se pega en bytes tal cual
+    # en lugar de volver a escaparlo, concatenarlo y codificarlo en cada request
+    page = render_template(template_name, fragment=Markup(FRAGMENT_SLOT), **context, **fragment.context)
+    head, tail = page.split(FRAGMENT_SLOT, 1)
+    return Response([head.encode('utf-8'), fragment.html, tail.encode('utf-8')], mimetype='text/html')
+
+def _build_digest():
+    digest = hashlib.sha1(json.dumps(assets.entries, sort_keys=True).encode())
+    template_dir = os.path.join(app.root_path, app.template_folder)
+    for root, _, files in sorted(os.walk(template_dir)):
+        for name in sorted(files):
+            with open(os.path.join(root, name), 'rb') as f:
+                digest.update(f.read())
+    return digest.hexdigest()[:12]
+
+# Cambiar una plantilla o los bundles de assets cambia el HTML aunque los datos sean los mismos
+PAGE_BUILD = _build_digest()
+
+def page_etag(*parts):
+    """Weak ETag of an HTML page: its data version plus everything else the markup depends on"""
+    # El encabezado muestra usuario y logo, y varias páginas dependen del día actual
+    parts += (session.get('user_id'), session.get('username'), session.get('logo_hash'),
+              datetime.now().date().isoformat(), PAGE_BUILD)
+    return hashlib.sha1(repr(parts).encode()).hexdigest()[:24]
+
+def page_last_modified(updated_at):
+    # Nunca antes de hoy a la medianoche: las páginas cambian de fecha aunque no haya escrituras
+    midnight = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0).timestamp()
+    return datetime.fromtimestamp(max(updated_at or 0, midnight), timezone.utc)
+
+def not_modified(etag, updated_at):
+    """304 response when the browser's copy is still current, None when the page must be rendered"""
+    # Con mensajes flash pendientes hay que renderizar para mostrarlos (y consumirlos), y con
+    # un logo en proceso el encabezado cambia en cuanto termine
+    if '_flashes' in session or session.get('logo_pending'):
+        return None
+    if is_resource_modified(request.environ, etag=etag, last_modified=page_last_modified(updated_at)):
+        return None
+    return with_validators(Response(status=304), etag, updated_at)
+
+def with_validators(response, etag, updated_at):
+    """Attach the weak ETag and Last-Modified, and make the browser revalidate every time"""
+    response = make_response(response)
+    response.set_etag(etag, weak=True)
+    response.last_modified = page_last_modified(updated_at)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+def conditional_json(payload):
+    """JSON response with a strong ETag that answers If-None-Match with 304"""
+    response = jsonify(payload)
+    response.add_etag()
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response.make_conditional(request)
+
+def wants_json():
+    """True for AJAX callers that expect a JSON body instead of a redirect"""
+    return request.is_json or request.accept_mimetypes.best == 'application/json'
 
 @app.route('/')
 @login_required
 def dashboard():
     """Main dashboard with metrics"""
     user_id = session['user_id']
-    conn = get_db_connection()
+    version, updated_at = get_user_validator(get_read_db(user_id), user_id)
+    etag = page_etag('dashboard', version)
+    cached = not_modified(etag, updated_at)
+    if cached:
+        return cached
     
-    # Get general statistics for this user
-    total_income = conn.execute('SELECT SUM(amount) as total FROM transactions WHERE user_id = ?', (user_id,)).fetchone()['total'] or 0
+    # La misma versión del ETag: el cuerpo nunca puede ser más viejo que la etiqueta
+    metrics = get_dashboard_metrics(user_id, version)
     
-    # Current month income
-    current_year = datetime.now().year
-    current_month = datetime.now().month
-    current_month_income = conn.execute(
-        'SELECT SUM(amount) as total FROM transactions WHERE user_id = ? AND year = ? AND month = ?',
-        (user_id, current_year, current_month)
-    ).fetchone()['total'] or 0
-    
-    # Last 6 months of income for chart
-    recent_months = conn.execute('''
-        SELECT year, month, SUM(amount) as total
-        FROM transactions
-        WHERE user_id = ?
-        GROUP BY year, month
-        ORDER BY year DESC, month DESC
-        LIMIT 6
-    ''', (user_id,)).fetchall()
+    current_year, current_month = metrics['period']
+    current_month_income = metrics['current_month_income']
     
     # Daily average for current month
     days_elapsed = datetime.now().day
     daily_average = current_month_income / days_elapsed if days_elapsed > 0 else 0
-    # Total number of transactions
-    total_transactions = conn.execute('SELECT COUNT(*) as total FROM transactions WHERE user_id = ?', (user_id,)).fetchone()['total']
-    conn.close()
     
-    return render_template('dashboard.html', 
-                         total_income=total_income,
+    return with_validators(render_template('dashboard.html', 
+                         total_income=metrics['total_income'],
                          current_month_income=current_month_income,
                          daily_average=daily_average,
-                         recent_months=recent_months,
-                         total_transactions=total_transactions,
+                         recent_months=metrics['recent_months'],
+                         total_transactions=metrics['total_transactions'],
                          current_year=current_year,
                          current_month=current_month,
-                         current_date=datetime.now())
+                         current_date=datetime.now()), etag, updated_at)
+
+@app.route('/api/dashboard')
+@login_required
+def api_dashboard():
+    """Dashboard metrics as JSON"""
+    return conditional_json(dashboard_payload(get_dashboard_metrics(session['user_id'])))
+
+@app.route('/api/report/<int:year>/<int:month>')
+@login_required
+def api_report(year, month):
+    """Day totals, month totals and dashboard metrics of a month as JSON"""
+    if month < 1 or month > 12:
+        return jsonify({'success': False, 'message': 'Mes inválido'}), 404
+    return conditional_json(get_report_aggregates(session['user_id'], year, month))
+
+@app.route('/api/analytics/totals')
+@login_required
+def api_analytics_totals():
+    """Totals per ?period=week|month|year between ?from=YYYY-MM-DD and ?to=YYYY-MM-DD"""
+    try:
+        start, end = parse_range(request.args)
+        period = parse_choice(request.args, 'period', 'month', PERIOD_KEYS)
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    return conditional_json(period_totals(get_read_db(session['user_id']), session['user_id'], start, end, period))
+
+@app.route('/api/analytics/moving-average')
+@login_required
+def api_analytics_moving_average():
+    """Daily totals of a range with their ?window=N days moving average"""
+    try:
+        start, end = parse_range(request.args)
+        window = parse_int(request.args, 'window', 7, 1, MAX_WINDOW)
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    return conditional_json(moving_average(get_read_db(session['user_id']), session['user_id'], start, end, window))
+
+@app.route('/api/analytics/yoy')
+@login_required
+def api_analytics_yoy():
+    """Each period of a range against the same days of the previous year"""
+    try:
+        start, end = parse_range(request.args)
+        period = parse_choice(request.args, 'period', 'month', YOY_PERIODS)
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    return conditional_json(year_over_year(get_read_db(session['user_id']), session['user_id'], start, end, period))
+
+@app.route('/api/analytics/extremes')
+@login_required
+def api_analytics_extremes():
+    """Best and worst ?limit=N days of a range"""
+    try:
+        start, end = parse_range(request.args)
+        limit = parse_int(request.args, 'limit', 5, 1, MAX_EXTREMES)
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    return conditional_json(extreme_days(get_read_db(session['user_id']), session['user_id'], start, end, limit))
+
+def internal_access():
+    """None when the request carries the METRICS_TOKEN bearer token, the error response otherwise"""
+    # Sin token configurado los endpoints internos no existen: exponen datos de todos los usuarios
+    if not METRICS_TOKEN:
+        return render_template('404.html'), 404
+    if not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {METRICS_TOKEN}'):
+        return Response('unauthorized\n', status=401, mimetype='text/plain')
+    return None
+
+@app.route('/_stats')
+def internal_stats():
+    """Connection pool and cache counters (requires METRICS_TOKEN)"""
+    denied = internal_access()
+    if denied:
+        return denied
+    return jsonify({
+        'db_pool': db_pool.stats(),
+        'read_pool': read_pool.stats(),
+        'dashboard_cache': dashboard_cache.stats(),
+        'fragment_cache': fragment_cache.stats(),
+        'shard_pools': shard_router.stats(),
+        'write_queues': {name: write_queue.stats() for name, write_queue in write_queues.items()},
+        'password_hasher': password_hasher.stats(),
+        'logo_pipeline': logo_pipeline.stats(),
+        'login_throttle': login_throttle.stats(),
+    })
+
+@app.route('/_metrics')
+def metrics():
+    """Prometheus metrics (only when profiling is enabled, requires METRICS_TOKEN)"""
+    if profiler is None:
+        return render_template('404.html'), 404
+    denied = internal_access()
+    if denied:
+        return denied
+    gauges = {f'db_pool_{name}': value for name, value in db_pool.stats().items()}
+    gauges.update((f'read_pool_{name}', value) for name, value in read_pool.stats().items())
+    gauges.update((f'dashboard_cache_{name}', value) for name, value in dashboard_cache.stats().items())
+    gauges.update((f'fragment_cache_{name}', value) for name, value in fragment_cache.stats().items())
+    gauges.update((f'session_cache_{name}', value) for name, value in app.session_interface.stats().items())
+    gauges.update((f'logo_pipeline_{name}', value) for name, value in logo_pipeline.stats().items())
+    gauges.update((f'login_throttle_{name}', value) for name, value in login_throttle.stats().items())
+    for shard, pool in shard_router.stats().items():
+        gauges.update((f'shard_{shard}_pool_{name}', value) for name, value in pool.items())
+    for shard, write_queue in write_queues.items():
+        prefix = 'write_queue' if shard == MAIN_SHARD else f'write_queue_{shard}'
+        gauges.update((f'{prefix}_{name}', value) for name, value in write_queue.stats().items())
+    return Response(profiler.metrics.render(gauges), mimetype='text/plain; version=0.0.4')
 
 @app.route('/nuevo')
 @app.route('/nuevo_reporte')
@@ -304,59 +721,53 @@ def monthly_report(year, month):
     if month < 1 or month > 12:
         return redirect(url_for('new_report'))
     
+    user_id = session['user_id']
+    version, updated_at = get_month_validator(get_read_db(user_id), user_id, year, month)
+    etag = page_etag('monthly_report', year, month, version)
+    cached = not_modified(etag, updated_at)
+    if cached:
+        return cached
+    
     # Get number of days in month
     days_in_month = calendar.monthrange(year, month)[1]
     month_name = calendar.month_name[month]
     
-    # Get existing transactions grouped by day for this user
-    user_id = session['user_id']
-    conn = get_db_connection()
-    transactions_by_day = {}
-    
-    transactions = conn.execute('''
-        SELECT day, amount, description, id 
-        FROM transactions 
-        WHERE user_id = ? AND year = ? AND month = ? 
-        ORDER BY day, id
-    ''', (user_id, year, month)).fetchall()
-    
-    for trans in transactions:
-        day = trans['day']
-        if day not in transactions_by_day:
-            transactions_by_day[day] = []
-        transactions_by_day[day].append({
-            'id': trans['id'],
-            'amount': trans['amount'],
-            'description': trans['description'] or ''
+    def render_days():
+        # Get existing transactions grouped by day for this user
+        transactions_by_day = group_by_day(fetch_month_transactions(get_read_db(user_id), user_id, year, month))
+        
+        # Calculate totals by day
+        totals_by_day = {}
+        total_month = 0
+        for day in range(1, days_in_month + 1):
+            if day in transactions_by_day:
+                totals_by_day[day] = sum(t.amount for t in transactions_by_day[day])
+                total_month += totals_by_day[day]
+            else:
+                totals_by_day[day] = 0
+        
+        # Calculate statistics
+        active_days = len([day for day in totals_by_day.values() if day > 0])
+        daily_average = total_month / active_days if active_days > 0 else 0
+        
+        html = render_template('partials/report_days.html',
+                               year=year,
+                               month=month,
+                               days_in_month=days_in_month,
+                               transactions_by_day=transactions_by_day)
+        return Fragment(html.encode('utf-8'), {
+            'total_month': total_month,
+            'active_days': active_days,
+            'daily_average': daily_average,
         })
     
-    # Calculate totals by day
-    totals_by_day = {}
-    total_month = 0
-    for day in range(1, days_in_month + 1):
-        if day in transactions_by_day:
-            totals_by_day[day] = sum(t['amount'] for t in transactions_by_day[day])
-            total_month += totals_by_day[day]
-        else:
-            totals_by_day[day] = 0
-    
-    # Calculate statistics
-    active_days = len([day for day in totals_by_day.values() if day > 0])
-    daily_average = total_month / active_days if active_days > 0 else 0
-    
-    conn.close()
-    
-    return render_template('reporte_mensual.html',
+    fragment = cached_fragment('report_days', user_id, year, month, version, render_days)
+    return with_validators(render_with_fragment('reporte_mensual.html', fragment,
                          year=year,
                          month=month,
                          month_name=month_name,
                          days_in_month=days_in_month,
-                         transactions_by_day=transactions_by_day,
-                         totals_by_day=totals_by_day,
-                         total_month=total_month,
-                         active_days=active_days,
-                         daily_average=daily_average,
-                         current_time=datetime.now().strftime('%H:%M'))
+                         current_time=datetime.now().strftime('%H:%M')), etag, updated_at)
 
 @app.route('/add-transaction', methods=['POST'])
 @login_required
@@ -365,72 +776,92 @@ def add_transaction():
     user_id = session['user_id']
     
     # Handle both JSON and form data
+    json_response = wants_json()
     if request.is_json:
         data = request.get_json()
     else:
         data = request.form
     
     try:
-        year = int(data.get('year'))
-        month = int(data.get('month'))
-        day = int(data.get('day'))
-        amount = float(data.get('amount', 0))
-        description = data.get('description', '').strip()
+        # Mismas reglas de validación que la importación masiva
+        year, month, day, amount, description = parse_transaction(data)
         
-        if amount <= 0:
-            if request.is_json:
-                return jsonify({'success': False, 'message': 'El monto debe ser mayor a 0'})
-            else:
-                flash('El monto debe ser mayor a 0', 'error')
-                return redirect(url_for('monthly_report', year=year, month=month))
-        
-        conn = get_db_connection()
-        cursor = conn.execute('''
-            INSERT INTO transactions (user_id, year, month, day, amount, description)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (user_id, year, month, day, amount, description))
+        transaction_id = run_write(writer.insert_transaction, user_id, year, month, day, amount, description)
+        dashboard_cache.invalidate(user_id)
         
-        conn.commit()
-        conn.close()
-        
-        if request.is_json:
+        if json_response:
             # Return new transaction with its ID for AJAX requests
             new_transaction = {
-                'id': cursor.lastrowid,
+                'id': transaction_id,
                 'amount': amount,
                 'description': description
             }
-            return jsonify({'success': True, 'transaction': new_transaction})
+            return jsonify({
+                'success': True,
+                'transaction': new_transaction,
+                'aggregates': get_report_aggregates(user_id, year, month, day)
+            })
         else:
             # Redirect for form submissions
             flash('💰 Ingreso agregado exitosamente', 'success')
             return redirect(url_for('monthly_report', year=year, month=month))
             
     except ValueError as e:
-        error_msg = 'Datos inválidos. Verifica los valores ingresados.'
-        if request.is_json:
+        error_msg = str(e)
+        if json_response:
             return jsonify({'success': False, 'message': error_msg})
         else:
             flash(error_msg, 'error')
             return redirect(url_for('new_report'))
     except Exception as e:
         error_msg = f'Error al guardar: {str(e)}'
-        if request.is_json:
+        if json_response:
             return jsonify({'success': False, 'message': error_msg})
         else:
             flash(error_msg, 'error')
             return redirect(url_for('new_report'))
 
+@app.route('/import-transactions', methods=['POST'])
+@login_required
+def import_transactions_upload():
+    """Bulk import transactions from a CSV or NDJSON upload (multipart file or raw body)"""
+    user_id = session['user_id']
+    
+    if request.mimetype == 'multipart/form-data':
+        upload = request.files.get('file')
+        if not upload or upload.filename == '':
+            return jsonify({'success': False, 'message': 'No se recibió ningún archivo'}), 400
+        stream, fmt = upload.stream, detect_format(upload.mimetype, upload.filename)
+    else:
+        # Cuerpo crudo (text/csv o application/x-ndjson): se lee directo del socket
+        stream, fmt = request.stream, detect_format(request.mimetype, None)
+    
+    try:
+        result = import_transactions(get_user_db(user_id), user_id, stream, fmt,
+                                     strict=request.args.get('strict') == '1')
+    except UnicodeDecodeError:
+        return jsonify({'success': False, 'message': 'El archivo debe estar codificado en UTF-8'}), 400
+    
+    if result['imported']:
+        note_write()
+    dashboard_cache.invalidate(user_id)
+    return jsonify(result)
+
 @app.route('/delete-transaction/<int:transaction_id>', methods=['DELETE'])
 @login_required
 def delete_transaction(transaction_id):
+    user_id = session['user_id']
     try:
-        conn = get_db_connection()
-        conn.execute('DELETE FROM transactions WHERE id = ?', (transaction_id,))
-        conn.commit()
-        conn.close()
+        period = run_write(writer.delete_transaction, user_id, transaction_id)
+        if not period:
+            return jsonify({'success': False, 'message': 'Transacción no encontrada'})
+        dashboard_cache.invalidate(user_id)
         
-        return jsonify({'success': True, 'message': 'Transacción eliminada exitosamente'})
+        return jsonify({
+            'success': True,
+            'message': 'Transacción eliminada exitosamente',
+            'aggregates': get_report_aggregates(user_id, *period)
+        })
         
     except Exception as e:
         return jsonify({'success': False, 'message': f'Error: {str(e)}'})
@@ -438,6 +869,7 @@ def delete_transaction(transaction_id):
 @app.route('/edit-transaction/<int:transaction_id>', methods=['PUT'])
 @login_required
 def edit_transaction(transaction_id):
+    user_id = session['user_id']
     try:
         data = request.get_json()
         amount = data.get('amount')
@@ -446,16 +878,16 @@ def edit_transaction(transaction_id):
         if not amount or amount <= 0:
             return jsonify({'success': False, 'message': 'El monto debe ser mayor a 0'})
         
-        conn = get_db_connection()
-        conn.execute('''
-            UPDATE transactions 
-            SET amount = ?, description = ?
-            WHERE id = ?
-        ''', (amount, description, transaction_id))
-        conn.commit()
-        conn.close()
+        period = run_write(writer.update_transaction, user_id, transaction_id, amount, description)
+        if not period:
+            return jsonify({'success': False, 'message': 'Transacción no encontrada'})
+        dashboard_cache.invalidate(user_id)
         
-        return jsonify({'success': True, 'message': 'Transacción editada exitosamente'})
+        return jsonify({
+            'success': True,
+            'message': 'Transacción editada exitosamente',
+            'aggregates': get_report_aggregates(user_id, *period)
+        })
         
     except Exception as e:
         return jsonify({'success': False, 'message': f'Error: {str(e)}'})
@@ -476,72 +908,31 @@ def view_reports():
     if per_page not in [10, 25, 50, 100]:
         per_page = 10
     
-    conn = get_db_connection()
-    
-    # Get total count for pagination for this user
-    total_count = conn.execute('''
-        SELECT COUNT(*) as count
-        FROM (
-            SELECT year, month
-            FROM transactions
-            WHERE user_id = ? AND amount > 0
-            GROUP BY year, month
-        )
-    ''', (user_id,)).fetchone()['count']
-    
-    # Calculate pagination values
-    total_pages = (total_count + per_page - 1) // per_page  # Ceiling division
-    offset = (page - 1) * per_page
-    
-    # Get paginated reports for this user
-    reports = conn.execute('''
-        SELECT year, month, SUM(amount) as total, COUNT(*) as total_transactions,
-               COUNT(DISTINCT day) as dias_registrados
-        FROM transactions
-        WHERE user_id = ? AND amount > 0
-        GROUP BY year, month
-        ORDER BY year DESC, month DESC
-        LIMIT ? OFFSET ?
-    ''', (user_id, per_page, offset)).fetchall()
-    conn.close()
+    cursor = request.args.get('cursor') or None
     
-    # Add month names
-    reports_with_names = []
-    for report in reports:
-        reports_with_names.append({
-            'year': report['year'],
-            'month': report['month'],
-            'month_name': calendar.month_name[report['month']],
-            'total': report['total'],
-            'total_transactions': report['total_transactions'],
-            'dias_registrados': report['dias_registrados']
-        })
+    conn = get_read_db(user_id)
+    version, updated_at = get_user_validator(conn, user_id)
+    etag = page_etag('view_reports', version, page, per_page, cursor)
+    cached = not_modified(etag, updated_at)
+    if cached:
+        return cached
     
-    # Create pagination object
-    class Pagination:
-        def __init__(self, page, per_page, total, items):
-            self.page = page
-            self.per_page = per_page
-            self.total = total
-            self.items = items
-            self.pages = total_pages
-            self.has_prev = page > 1
-            self.has_next = page < total_pages
-            self.prev_num = page - 1 if self.has_prev else None
-            self.next_num = page + 1 if self.has_next else None
-        
-        def iter_pages(self, left_edge=2, left_current=2, right_current=3, right_edge=2):
-            """Generate page numbers for pagination display"""
-            last = self.pages
-            for num in range(1, last + 1):
-                if num <= left_edge or \
-                   (self.page - left_current - 1 < num < self.page + right_current) or \
-                   num > last - right_edge:
-                    yield num
+    try:
+        pagination = fetch_reports_page(conn, user_id, per_page, page=max(page, 1), cursor=cursor)
+    except InvalidCursor:
+        return redirect(url_for('view_reports', per_page=per_page))
     
-    pagination = Pagination(page, per_page, total_count, reports_with_names)
+    # Add month names
+    pagination.items = [{
+        'year': report['year'],
+        'month': report['month'],
+        'month_name': calendar.month_name[report['month']],
+        'total': report['total'],
+        'total_transactions': report['total_transactions'],
+        'dias_registrados': report['dias_registrados']
+    } for report in pagination.items]
     
-    return render_template('reportes.html', reports=pagination)
+    return with_validators(render_template('reportes.html', reports=pagination), etag, updated_at)
 
 @app.route('/imprimir/<int:year>/<int:month>')
 @app.route('/print-report/<int:year>/<int:month>')
@@ -554,55 +945,89 @@ def print_report(year, month):
     if month < 1 or month > 12:
         return redirect(url_for('view_reports'))
     
+    version, updated_at = get_month_validator(get_read_db(user_id), user_id, year, month)
+    etag = page_etag('print_report', year, month, version)
+    cached = not_modified(etag, updated_at)
+    if cached:
+        return cached
+    
     days_in_month = calendar.monthrange(year, month)[1]
     month_name = calendar.month_name[month]
     
-    conn = get_db_connection()
-    
-    # Get all transactions with created_at for this user only
-    transactions_complete = conn.execute('''
-        SELECT day, amount, description, created_at
-        FROM transactions 
-        WHERE user_id = ? AND year = ? AND month = ? 
-        ORDER BY day, id
-    ''', (user_id, year, month)).fetchall()
-    
-    # Organize transactions by day with created_at
-    transactions_by_day = {}
-    total_month = 0
-    total_transactions = 0
-    days_with_transactions = 0
-    
-    for trans in transactions_complete:
-        day = trans['day']
-        if day not in transactions_by_day:
-            transactions_by_day[day] = []
-        transactions_by_day[day].append({
-            'amount': trans['amount'],
-            'description': trans['description'] or 'No description',
-            'created_at': datetime.strptime(trans['created_at'], '%Y-%m-%d %H:%M:%S') if trans['created_at'] else datetime.now()
+    def render_body():
+        # Get all transactions for this user only (created_at se decodifica solo si se usa)
+        transactions = fetch_month_transactions(get_read_db(user_id), user_id, year, month, 'No description')
+        transactions_by_day = group_by_day(transactions)
+        total_month = sum(trans.amount for trans in transactions)
+        
+        # Count days with transactions
+        days_with_transactions = len(transactions_by_day)
+        
+        # Calculate daily average
+        daily_average = total_month / days_with_transactions if days_with_transactions > 0 else 0
+        
+        html = render_template('partials/print_body.html',
+                               month=month,
+                               days_in_month=days_in_month,
+                               transactions_by_day=transactions_by_day)
+        return Fragment(html.encode('utf-8'), {
+            'total_month': total_month,
+            'total_transactions': len(transactions),
+            'days_with_transactions': days_with_transactions,
+            'daily_average': daily_average,
         })
-        total_month += trans['amount']
-        total_transactions += 1
     
-    # Count days with transactions
-    days_with_transactions = len(transactions_by_day)
-    
-    # Calculate daily average
-    daily_average = total_month / days_with_transactions if days_with_transactions > 0 else 0
-    
-    conn.close()
-    
-    return render_template('imprimir_reporte.html',
+    fragment = cached_fragment('print_body', user_id, year, month, version, render_body)
+    return with_validators(render_with_fragment('imprimir_reporte.html', fragment,
                          year=year,
                          month=month,
                          month_name=month_name,
                          days_in_month=days_in_month,
-                         transactions_by_day=transactions_by_day,
-                         total_month=total_month,
-                         total_transactions=total_transactions,
-                         days_with_transactions=days_with_transactions,                         daily_average=daily_average,
-                         current_date=datetime.now())
+                         current_date=datetime.now()), etag, updated_at)
+
+def export_response(user_id, start, end, filename):
+    """Stream the user's transactions between two periods as CSV (optionally gzip) or XLSX"""
+    fmt = request.args.get('format', 'csv')
+    if fmt not in ('csv', 'xlsx'):
+        return jsonify({'success': False, 'message': 'Formato no soportado (csv o xlsx)'}), 400
+    
+    rows = iter_transactions(get_read_db(user_id), user_id, start, end)
+    headers = {'Content-Disposition': f'attachment; filename="{filename}.{fmt}"'}
+    if fmt == 'xlsx':
+        # El XLSX ya es un zip: no se vuelve a comprimir
+        body, mimetype = stream_xlsx(rows), XLSX_MIMETYPE
+    else:
+        body, mimetype = stream_csv(rows), 'text/csv; charset=utf-8'
+        headers['Vary'] = 'Accept-Encoding'
+        if 'gzip' in request.accept_encodings:
+            body = gzip_chunks(body)
+            headers['Content-Encoding'] = 'gzip'
+    
+    # stream_with_context mantiene la conexión del request hasta que termina la descarga
+    return Response(stream_with_context(body), mimetype=mimetype, headers=headers)
+
+@app.route('/export/<int:year>/<int:month>')
+@login_required
+def export_month(year, month):
+    """Export one month of transactions"""
+    if month < 1 or month > 12:
+        return jsonify({'success': False, 'message': 'Mes inválido'}), 400
+    return export_response(session['user_id'], (year, month), (year, month),
+                           f'ingresos-{year}-{month:02d}')
+
+@app.route('/export/range')
+@login_required
+def export_range():
+    """Export transactions between ?from=YYYY-MM and ?to=YYYY-MM (inclusive)"""
+    try:
+        start = parse_period(request.args.get('from'))
+        end = parse_period(request.args.get('to'))
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    if start > end:
+        return jsonify({'success': False, 'message': 'El periodo inicial es posterior al final'}), 400
+    return export_response(session['user_id'], start, end,
+                           f'ingresos-{start[0]}-{start[1]:02d}_{end[0]}-{end[1]:02d}')
 
 @app.route('/configuraciones', methods=['GET', 'POST'])
 @login_required
@@ -611,32 +1036,30 @@ def configuraciones():
     user_id = session['user_id']
     
     if request.method == 'POST':
-        # Handle logo upload
+        # Handle logo upload (un cuerpo más grande que el límite termina en request_too_large)
         if 'logo' in request.files:
             file = request.files['logo']
             if file and file.filename != '':
                 if not PIL_AVAILABLE:
                     flash('Error: La función de subida de logos no está disponible. Instala la librería Pillow.', 'error')
                 elif allowed_file(file.filename):
-                    # Process the logo
-                    logo_data = process_logo(file)
-                    if logo_data:
-                        # Save to database
-                        conn = get_db_connection()
+                    # Se valida la cabecera acá; decodificar y redimensionar queda para logo_pipeline
+                    try:
+                        path = spool_upload(file.stream)
                         try:
-                            filename = secure_filename(file.filename)
-                            conn.execute(
-                                'UPDATE users SET logo_filename = ?, logo_data = ? WHERE id = ?',
-                                (filename, logo_data, user_id)
-                            )
-                            conn.commit()
-                            flash('Logo actualizado exitosamente', 'success')
-                        except Exception as e:
-                            flash('Error al guardar el logo', 'error')
-                        finally:
-                            conn.close()
-                    else:
-                        flash('Error al procesar la imagen', 'error')
+                            inspect_logo(path)
+                        except InvalidLogo:
+                            os.unlink(path)
+                            raise
+                        logo_pipeline.submit(get_db_connection(), user_id, path, secure_filename(file.filename))
+                        session['logo_pending'] = True
+                        flash('Logo recibido: se está procesando y aparecerá en unos segundos', 'success')
+                    except InvalidLogo as e:
+                        flash(str(e), 'error')
+                    except LogoPipelineSaturated:
+                        flash('El servidor está ocupado. Intenta subir el logo nuevamente en unos segundos.', 'error')
+                    except Exception as e:
+                        flash('Error al guardar el logo', 'error')
                 else:
                     flash('Formato de archivo no permitido. Use PNG, JPG, JPEG, GIF o WEBP', 'error')
         
@@ -644,26 +1067,97 @@ def configuraciones():
         if request.form.get('remove_logo'):
             conn = get_db_connection()
             try:
-                conn.execute(
-                    'UPDATE users SET logo_filename = NULL, logo_data = NULL WHERE id = ?',
-                    (user_id,)
-                )
+                remove_logo(conn, user_id)
+                # Un logo que se estaba procesando ya no debe aparecer al terminar
+                set_logo_job(conn, user_id, None, None)
                 conn.commit()
+                session['logo_hash'] = None
+                session.pop('logo_pending', None)
                 flash('Logo eliminado exitosamente', 'success')
             except Exception as e:
                 flash('Error al eliminar el logo', 'error')
-            finally:
-                conn.close()
     
     # Get current user data including logo
     conn = get_db_connection()
     user = conn.execute(
-        'SELECT username, email, logo_filename, logo_data FROM users WHERE id = ?',
+        'SELECT username, email, logo_filename, logo_hash, logo_status FROM users WHERE id = ?',
         (user_id,)
     ).fetchone()
-    conn.close()
     
-    return render_template('configuraciones.html', user=user, pil_available=PIL_AVAILABLE)
+    return render_template('configuraciones.html', user=user, pil_available=PIL_AVAILABLE,
+                           max_logo_mb=LOGO_MAX_UPLOAD_BYTES // (1024 * 1024))
+
+@app.route('/assets/<path:filename>')
+def asset(filename):
+    """Serve a hashed CSS/JS bundle, precompressed when the client accepts it"""
+    return assets.send(filename)
+
+@app.route('/logo/<int:user_id>/<logo_hash>')
+@app.route('/logo/<int:user_id>/<logo_hash>/<variant>')
+@login_required
+def user_logo(user_id, logo_hash, variant=DEFAULT_VARIANT):
+    """Serve a logo version; the hash in the URL makes it cacheable forever"""
+    if user_id != session['user_id'] or not LOGO_VARIANT.match(variant):
+        return render_template('404.html'), 404
+    
+    # El hash (y la variante) es el ETag: si el navegador ya tiene esta versión no hace falta leer la base
+    etag = logo_hash if variant == DEFAULT_VARIANT else f'{logo_hash}-{variant}'
+    if etag in request.if_none_match:
+        response = make_response('', 304)
+    else:
+        logo = load_logo(get_db_connection(), user_id, logo_hash, variant)
+        if not logo:
+            return render_template('404.html'), 404
+        response = make_response(logo['data'])
+        response.mimetype = logo['mime']
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, max-age=31536000, immutable'
+    return response
+
+def throttled_login(keys):
+    """429 for a login attempt whose username or IP has no attempts left, None otherwise"""
+    wait = login_throttle.retry_after(keys)
+    if not wait:
+        return None
+    flash(f'Demasiados intentos fallidos. Intenta nuevamente en {math.ceil(wait / 60)} minutos.', 'error')
+    response = make_response(render_template('login.html'), 429)
+    response.headers['Retry-After'] = str(math.ceil(wait))
+    return response
+
+def record_failed_login(conn, user, keys):
+    """Count a failed attempt; the database is only written when the account becomes locked"""
+    if not LOGIN_THROTTLE_ENABLED:
+        failed_attempts = user['failed_login_attempts'] + 1
+        locked_until = None
+        
+        # Lock account after 5 failed attempts for LOGIN_LOCKOUT_MINUTES
+        if failed_attempts >= 5:
+            locked_until = (datetime.now() + timedelta(minutes=LOGIN_LOCKOUT_MINUTES)).isoformat()
+            flash(f'Demasiados intentos fallidos. Cuenta bloqueada por {LOGIN_LOCKOUT_MINUTES} minutos.', 'error')
+        else:
+            flash(f'Contraseña incorrecta. Intentos restantes: {5 - failed_attempts}', 'error')
+        
+        conn.execute(
+            'UPDATE users SET failed_login_attempts = ?, locked_until = ? WHERE id = ?',
+            (failed_attempts, locked_until, user['id'])
+        )
+        conn.commit()
+        return
+    
+    tokens, crossed = login_throttle.fail(keys)['user']
+    if crossed:
+        # El mismo bloqueo que sin throttle; queda en la base para sobrevivir reinicios
+        locked_until = (datetime.now() + timedelta(minutes=LOGIN_LOCKOUT_MINUTES)).isoformat()
+        conn.execute(
+            'UPDATE users SET failed_login_attempts = ?, locked_until = ? WHERE id = ?',
+            (LOGIN_USER_ATTEMPTS, locked_until, user['id'])
+        )
+        conn.commit()
+        flash(f'Demasiados intentos fallidos. Cuenta bloqueada por {LOGIN_LOCKOUT_MINUTES} minutos.', 'error')
+    elif tokens < 1:
+        flash('Demasiados intentos fallidos. Intenta más tarde.', 'error')
+    else:
+        flash(f'Contraseña incorrecta. Intentos restantes: {int(tokens)}', 'error')
 
 @app.route('/login', methods=['GET', 'POST'])
 def login():
@@ -676,9 +1170,16 @@ def login():
             flash('Por favor ingresa usuario y contraseña', 'error')
             return render_template('login.html')
         
+        # Con el bucket del usuario o de la IP vacío se responde sin consultar la base ni correr bcrypt
+        throttle_keys = (('user', username.lower()), ('ip', request.remote_addr or ''))
+        if LOGIN_THROTTLE_ENABLED:
+            throttled = throttled_login(throttle_keys)
+            if throttled:
+                return throttled
+        
         conn = get_db_connection()
         user = conn.execute(
-            'SELECT id, username, email, password_hash, is_active, failed_login_attempts, locked_until FROM users WHERE username = ?',
+            'SELECT id, username, email, password_hash, is_active, failed_login_attempts, locked_until, logo_hash FROM users WHERE username = ?',
             (username,)
         ).fetchone()
         
@@ -686,53 +1187,53 @@ def login():
             # Check if user is locked
             if user['locked_until'] and datetime.now() < datetime.fromisoformat(user['locked_until']):
                 flash('Cuenta bloqueada por intentos fallidos. Intenta más tarde.', 'error')
-                conn.close()
                 return render_template('login.html')
             
             # Check if user is active
             if not user['is_active']:
                 flash('Cuenta desactivada. Contacta al administrador.', 'error')
-                conn.close()
                 return render_template('login.html')
             
             # Verify password
-            if verify_password(password, user['password_hash']):
+            try:
+                password_ok = verify_password(password, user['password_hash'])
+            except (HashPoolSaturated, HashTimeout):
+                return hashing_busy('login.html')
+            
+            if password_ok:
                 # Successful login
                 session['user_id'] = user['id']
                 session['username'] = user['username']
-                session['login_time'] = datetime.now().isoformat()
+                session['login_time'] = time.time()
+                session['logo_hash'] = user['logo_hash']
+                if LOGIN_THROTTLE_ENABLED:
+                    login_throttle.reset('user', username.lower())
+                
+                # Hashes creados con un costo menor al configurado se regeneran ahora que tenemos la contraseña
+                password_hash = user['password_hash']
+                if password_hasher.needs_rehash(password_hash):
+                    try:
+                        password_hash = hash_password(password)
+                    except (HashPoolSaturated, HashTimeout):
+                        pass
                 
                 # Reset failed attempts and update last login
                 conn.execute(
-                    'UPDATE users SET failed_login_attempts = 0, locked_until = NULL, last_login = ? WHERE id = ?',
-                    (datetime.now(), user['id'])
+                    'UPDATE users SET failed_login_attempts = 0, locked_until = NULL, last_login = ?, password_hash = ? WHERE id = ?',
+                    (datetime.now(), password_hash, user['id'])
                 )
                 conn.commit()
-                conn.close()
                 
                 flash(f'¡Welcome, {user["username"]}!', 'success')
                 return redirect(url_for('dashboard'))
             else:
                 # Failed login
-                failed_attempts = user['failed_login_attempts'] + 1
-                locked_until = None
-                
-                # Lock account after 5 failed attempts for 15 minutes
-                if failed_attempts >= 5:
-                    locked_until = (datetime.now() + timedelta(minutes=15)).isoformat()
-                    flash('Demasiados intentos fallidos. Cuenta bloqueada por 15 minutos.', 'error')
-                else:
-                    flash(f'Contraseña incorrecta. Intentos restantes: {5 - failed_attempts}', 'error')
-                
-                conn.execute(
-                    'UPDATE users SET failed_login_attempts = ?, locked_until = ? WHERE id = ?',
-                    (failed_attempts, locked_until, user['id'])
-                )
-                conn.commit()
-                conn.close()
+                record_failed_login(conn, user, throttle_keys)
         else:
+            # Probar nombres de usuario también gasta intentos de la IP
+            if LOGIN_THROTTLE_ENABLED:
+                login_throttle.fail(throttle_keys)
             flash('Usuario no encontrado', 'error')
-            conn.close()
     
     return render_template('login.html')
 
@@ -769,23 +1270,23 @@ def register():
         
         if existing_user:
             flash('El usuario o email ya existe', 'error')
-            conn.close()
             return render_template('register.html')
         
         # Create new user
         try:
             password_hash = hash_password(password)
+        except (HashPoolSaturated, HashTimeout):
+            return hashing_busy('register.html')
+        try:
             conn.execute(
                 'INSERT INTO users (username, email, password_hash) VALUES (?, ?, ?)',
                 (username, email, password_hash)
             )
             conn.commit()
             flash('Cuenta creada exitosamente. Ahora puedes iniciar sesión.', 'success')
-            conn.close()
             return redirect(url_for('login'))
         except Exception as e:
             flash('Error al crear la cuenta. Intenta nuevamente.', 'error')
-            conn.close()
     
     return render_template('register.html')
 
@@ -798,6 +1299,13 @@ def logout():
     return redirect(url_for('login'))
 
 # Error handlers
+@app.errorhandler(413)
+def request_too_large(error):
+    if request.endpoint == 'configuraciones':
+        flash(f'El logo no puede superar {LOGO_MAX_UPLOAD_BYTES // (1024 * 1024)} MB', 'error')
+        return redirect(url_for('configuraciones'))
+    return render_template('404.html'), 413
+
 @app.errorhandler(404)
 def not_found_error(error):
     return render_template('404.html'), 404
@@ -811,8 +1319,8 @@ if __name__ == '__main__':
     os.makedirs('templates', exist_ok=True)
     os.makedirs('static', exist_ok=True)
     
-    # Initialize database
-    init_db()
+    # Initialize database and warm up
+    create_app()
     
     # Run application
     debug_mode = os.environ.get('FLASK_ENV') != 'production'
@@ -0,0 +1,76 @@
+"""
+Bundles de CSS/JS generados por build.py: nombres con hash de contenido, hermanos .gz/.br
+precomprimidos y un manifest que las plantillas resuelven con asset_url().
+
+Como el nombre cambia con cada contenido nuevo, los archivos se sirven con caché "inmutable"
+de un año; sin manifest (desarrollo sin build) asset_url apunta a las fuentes sin hash.
+"""
+
+import json
+import os
+
+from flask import request, send_from_directory, url_for
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+ASSET_DIR = os.path.join(STATIC_DIR, 'dist')
+MANIFEST_PATH = os.path.join(ASSET_DIR, 'manifest.json')
+ASSET_MAX_AGE = 365 * 24 * 3600
+
+# nombre lógico -> archivos fuente (relativos a static/) que se concatenan en ese orden
+BUNDLES = {
+    'css/app.css': ['css/dist/output.css'],
+    'js/auth.js': ['js/src/auth.js'],
+    'js/dashboard.js': ['js/src/dashboard.js'],
+    'js/reportes.js': ['js/src/reportes.js'],
+    'js/reporte_mensual.js': ['js/src/reporte_mensual.js'],
+    'js/nuevo_reporte.js': ['js/src/nuevo_reporte.js'],
+    'js/configuraciones.js': ['js/src/configuraciones.js'],
+    'js/404.js': ['js/src/404.js'],
+}
+
+# Accept-Encoding -> sufijo del archivo precomprimido, en orden de preferencia
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+MIMETYPES = {'.css': 'text/css', '.js': 'text/javascript'}
+
+
+def load_manifest(path=MANIFEST_PATH):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+class AssetManifest:
+    """Resolves logical bundle names to hashed files and serves them precompressed"""
+
+    def __init__(self, path=MANIFEST_PATH, directory=ASSET_DIR):
+        self.path = path
+        self.directory = directory
+        self.entries = load_manifest(path)
+        if not self.entries:
+            print("⚠️ Sin static/dist/manifest.json: corre 'python build.py' para generar los assets")
+
+    def url(self, name):
+        """URL of the hashed bundle, or of its first source file when there is no build"""
+        hashed = self.entries.get(name)
+        if hashed is None:
+            return url_for('static', filename=BUNDLES.get(name, [name])[0])
+        return url_for('asset', filename=hashed)
+
+    def send(self, filename):
+        """Response for a hashed file, picking the .br/.gz sibling the client accepts"""
+        mimetype = MIMETYPES.get(os.path.splitext(filename)[1])
+        for encoding, suffix in ENCODINGS:
+            if encoding in request.accept_encodings and os.path.exists(os.path.join(self.directory, filename + suffix)):
+                response = send_from_directory(self.directory, filename + suffix,
+                                               mimetype=mimetype, max_age=ASSET_MAX_AGE)
+                response.headers['Content-Encoding'] = encoding
+                break
+        else:
+            response = send_from_directory(self.directory, filename, mimetype=mimetype, max_age=ASSET_MAX_AGE)
+        response.vary.add('Accept-Encoding')
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+        return response
@@ -0,0 +1,95 @@
+"""
+Benchmark de analytics.py sobre rangos de 1, 5 y 20 años: totales por mes, promedio móvil,
+comparación interanual y mejores/peores días de un usuario con ingresos casi todos los días.
+
+    python benchmarks/analytics_bench.py --years 20 --users 50
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analytics import extreme_days, moving_average, period_totals, year_over_year  # noqa: E402
+from db import ConnectionPool  # noqa: E402
+from migrations import migrate  # noqa: E402
+from rollups import rebuild_rollups  # noqa: E402
+
+END = date(2025, 12, 31)
+SEED = 1
+
+QUERIES = [
+    ('totales por semana', lambda conn, start: period_totals(conn, 1, start, END, 'week')),
+    ('totales por mes', lambda conn, start: period_totals(conn, 1, start, END, 'month')),
+    ('promedio móvil 30d', lambda conn, start: moving_average(conn, 1, start, END, 30)),
+    ('interanual por mes', lambda conn, start: year_over_year(conn, 1, start, END, 'month')),
+    ('mejores/peores días', lambda conn, start: extreme_days(conn, 1, start, END, 10)),
+]
+
+
+def seed(pool, years, users):
+    rng = random.Random(SEED)
+    first = END.replace(year=END.year - years + 1, month=1, day=1)
+    days = [first + timedelta(days=offset) for offset in range((END - first).days + 1)]
+    conn = pool.connect()
+    try:
+        migrate(conn)
+        conn.executemany('INSERT INTO users (id, username, email, password_hash) VALUES (?, ?, ?, ?)',
+                         ((user_id, f'bench{user_id}', f'bench{user_id}@example.com', 'x')
+                          for user_id in range(1, users + 1)))
+        # Unos 2 ingresos por día con ~85% de días activos, para todos los usuarios
+        conn.executemany('''
+            INSERT INTO transactions (user_id, year, month, day, amount)
+            VALUES (?, ?, ?, ?, ?)
+        ''', ((user_id, day.year, day.month, day.day, round(rng.uniform(5, 500), 2))
+              for user_id in range(1, users + 1)
+              for day in days if rng.random() < 0.85
+              for _ in range(rng.randint(1, 3))))
+        rebuild_rollups(conn)
+        conn.commit()
+        count = conn.execute('SELECT COUNT(*) FROM transactions').fetchone()[0]
+    finally:
+        conn.close()
+    return count
+
+
+def timed(conn, query, start, repeat):
+    latencies = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        query(conn, start)
+        latencies.append(time.perf_counter() - started)
+    latencies.sort()
+    return latencies[len(latencies) // 2] * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Consultas de analytics.py sobre rangos de varios años')
+    parser.add_argument('--years', type=int, default=20, help='Años de historial (default: 20)')
+    parser.add_argument('--users', type=int, default=20, help='Usuarios con el mismo volumen (default: 20)')
+    parser.add_argument('--repeat', type=int, default=20, help='Corridas por medición (default: 20)')
+    args = parser.parse_args()
+
+    spans = [span for span in (1, 5, 20) if span <= args.years]
+    with tempfile.TemporaryDirectory() as tmp:
+        pool = ConnectionPool(os.path.join(tmp, 'bench.db'))
+        count = seed(pool, args.years, args.users)
+        print(f"📚 {count} transacciones, {args.users} usuarios, {args.years} años")
+
+        conn = pool.acquire()
+        print(f"{'consulta':>22}" + ''.join(f"{f'{span} año(s) ms':>14}" for span in spans))
+        for name, query in QUERIES:
+            timings = [timed(conn, query, END.replace(year=END.year - span + 1, month=1, day=1), args.repeat)
+                       for span in spans]
+            print(f"{name:>22}" + ''.join(f"{ms:>14.2f}" for ms in timings))
+        pool.release(conn)
+        pool.close_all()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""
+Benchmark de memoria de la exportación: RSS máximo al exportar cada vez más filas.
+
+Crea una base temporal con un usuario por tamaño (--sizes filas cada uno) y exporta
+cada uno en un proceso aparte, para que el pico de RSS de una medición no contamine
+la siguiente. Compara el streaming (CSV, CSV+gzip, XLSX) con leer todo con fetchall().
+
+    python benchmarks/export_bench.py --sizes 10000 100000 1000000
+"""
+
+import argparse
+import os
+import resource
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db import configure_connection  # noqa: E402
+from migrations import migrate  # noqa: E402
+from export import iter_transactions, stream_csv, stream_xlsx, gzip_chunks  # noqa: E402
+
+MODES = ('csv', 'csv+gzip', 'xlsx', 'fetchall')
+FULL_RANGE = ((1900, 1), (9999, 12))
+
+
+def seed(conn, user_id, rows):
+    conn.execute('INSERT INTO users (id, username, email, password_hash) VALUES (?, ?, ?, ?)',
+                 (user_id, f'bench{user_id}', f'bench{user_id}@example.com', 'x'))
+
+    def generate():
+        for index in range(rows):
+            day = index % 28 + 1
+            month = index // 28 % 12 + 1
+            year = 2000 + index // (28 * 12 * 10)
+            yield (user_id, year, month, day, 10.0 + index % 500, f'transacción {index}')
+    conn.executemany('''
+        INSERT INTO transactions (user_id, year, month, day, amount, description)
+        VALUES (?, ?, ?, ?, ?, ?)
+    ''', generate())
+    conn.commit()
+
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KB en Linux
+
+
+def run_child(database, user_id, mode):
+    # Sin mmap: las páginas mapeadas del archivo contarían como RSS aunque no sean memoria del proceso
+    conn = configure_connection(sqlite3.connect(database), mmap_size=0)
+    baseline = peak_rss_mb()
+    started = time.perf_counter()
+    rows = iter_transactions(conn, user_id, *FULL_RANGE)
+    if mode == 'fetchall':
+        # Lo que hacía la vista de impresión: todas las filas en memoria antes de generar nada
+        body = [b''.join(stream_csv(list(rows)))]
+    elif mode == 'xlsx':
+        body = stream_xlsx(rows)
+    elif mode == 'csv+gzip':
+        body = gzip_chunks(stream_csv(rows))
+    else:
+        body = stream_csv(rows)
+    size = sum(len(chunk) for chunk in body)
+    elapsed = time.perf_counter() - started
+    print(f'{size} {elapsed:.3f} {peak_rss_mb() - baseline:.1f}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='RSS de la exportación en streaming')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000],
+                        help='Filas exportadas por medición (default: 10000 100000 1000000)')
+    parser.add_argument('--child', nargs=3, metavar=('DB', 'USER', 'MODE'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child[0], int(args.child[1]), args.child[2])
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database = os.path.join(tmp, 'bench.db')
+        conn = configure_connection(sqlite3.connect(database))
+        migrate(conn)
+        for user_id, rows in enumerate(args.sizes, start=1):
+            seed(conn, user_id, rows)
+        conn.close()
+
+        print(f"{'filas':>10} {'modo':>9} {'MB':>9} {'seg':>7} {'Δ RSS MB':>9}")
+        for user_id, rows in enumerate(args.sizes, start=1):
+            for mode in MODES:
+                output = subprocess.run(
+                    [sys.executable, os.path.abspath(__file__), '--child', database, str(user_id), mode],
+                    capture_output=True, text=True, check=True
+                ).stdout.split()
+                size, elapsed, rss = int(output[0]), float(output[1]), float(output[2])
+                print(f"{rows:>10} {mode:>9} {size / 1e6:>9.1f} {elapsed:>7.2f} {rss:>9.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""
+Benchmark del caché de fragmentos en las vistas pesadas de un mes histórico:
+/reporte/<año>/<mes> y /imprimir/<año>/<mes> sin caché (se vacía antes de cada request)
+y con el fragmento ya renderizado para la versión actual del mes.
+
+    python benchmarks/fragment_bench.py --rows 3000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault('BCRYPT_ROUNDS', '4')
+
+import app as appmod  # noqa: E402
+from db import ConnectionPool  # noqa: E402
+from migrations import migrate  # noqa: E402
+from rollups import rebuild_rollups  # noqa: E402
+
+YEAR, MONTH = 2023, 3
+USERNAME, PASSWORD = 'bench', 'Bench1234!'
+
+ROUTES = [
+    ('monthly_report', f'/reporte/{YEAR}/{MONTH}'),
+    ('print_report', f'/imprimir/{YEAR}/{MONTH}'),
+]
+
+
+def seed(pool, rows):
+    conn = pool.connect()
+    try:
+        migrate(conn)
+        conn.execute('INSERT INTO users (id, username, email, password_hash) VALUES (1, ?, ?, ?)',
+                     (USERNAME, 'bench@example.com', appmod.hash_password(PASSWORD)))
+        conn.executemany('''
+            INSERT INTO transactions (user_id, year, month, day, amount, description)
+            VALUES (1, ?, ?, ?, ?, ?)
+        ''', ((YEAR, MONTH, index % 31 + 1, 10.0 + index % 500, f'venta {index}' if index % 3 else None)
+              for index in range(rows)))
+        rebuild_rollups(conn)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def timed(client, path, repeat, before=None):
+    latencies = []
+    for _ in range(repeat):
+        if before:
+            before()
+        started = time.perf_counter()
+        response = client.get(path)
+        latencies.append(time.perf_counter() - started)
+        assert response.status_code == 200, (path, response.status_code)
+    latencies.sort()
+    return latencies[len(latencies) // 2] * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Caché de fragmentos en reporte e impresión')
+    parser.add_argument('--rows', type=int, default=3000, help='Transacciones del mes (default: 3000)')
+    parser.add_argument('--repeat', type=int, default=30, help='Requests por medición (default: 30)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        appmod.db_pool.close_all()
+        appmod.shard_router.reset()
+        appmod.read_pool.close_all()
+        appmod.read_pool = ConnectionPool(os.path.join(tmp, 'bench.db'), size=appmod.read_pool.size, read_only=True,
+                                          cache_size_kb=appmod.read_pool.cache_size_kb)
+        appmod.db_pool = ConnectionPool(os.path.join(tmp, 'bench.db'))
+        appmod.app.session_interface.pool = appmod.db_pool
+        seed(appmod.db_pool, args.rows)
+        print(f"📚 {args.rows} transacciones en {MONTH:02d}/{YEAR}")
+
+        client = appmod.app.test_client()
+        response = client.post('/login', data={'username': USERNAME, 'password': PASSWORD})
+        assert response.status_code == 302, f'login falló: {response.status_code}'
+
+        print(f"{'ruta':>16} {'sin caché ms':>13} {'con caché ms':>13} {'mejora':>8}")
+        for name, path in ROUTES:
+            cold = timed(client, path, args.repeat, before=appmod.fragment_cache.clear)
+            client.get(path)
+            warm = timed(client, path, args.repeat)
+            print(f"{name:>16} {cold:>13.2f} {warm:>13.2f} {cold / warm:>7.1f}x")
+        print(f"📦 {appmod.fragment_cache.stats()}")
+        appmod.db_pool.close_all()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,309 @@
+"""
+Benchmark HTTP de las rutas de la app: latencia p50/p95/p99, throughput y consultas SQL
+por ruta, con el test client de Flask y con un servidor WSGI real (werkzeug, HTTP/1.1
+keep-alive). Las bases se generan con advanced_fake_data.py y se reutilizan entre corridas.
+
+    python benchmarks/http_bench.py --sizes 1k 100k --output base.json
+    python benchmarks/http_bench.py --sizes 1k 100k --compare base.json   # marca regresiones
+
+Los resultados se guardan en JSON; con --compare se contrasta el p95 y las consultas de cada
+ruta contra una corrida anterior y el proceso termina con código 1 si alguna empeoró.
+"""
+
+import argparse
+import http.client
+import json
+import os
+import platform
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from urllib.parse import urlencode
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import advanced_fake_data  # noqa: E402
+import app as appmod  # noqa: E402
+from db import ConnectionPool  # noqa: E402
+from werkzeug.serving import WSGIRequestHandler, make_server  # noqa: E402
+
+# (usuarios, meses por usuario) para llegar a ~1k, ~100k y ~10M transacciones
+SIZES = {
+    '1k': (1, 22),
+    '100k': (20, 110),
+    '10M': (1850, 120),
+}
+END = (2025, 12)
+SEED = 1
+USERNAME = 'demo1'
+
+ROUTES = [
+    ('dashboard', '/'),
+    ('api_dashboard', '/api/dashboard'),
+    ('monthly_report', f'/reporte/{END[0]}/{END[1]}'),
+    ('api_report', f'/api/report/{END[0]}/{END[1]}'),
+    ('view_reports', '/reportes'),
+    ('view_reports_page2', '/reportes?page=2'),
+    ('print_report', f'/imprimir/{END[0]}/{END[1]}'),
+    ('export_month', f'/export/{END[0]}/{END[1]}'),
+    ('configuraciones', '/configuraciones'),
+]
+
+REGRESSION_THRESHOLD = 0.10  # p95 un 10% peor que la base
+REGRESSION_MIN_MS = 0.5  # diferencias menores se consideran ruido
+
+
+class QueryCounter:
+    """Counts SQL statements through sqlite3 trace callbacks on the app's pools"""
+
+    def __init__(self, *pools):
+        self.count = 0
+        self.enabled = False
+        for pool in pools:
+            self._instrument(pool)
+
+    def _instrument(self, pool):
+        connect = pool.connect
+
+        def traced_connect():
+            conn = connect()
+            conn.set_trace_callback(self._trace)
+            return conn
+        pool.connect = traced_connect
+
+    def _trace(self, statement):
+        if self.enabled:
+            self.count += 1
+
+
+def seed_database(data_dir, size):
+    path = os.path.join(data_dir, f'{size}-seed{SEED}.db')
+    if not os.path.exists(path):
+        users, months = SIZES[size]
+        print(f"🌱 Generando base {size} ({users} usuarios × {months} meses)...")
+        advanced_fake_data.generate(path, users=users, months=months, end=END, seed=SEED)
+    return path
+
+
+def use_database(path):
+    """Point the app at another database file with a fresh pool and empty caches"""
+    appmod.db_pool.close_all()
+    appmod.shard_router.reset()
+    appmod.read_pool.close_all()
+    appmod.read_pool = ConnectionPool(path, size=appmod.read_pool.size, read_only=True,
+                                      cache_size_kb=appmod.read_pool.cache_size_kb)
+    appmod.db_pool = ConnectionPool(path)
+    appmod.app.session_interface.pool = appmod.db_pool
+    appmod.app.session_interface.cache.clear()
+    appmod.dashboard_cache.clear()
+    # Cada base arranca sus versiones de mes en 1: un fragmento de la base anterior pasaría por vigente
+    appmod.fragment_cache.clear()
+    # Las rutas de lectura van por read_pool: sin contarlo la columna SQL queda en 0
+    return QueryCounter(appmod.db_pool, appmod.read_pool)
+
+
+def summarize(latencies, elapsed, queries=None):
+    ordered = sorted(latencies)
+
+    def percentile(p):
+        return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))] * 1000
+
+    return {
+        'requests': len(ordered),
+        'p50_ms': percentile(50),
+        'p95_ms': percentile(95),
+        'p99_ms': percentile(99),
+        'mean_ms': sum(ordered) / len(ordered) * 1000,
+        'rps': len(ordered) / elapsed if elapsed else 0.0,
+        'queries': queries,
+    }
+
+
+def bench_test_client(counter, requests, warmup):
+    client = appmod.app.test_client()
+    response = client.post('/login', data={'username': USERNAME, 'password': advanced_fake_data.DEMO_PASSWORD})
+    assert response.status_code == 302, f'login falló: {response.status_code}'
+    results = {}
+    for name, path in ROUTES:
+        for _ in range(warmup):
+            client.get(path).close()
+        counter.count, counter.enabled = 0, True
+        response = client.get(path)
+        response.close()
+        counter.enabled = False
+        assert response.status_code == 200, f'{path}: {response.status_code}'
+        queries = counter.count
+
+        latencies = []
+        started = time.perf_counter()
+        for _ in range(requests):
+            request_started = time.perf_counter()
+            client.get(path).close()
+            latencies.append(time.perf_counter() - request_started)
+        results[name] = summarize(latencies, time.perf_counter() - started, queries)
+    return results
+
+
+class _QuietHandler(WSGIRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive, como detrás de un proxy
+
+    def log_request(self, *args, **kwargs):
+        pass
+
+
+def _login_cookie(port):
+    conn = http.client.HTTPConnection('127.0.0.1', port)
+    body = urlencode({'username': USERNAME, 'password': advanced_fake_data.DEMO_PASSWORD})
+    conn.request('POST', '/login', body, {'Content-Type': 'application/x-www-form-urlencoded'})
+    response = conn.getresponse()
+    response.read()
+    conn.close()
+    assert response.status == 302, f'login falló: {response.status}'
+    return response.getheader('Set-Cookie').split(';', 1)[0]
+
+
+def bench_server(requests, warmup, concurrency):
+    server = make_server('127.0.0.1', 0, appmod.app, threaded=True, request_handler=_QuietHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    port = server.server_port
+    try:
+        cookie = _login_cookie(port)
+        results = {}
+        for name, path in ROUTES:
+            latencies = []
+            errors = []
+
+            def worker(count):
+                conn = http.client.HTTPConnection('127.0.0.1', port)
+                for index in range(warmup + count):
+                    request_started = time.perf_counter()
+                    conn.request('GET', path, headers={'Cookie': cookie})
+                    response = conn.getresponse()
+                    response.read()
+                    if response.status != 200:
+                        errors.append(response.status)
+                    if index >= warmup:
+                        latencies.append(time.perf_counter() - request_started)
+                conn.close()
+
+            shares = [requests // concurrency + (i < requests % concurrency) for i in range(concurrency)]
+            workers = [threading.Thread(target=worker, args=(share,)) for share in shares]
+            started = time.perf_counter()
+            for w in workers:
+                w.start()
+            for w in workers:
+                w.join()
+            assert not errors, f'{path}: {errors[:5]}'
+            results[name] = summarize(latencies, time.perf_counter() - started)
+        return results
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def _flatten(results):
+    return {
+        (size, mode, route): stats
+        for size, modes in results.items()
+        for mode, routes in modes.items()
+        for route, stats in routes.items()
+    }
+
+
+def compare(baseline, current, threshold):
+    """List of (key, metric, before, after) for routes that got slower or chattier"""
+    regressions = []
+    before_all = _flatten(baseline['results'])
+    for key, after in _flatten(current['results']).items():
+        before = before_all.get(key)
+        if before is None:
+            continue
+        if (after['p95_ms'] > before['p95_ms'] * (1 + threshold)
+                and after['p95_ms'] - before['p95_ms'] > REGRESSION_MIN_MS):
+            regressions.append((key, 'p95_ms', before['p95_ms'], after['p95_ms']))
+        if before.get('queries') is not None and (after.get('queries') or 0) > before['queries']:
+            regressions.append((key, 'queries', before['queries'], after['queries']))
+    return regressions
+
+
+def metadata():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                                capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = None
+    return {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'commit': commit or None,
+        'python': platform.python_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+    }
+
+
+def print_table(size, mode, results):
+    print(f"\n📊 {size} · {mode}")
+    print(f"{'ruta':>20} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'req/s':>8} {'SQL':>5}")
+    for name, stats in results.items():
+        queries = '-' if stats['queries'] is None else stats['queries']
+        print(f"{name:>20} {stats['p50_ms']:>8.2f} {stats['p95_ms']:>8.2f} {stats['p99_ms']:>8.2f} "
+              f"{stats['rps']:>8.0f} {queries:>5}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark HTTP de las rutas de la app')
+    parser.add_argument('--sizes', nargs='+', choices=list(SIZES), default=['1k', '100k'],
+                        help='Tamaños de base a medir (default: 1k 100k)')
+    parser.add_argument('--modes', nargs='+', choices=['client', 'server'], default=['client', 'server'],
+                        help='test client de Flask y/o servidor WSGI real (default: ambos)')
+    parser.add_argument('--requests', type=int, default=200, help='Peticiones medidas por ruta (default: 200)')
+    parser.add_argument('--warmup', type=int, default=10, help='Peticiones de calentamiento por ruta (default: 10)')
+    parser.add_argument('--concurrency', type=int, default=4, help='Clientes simultáneos contra el servidor (default: 4)')
+    parser.add_argument('--data-dir', default=os.path.join(tempfile.gettempdir(), 'ingresos-bench'),
+                        help='Dónde guardar y reutilizar las bases generadas')
+    parser.add_argument('--output', help='Guardar los resultados en este JSON')
+    parser.add_argument('--compare', help='JSON de una corrida anterior para detectar regresiones')
+    parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD,
+                        help='Empeoramiento relativo del p95 que cuenta como regresión (default: 0.10)')
+    args = parser.parse_args()
+
+    os.makedirs(args.data_dir, exist_ok=True)
+    report = {'meta': metadata(), 'config': vars(args).copy(), 'results': {}}
+    for size in args.sizes:
+        path = seed_database(args.data_dir, size)
+        counter = use_database(path)
+        report['results'][size] = {}
+        if 'client' in args.modes:
+            results = bench_test_client(counter, args.requests, args.warmup)
+            report['results'][size]['client'] = results
+            print_table(size, 'test client', results)
+        if 'server' in args.modes:
+            results = bench_server(args.requests, args.warmup, args.concurrency)
+            report['results'][size]['server'] = results
+            print_table(size, f'servidor WSGI, {args.concurrency} clientes', results)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n💾 Resultados en {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(baseline, report, args.threshold)
+        for (size, mode, route), metric, before, after in regressions:
+            print(f"❌ {size}/{mode}/{route}: {metric} {before:.2f} -> {after:.2f}")
+        if regressions:
+            raise SystemExit(1)
+        print(f"✅ Sin regresiones respecto a {args.compare}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,184 @@
+"""
+Benchmark del límite de intentos de login (throttle.py) bajo un ataque simulado.
+
+1. La tabla compartida sola: varios procesos consumen buckets de las mismas claves y se
+   verifica que entre todos no pasen más intentos que la capacidad de cada bucket.
+2. La app: hilos atacantes prueban contraseñas de muchos usuarios desde pocas IPs mientras
+   un usuario legítimo agrega transacciones. Compara LOGIN_THROTTLE apagado (un UPDATE y un
+   bcrypt por intento) con encendido.
+
+    python benchmarks/login_bench.py --attackers 8 --seconds 5 --rounds 10
+"""
+
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bcrypt  # noqa: E402
+
+import app as appmod  # noqa: E402
+from db import ConnectionPool  # noqa: E402
+from throttle import LoginThrottle  # noqa: E402
+
+PASSWORD = 'Bench123!'
+YEAR, MONTH = 2024, 6
+
+
+def hammer(path, keys, iterations, results):
+    throttle = LoginThrottle(path)
+    allowed = 0
+    started = time.perf_counter()
+    for number in range(iterations):
+        key = keys[number % len(keys)]
+        if not throttle.retry_after([key]):
+            throttle.fail([key])
+            allowed += 1
+    results.put((allowed, iterations * 2 / (time.perf_counter() - started)))
+
+
+def shared_table(args):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'throttle')
+        keys = [('user', f'victim{number}') for number in range(args.keys)]
+        results = multiprocessing.Queue()
+        workers = [multiprocessing.Process(target=hammer, args=(path, keys, args.iterations, results))
+                   for _ in range(args.processes)]
+        for process in workers:
+            process.start()
+        outcomes = [results.get() for _ in workers]
+        for process in workers:
+            process.join()
+    allowed = sum(outcome[0] for outcome in outcomes)
+    rate = sum(outcome[1] for outcome in outcomes)
+    capacity = LoginThrottle(path).limits['user']
+    print(f"🧮 {args.processes} procesos, {args.keys} claves: {rate:,.0f} operaciones/s, "
+          f"{allowed} intentos admitidos (capacidad {capacity} × {args.keys} = {capacity * args.keys})")
+
+
+def use_database(tmp, throttled):
+    appmod.db_pool.close_all()
+    appmod.read_pool.close_all()
+    appmod.shard_router.reset()
+    path = os.path.join(tmp, 'bench.db')
+    appmod.db_pool = ConnectionPool(path)
+    appmod.read_pool = ConnectionPool(path, size=appmod.read_pool.size, read_only=True,
+                                      cache_size_kb=appmod.read_pool.cache_size_kb)
+    appmod.app.session_interface.pool = appmod.db_pool
+    appmod.app.session_interface.cache.clear()
+    appmod.dashboard_cache.clear()
+    appmod.login_throttle = LoginThrottle(os.path.join(tmp, 'throttle'))
+    appmod.LOGIN_THROTTLE_ENABLED = throttled
+
+    # Cuenta los UPDATE de intentos fallidos (la escritura que el límite evita)
+    writes = [0]
+    connect = appmod.db_pool.connect
+
+    def traced_connect():
+        conn = connect()
+        conn.set_trace_callback(lambda sql: sql.startswith('UPDATE users SET failed_login_attempts')
+                                and writes.__setitem__(0, writes[0] + 1))
+        return conn
+    appmod.db_pool.connect = traced_connect
+    return writes
+
+
+def seed(users, rounds):
+    appmod.init_db()
+    password_hash = bcrypt.hashpw(PASSWORD.encode(), bcrypt.gensalt(rounds)).decode()
+    conn = appmod.db_pool.connect()
+    try:
+        conn.executemany('INSERT INTO users (username, email, password_hash) VALUES (?, ?, ?)',
+                         ((f'victim{number}', f'victim{number}@example.com', password_hash)
+                          for number in range(users)))
+        conn.execute('INSERT INTO users (username, email, password_hash) VALUES (?, ?, ?)',
+                     ('legit', 'legit@example.com', password_hash))
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def attack(args, throttled):
+    with tempfile.TemporaryDirectory() as tmp:
+        writes = use_database(tmp, throttled)
+        seed(args.users, args.rounds)
+        appmod.password_hasher.rounds = args.rounds
+        legit = appmod.app.test_client()
+        response = legit.post('/login', data={'username': 'legit', 'password': PASSWORD})
+        assert response.status_code == 302, f'login legítimo falló: {response.status_code}'
+        verifies_before = appmod.password_hasher.stats()['verify']['count']
+
+        stop = threading.Event()
+        attempts = [[0, 0] for _ in range(args.attackers)]  # intentos, 429
+        latencies = []
+
+        def attacker(index):
+            rng = random.Random(index)
+            client = appmod.app.test_client()
+            while not stop.is_set():
+                response = client.post('/login', data={'username': f'victim{rng.randrange(args.users)}',
+                                                       'password': f'guess{rng.random()}'},
+                                       environ_base={'REMOTE_ADDR': f'203.0.113.{rng.randrange(args.ips)}'})
+                attempts[index][0] += 1
+                attempts[index][1] += response.status_code == 429
+
+        def user():
+            day = 0
+            while not stop.is_set():
+                started = time.perf_counter()
+                response = legit.post('/add-transaction', json={'year': YEAR, 'month': MONTH, 'day': day % 28 + 1,
+                                                                'amount': 10.0, 'description': 'bench'})
+                latencies.append(time.perf_counter() - started)
+                assert response.get_json()['success']
+                day += 1
+
+        threads = [threading.Thread(target=attacker, args=(index,)) for index in range(args.attackers)]
+        threads.append(threading.Thread(target=user))
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        time.sleep(args.seconds)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        verifies = appmod.password_hasher.stats()['verify']['count'] - verifies_before
+
+    total = sum(count for count, _ in attempts)
+    rejected = sum(count for _, count in attempts)
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2] * 1000
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000
+    print(f"{'encendido' if throttled else 'apagado':>10} {total / elapsed:>10.0f} {rejected / max(total, 1):>7.0%} "
+          f"{verifies:>8} {writes[0]:>9} {len(latencies) / elapsed:>10.0f} {p50:>8.2f} {p99:>8.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Límite de intentos de login bajo un ataque simulado')
+    parser.add_argument('--processes', type=int, default=4, help='Procesos sobre la tabla compartida (default: 4)')
+    parser.add_argument('--keys', type=int, default=100, help='Claves atacadas en la tabla (default: 100)')
+    parser.add_argument('--iterations', type=int, default=20000, help='Intentos por proceso (default: 20000)')
+    parser.add_argument('--attackers', type=int, default=8, help='Hilos atacantes contra la app (default: 8)')
+    parser.add_argument('--users', type=int, default=50, help='Usuarios atacados (default: 50)')
+    parser.add_argument('--ips', type=int, default=8, help='IPs de origen del ataque (default: 8)')
+    parser.add_argument('--rounds', type=int, default=10, help='Costo de bcrypt (default: 10)')
+    parser.add_argument('--seconds', type=float, default=5, help='Duración de cada ataque (default: 5)')
+    args = parser.parse_args()
+
+    shared_table(args)
+    print(f"🔐 {args.attackers} atacantes contra {args.users} usuarios desde {args.ips} IPs, "
+          f"bcrypt {args.rounds}, {args.seconds:g} s")
+    print(f"{'límite':>10} {'intentos/s':>10} {'429':>7} {'bcrypt':>8} {'UPDATEs':>9} "
+          f"{'altas/s':>10} {'p50 ms':>8} {'p99 ms':>8}")
+    attack(args, throttled=False)
+    attack(args, throttled=True)
+
+
+if __name__ == '__main__':
+    main()
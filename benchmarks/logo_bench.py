@@ -0,0 +1,74 @@
+"""
+Benchmark del procesamiento de logos: lo que queda en el request (copiar la subida a un
+temporal y leer la cabecera) contra lo que pasa a segundo plano (decodificar, redimensionar
+y codificar las variantes 1x/2x/3x en PNG y WebP), con fotos JPEG y PNG de varios tamaños.
+
+    python benchmarks/logo_bench.py --sizes 1000 3000 4000
+"""
+
+import argparse
+import io
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from imaging import PIL_AVAILABLE, inspect_logo, render_variants, spool_upload  # noqa: E402
+
+if PIL_AVAILABLE:
+    from PIL import Image
+
+
+def make_upload(side, fmt):
+    # Ruido con algo de estructura: se comprime como una foto, no como un color plano
+    rng = random.Random(side)
+    small = Image.frombytes('RGB', (64, 64), bytes(rng.randrange(256) for _ in range(64 * 64 * 3)))
+    image = small.resize((side, side * 3 // 4), Image.Resampling.BICUBIC)
+    buffer = io.BytesIO()
+    if fmt == 'JPEG':
+        image.save(buffer, format=fmt, quality=90)
+    else:
+        image.save(buffer, format=fmt)
+    return buffer.getvalue()
+
+
+def timed(fn, repeat):
+    latencies = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - started)
+    latencies.sort()
+    return latencies[len(latencies) // 2] * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Costo del logo en el request vs en segundo plano')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 3000, 4000], help='Ancho en píxeles')
+    parser.add_argument('--repeat', type=int, default=5, help='Corridas por medición (default: 5)')
+    args = parser.parse_args()
+    if not PIL_AVAILABLE:
+        print("❌ Se necesita Pillow")
+        sys.exit(1)
+
+    print(f"{'imagen':>16} {'KB':>8} {'request ms':>11} {'segundo plano ms':>17}")
+    for side in args.sizes:
+        for fmt in ('JPEG', 'PNG'):
+            data = make_upload(side, fmt)
+            path = spool_upload(io.BytesIO(data), limit=len(data))
+            try:
+                def request_path():
+                    os.unlink(spool_upload(io.BytesIO(data), limit=len(data)))
+                    inspect_logo(path)
+                request_ms = timed(request_path, args.repeat)
+                background_ms = timed(lambda: render_variants(path), args.repeat)
+            finally:
+                os.unlink(path)
+            print(f"{f'{fmt} {side}x{side * 3 // 4}':>16} {len(data) / 1024:>8.0f} {request_ms:>11.2f} "
+                  f"{background_ms:>17.1f}")
+
+
+if __name__ == '__main__':
+    main()
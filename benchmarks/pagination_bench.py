@@ -0,0 +1,79 @@
+"""
+Benchmark de paginación del listado de reportes: OFFSET vs cursor (keyset).
+
+Crea una base temporal con un historial sintético de --months meses para un usuario
+y mide el tiempo de leer páginas cada vez más profundas con ambos métodos.
+
+    python benchmarks/pagination_bench.py --months 12000
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db import configure_connection  # noqa: E402
+from migrations import migrate  # noqa: E402
+from pagination import fetch_reports_page, encode_cursor, count_reports  # noqa: E402
+
+
+def seed(conn, months):
+    rows = []
+    for index in range(months):
+        year, month = 2025 - index // 12, 12 - index % 12
+        rows.append((1, year, month, 100.0 + index, 20, 15))
+    conn.executemany('''
+        INSERT INTO monthly_totals (user_id, year, month, total, tx_count, active_days)
+        VALUES (?, ?, ?, ?, ?, ?)
+    ''', rows)
+    conn.commit()
+
+
+def timed(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description='OFFSET vs keyset en /reportes')
+    parser.add_argument('--months', type=int, default=12000, help='Meses de historial sintético (default: 12000)')
+    parser.add_argument('--per-page', type=int, default=10, help='Reportes por página (default: 10)')
+    parser.add_argument('--repeat', type=int, default=20, help='Repeticiones por medición (default: 20)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = configure_connection(sqlite3.connect(os.path.join(tmp, 'bench.db')))
+        migrate(conn)
+        seed(conn, args.months)
+        total_pages = args.months // args.per_page
+        print(f"📚 {args.months} meses, {total_pages} páginas de {args.per_page}")
+        print(f"⏱️  conteo aproximado del total: {timed(lambda: count_reports(conn, 1), args.repeat):.3f} ms")
+        # El total se pasa ya calculado para medir solo la consulta de la página
+        total = count_reports(conn, 1)
+        print(f"{'página':>8} {'OFFSET ms':>10} {'cursor ms':>10}")
+
+        for page in (1, 10, 100, total_pages // 4, total_pages // 2, total_pages - 1):
+            page = max(page, 1)
+            # La clave del cursor es el último (year, month) de la página anterior
+            index = (page - 1) * args.per_page - 1
+            key = (2025 - index // 12, 12 - index % 12) if index >= 0 else None
+            cursor = encode_cursor(key, 'n') if key else None
+            offset_ms = timed(lambda: fetch_reports_page(conn, 1, args.per_page, page=page, total=total), args.repeat)
+            if cursor:
+                keyset_ms = timed(lambda: fetch_reports_page(conn, 1, args.per_page, cursor=cursor, total=total), args.repeat)
+            else:
+                keyset_ms = offset_ms
+            print(f"{page:>8} {offset_ms:>10.3f} {keyset_ms:>10.3f}")
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+"""
+Benchmark de lecturas y escrituras concurrentes: hilos lectores arman el reporte de un mes
+(versión del mes y sus transacciones) mientras otros hilos agregan transacciones. Compara un
+solo pool compartido (como antes) con el pool mode=ro de lectura separado del de escritura.
+
+    python benchmarks/read_bench.py --readers 16 --writers 4 --seconds 5
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db import DB_READ_CACHE_SIZE_KB, DB_READ_POOL_SIZE, ConnectionPool  # noqa: E402
+from migrations import migrate  # noqa: E402
+from records import fetch_month_transactions  # noqa: E402
+from rollups import rebuild_rollups  # noqa: E402
+from versions import get_month_validator  # noqa: E402
+from writer import insert_transaction  # noqa: E402
+
+YEAR, MONTH = 2024, 6
+
+
+def seed(pool, users, rows):
+    conn = pool.connect()
+    try:
+        migrate(conn)
+        conn.executemany('INSERT INTO users (id, username, email, password_hash) VALUES (?, ?, ?, ?)',
+                         ((user_id, f'bench{user_id}', f'bench{user_id}@example.com', 'x')
+                          for user_id in range(1, users + 1)))
+        conn.executemany('INSERT INTO transactions (user_id, year, month, day, amount) VALUES (?, ?, ?, ?, ?)',
+                         ((number % users + 1, YEAR, MONTH, number % 28 + 1, 10.0 + number % 90)
+                          for number in range(rows)))
+        rebuild_rollups(conn)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def run(read_pool, write_pool, args):
+    """Readers and writers for args.seconds; returns (read latencies, write latencies, elapsed)"""
+    stop = threading.Event()
+    barrier = threading.Barrier(args.readers + args.writers + 1)
+    reads = [[] for _ in range(args.readers)]
+    writes = [[] for _ in range(args.writers)]
+
+    def reader(index):
+        user_id = index % args.users + 1
+        barrier.wait()
+        while not stop.is_set():
+            started = time.perf_counter()
+            conn = read_pool.acquire()
+            try:
+                get_month_validator(conn, user_id, YEAR, MONTH)
+                fetch_month_transactions(conn, user_id, YEAR, MONTH)
+            finally:
+                read_pool.release(conn)
+            reads[index].append(time.perf_counter() - started)
+
+    def writer(index):
+        number = 0
+        barrier.wait()
+        while not stop.is_set():
+            started = time.perf_counter()
+            conn = write_pool.acquire()
+            try:
+                insert_transaction(conn, index % args.users + 1, YEAR, MONTH, number % 28 + 1, 1.0, None)
+                conn.commit()
+            finally:
+                write_pool.release(conn)
+            writes[index].append(time.perf_counter() - started)
+            number += 1
+
+    threads = ([threading.Thread(target=reader, args=(index,)) for index in range(args.readers)] +
+               [threading.Thread(target=writer, args=(index,)) for index in range(args.writers)])
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    started = time.perf_counter()
+    time.sleep(args.seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    return (sorted(value for values in reads for value in values),
+            sorted(value for values in writes for value in values), elapsed)
+
+
+def describe(latencies, elapsed):
+    total = len(latencies)
+    p50 = latencies[total // 2] * 1000
+    p99 = latencies[min(total - 1, int(total * 0.99))] * 1000
+    return f"{total / elapsed:>9.0f} {p50:>8.2f} {p99:>8.2f}"
+
+
+def measure(name, separate, args):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.db')
+        write_pool = ConnectionPool(path)
+        seed(write_pool, args.users, args.rows)
+        if separate:
+            read_pool = ConnectionPool(path, size=DB_READ_POOL_SIZE, read_only=True,
+                                       cache_size_kb=DB_READ_CACHE_SIZE_KB)
+        else:
+            read_pool = write_pool
+        reads, writes, elapsed = run(read_pool, write_pool, args)
+        stats = write_pool.stats()
+        read_pool.close_all()
+        write_pool.close_all()
+    print(f"{name:>10} {describe(reads, elapsed)} {describe(writes, elapsed)} {stats['waits']:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Reportes y escrituras concurrentes: pool compartido vs pool mode=ro')
+    parser.add_argument('--readers', type=int, default=16, help='Hilos lectores (default: 16)')
+    parser.add_argument('--writers', type=int, default=4, help='Hilos escritores (default: 4)')
+    parser.add_argument('--users', type=int, default=20, help='Usuarios (default: 20)')
+    parser.add_argument('--rows', type=int, default=20000, help='Transacciones del mes (default: 20000)')
+    parser.add_argument('--seconds', type=float, default=5, help='Duración de cada medición (default: 5)')
+    args = parser.parse_args()
+
+    print(f"📖 {args.readers} lectores + {args.writers} escritores, {args.rows} transacciones, {args.seconds:g} s")
+    print(f"{'pools':>10} {'lect/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'escr/s':>9} {'p50 ms':>8} {'p99 ms':>8} "
+          f"{'esperas':>8}")
+    measure('compartido', False, args)
+    measure('separados', True, args)
+
+
+if __name__ == '__main__':
+    main()
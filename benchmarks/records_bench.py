@@ -0,0 +1,99 @@
+"""
+Benchmark de decodificación de filas para la vista de impresión de un mes grande.
+
+Compara el camino anterior (sqlite3.Row + dict por fila + strptime de created_at) con los
+registros de records.py (tuplas con nombre, created_at decodificado solo al usarse) y mide
+además el costo de leer created_at de todas las filas con cada método.
+
+    python benchmarks/records_bench.py --rows 50000
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db import configure_connection  # noqa: E402
+from migrations import migrate  # noqa: E402
+from records import fetch_month_transactions, group_by_day, parse_timestamp  # noqa: E402
+
+
+def seed(conn, rows):
+    conn.execute('INSERT INTO users (id, username, email, password_hash) VALUES (1, ?, ?, ?)',
+                 ('bench', 'bench@example.com', 'x'))
+    conn.executemany('''
+        INSERT INTO transactions (user_id, year, month, day, amount, description, created_at)
+        VALUES (1, 2024, 3, ?, ?, ?, ?)
+    ''', ((index % 31 + 1, 10.0 + index % 500, f'venta {index}' if index % 3 else None,
+           f'2024-03-{index % 31 + 1:02d} {index % 24:02d}:{index % 60:02d}:{index * 7 % 60:02d}')
+          for index in range(rows)))
+    conn.commit()
+
+
+def legacy(conn):
+    rows = conn.execute('''
+        SELECT day, amount, description, created_at
+        FROM transactions
+        WHERE user_id = ? AND year = ? AND month = ?
+        ORDER BY day, id
+    ''', (1, 2024, 3)).fetchall()
+    transactions_by_day = {}
+    for trans in rows:
+        day = trans['day']
+        if day not in transactions_by_day:
+            transactions_by_day[day] = []
+        transactions_by_day[day].append({
+            'amount': trans['amount'],
+            'description': trans['description'] or 'No description',
+            'created_at': datetime.strptime(trans['created_at'], '%Y-%m-%d %H:%M:%S') if trans['created_at'] else datetime.now()
+        })
+    return transactions_by_day
+
+
+def records(conn):
+    return group_by_day(fetch_month_transactions(conn, 1, 2024, 3, 'No description'))
+
+
+def timed(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Decodificación de filas en print_report')
+    parser.add_argument('--rows', type=int, default=50000, help='Transacciones del mes (default: 50000)')
+    parser.add_argument('--repeat', type=int, default=5, help='Repeticiones por medición (default: 5)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = configure_connection(sqlite3.connect(os.path.join(tmp, 'bench.db')))
+        migrate(conn)
+        seed(conn, args.rows)
+        print(f"📚 {args.rows} transacciones en un mes")
+
+        def read_record_dates():
+            parse_timestamp.cache_clear()
+            return [t.created_at for items in records(conn).values() for t in items]
+
+        results = [
+            ('Row + dict + strptime', timed(lambda: legacy(conn), args.repeat)),
+            ('registros', timed(lambda: records(conn), args.repeat)),
+            ('registros + created_at', timed(read_record_dates, args.repeat)),
+        ]
+        for name, ms in results:
+            print(f"{name:>24}: {ms:8.1f} ms")
+        print(f"{'mejora (sin fechas)':>24}: {results[0][1] / results[1][1]:8.1f}x")
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
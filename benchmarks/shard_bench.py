@@ -0,0 +1,146 @@
+"""
+Benchmark de escrituras con sharding: varios procesos (como los workers de gunicorn) agregan
+transacciones de muchos usuarios, cada una con su COMMIT en el shard del usuario. Con un solo
+archivo todos compiten por el mismo lock de escritura; con N shards hay N locks.
+
+    python benchmarks/shard_bench.py --processes 4 --writes 500
+    python benchmarks/shard_bench.py --processes 4 --writes 500 --synchronous FULL
+"""
+
+import argparse
+import contextlib
+import io
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db import ConnectionPool  # noqa: E402
+from migrations import migrate  # noqa: E402
+from rebalance import Layout, split_shard  # noqa: E402
+from rollups import verify_rollups  # noqa: E402
+from sharding import MAIN_SHARD, ShardRouter  # noqa: E402
+from writer import insert_transaction  # noqa: E402
+
+YEAR, MONTH = 2024, 6
+
+
+def seed(path, users, shards):
+    conn = ConnectionPool(path).connect()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            migrate(conn)
+        conn.executemany('INSERT INTO users (id, username, email, password_hash) VALUES (?, ?, ?, ?)',
+                         ((user_id, f'bench{user_id}', f'bench{user_id}@example.com', 'x')
+                          for user_id in range(1, users + 1)))
+        conn.commit()
+    finally:
+        conn.close()
+    if shards > 1:
+        # Los mensajes de migraciones y de rebalance.py ensucian la tabla
+        with contextlib.redirect_stdout(io.StringIO()):
+            layout = Layout(path)
+            try:
+                split_shard(layout, MAIN_SHARD, shards)
+            finally:
+                layout.close()
+
+
+def writer_process(path, index, processes, writes, users, synchronous, barrier, results):
+    main_pool = ConnectionPool(path)
+    router = ShardRouter(path)
+    conn = main_pool.connect()
+    router.load(conn)
+    conn.close()
+    connections = {}
+
+    def connection_for(user_id):
+        pool = router.pool_for(user_id) or main_pool
+        conn = connections.get(pool)
+        if conn is None:
+            conn = connections[pool] = pool.connect()
+            conn.execute(f'PRAGMA synchronous = {synchronous}')
+        return conn
+
+    latencies = []
+    barrier.wait()
+    for number in range(writes):
+        # Cada proceso recorre su propia porción de usuarios, como requests de usuarios distintos
+        user_id = (number * processes + index) % users + 1
+        started = time.perf_counter()
+        conn = connection_for(user_id)
+        insert_transaction(conn, user_id, YEAR, MONTH, number % 28 + 1, 10.0 + number, None)
+        conn.commit()
+        latencies.append(time.perf_counter() - started)
+    for conn in connections.values():
+        conn.close()
+    results.put(latencies)
+
+
+def measure(shards, args):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.db')
+        seed(path, args.users, shards)
+        barrier = multiprocessing.Barrier(args.processes + 1)
+        results = multiprocessing.Queue()
+        workers = [multiprocessing.Process(target=writer_process,
+                                           args=(path, index, args.processes, args.writes, args.users,
+                                                 args.synchronous, barrier, results))
+                   for index in range(args.processes)]
+        for process in workers:
+            process.start()
+        barrier.wait()
+        started = time.perf_counter()
+        latencies = sorted(value for _ in workers for value in results.get())
+        elapsed = time.perf_counter() - started
+        for process in workers:
+            process.join()
+
+        router = ShardRouter(path)
+        main_pool = ConnectionPool(path)
+        conn = main_pool.connect()
+        router.load(conn)
+        pools = [main_pool] + [router.pool(name) for name in router.shards()]
+        conn.close()
+        count = 0
+        for pool in pools:
+            conn = pool.connect()
+            try:
+                count += conn.execute('SELECT COUNT(*) FROM transactions').fetchone()[0]
+                assert not verify_rollups(conn), f'{shards} shards: rollups desalineados'
+            finally:
+                conn.close()
+        assert count == args.processes * args.writes, f'{shards} shards: {count} filas escritas'
+
+    total = len(latencies)
+    p50 = latencies[total // 2] * 1000
+    p99 = latencies[min(total - 1, int(total * 0.99))] * 1000
+    print(f"{shards:>7} {total / elapsed:>10.0f} {p50:>9.2f} {p99:>9.2f}")
+    return total / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Escrituras de varios procesos con 1 archivo vs N shards')
+    parser.add_argument('--processes', type=int, default=4, help='Procesos escritores (default: 4)')
+    parser.add_argument('--writes', type=int, default=500, help='Escrituras por proceso (default: 500)')
+    parser.add_argument('--users', type=int, default=200, help='Usuarios entre los que se reparten (default: 200)')
+    parser.add_argument('--shards', default='1,2,4,8', help='Cantidades de shards a comparar (default: 1,2,4,8)')
+    parser.add_argument('--synchronous', choices=['NORMAL', 'FULL'], default='NORMAL',
+                        help='PRAGMA synchronous de las conexiones (default: NORMAL, el de la app)')
+    args = parser.parse_args()
+
+    print(f"🧩 {args.processes} procesos x {args.writes} escrituras, {args.users} usuarios, "
+          f"synchronous={args.synchronous}")
+    print(f"{'shards':>7} {'escr/s':>10} {'p50 ms':>9} {'p99 ms':>9}")
+    baseline = None
+    for shards in (int(value) for value in args.shards.split(',')):
+        rate = measure(shards, args)
+        baseline = baseline or rate
+    print(f"📈 {shards} shards / {args.shards.split(',')[0]}: {rate / baseline:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,140 @@
+"""
+Benchmark de escrituras concurrentes: cada hilo simula un request que agrega transacciones.
+Compara el camino directo (cada request hace su propio COMMIT y compite por el lock de
+escritura de SQLite) con la cola de writer.py (un hilo escritor, un COMMIT por lote).
+
+    python benchmarks/write_bench.py --threads 16 --writes 200
+    python benchmarks/write_bench.py --threads 16 --writes 200 --synchronous FULL
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db import ConnectionPool  # noqa: E402
+from migrations import migrate  # noqa: E402
+from rollups import verify_rollups  # noqa: E402
+from writer import WriteQueue, insert_transaction  # noqa: E402
+
+YEAR, MONTH = 2024, 6
+
+
+def make_pool(path, synchronous):
+    pool = ConnectionPool(path)
+    connect = pool.connect
+
+    def connect_with_synchronous():
+        conn = connect()
+        conn.execute(f'PRAGMA synchronous = {synchronous}')
+        return conn
+    pool.connect = connect_with_synchronous
+    return pool
+
+
+def seed(pool, users):
+    conn = pool.connect()
+    try:
+        migrate(conn)
+        conn.executemany('INSERT INTO users (id, username, email, password_hash) VALUES (?, ?, ?, ?)',
+                         ((user_id, f'bench{user_id}', f'bench{user_id}@example.com', 'x')
+                          for user_id in range(1, users + 1)))
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def run_threads(threads, writes, write):
+    """Start `threads` workers doing `writes` writes each; returns sorted latencies"""
+    latencies = [[] for _ in range(threads)]
+    barrier = threading.Barrier(threads + 1)
+
+    def worker(index):
+        barrier.wait()
+        for number in range(writes):
+            started = time.perf_counter()
+            write(index, number)
+            latencies[index].append(time.perf_counter() - started)
+
+    workers = [threading.Thread(target=worker, args=(index,)) for index in range(threads)]
+    for thread in workers:
+        thread.start()
+    barrier.wait()
+    started = time.perf_counter()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    return elapsed, sorted(value for values in latencies for value in values)
+
+
+def direct_path(pool, users):
+    def write(index, number):
+        # Igual que un request sin cola: conexión del pool, operación y COMMIT propio
+        conn = pool.acquire()
+        try:
+            insert_transaction(conn, index % users + 1, YEAR, MONTH, number % 28 + 1, 10.0 + number, None)
+            conn.commit()
+        finally:
+            pool.release(conn)
+    return write, None
+
+
+def queued_path(pool, users):
+    write_queue = WriteQueue(pool)
+
+    def write(index, number):
+        write_queue.run(insert_transaction, index % users + 1, YEAR, MONTH, number % 28 + 1, 10.0 + number, None)
+    return write, write_queue
+
+
+def measure(name, factory, args):
+    with tempfile.TemporaryDirectory() as tmp:
+        pool = make_pool(os.path.join(tmp, 'bench.db'), args.synchronous)
+        seed(pool, args.users)
+        write, write_queue = factory(pool, args.users)
+        elapsed, latencies = run_threads(args.threads, args.writes, write)
+        extra = ''
+        if write_queue is not None:
+            stats = write_queue.stats()
+            write_queue.close()
+            extra = f"  lotes {stats['batches']}, promedio {stats['avg_batch']:.1f}, máx {stats['max_batch_seen']}"
+
+        conn = pool.connect()
+        try:
+            count = conn.execute('SELECT COUNT(*) FROM transactions').fetchone()[0]
+            mismatches = verify_rollups(conn)
+        finally:
+            conn.close()
+        pool.close_all()
+        assert count == args.threads * args.writes, f'{name}: {count} filas escritas'
+        assert not mismatches, f'{name}: rollups desalineados'
+
+    total = len(latencies)
+    p50 = latencies[total // 2] * 1000
+    p99 = latencies[min(total - 1, int(total * 0.99))] * 1000
+    print(f"{name:>8} {total / elapsed:>10.0f} {p50:>9.2f} {p99:>9.2f}{extra}")
+    return total / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Escrituras concurrentes: COMMIT por request vs cola agrupada')
+    parser.add_argument('--threads', type=int, default=16, help='Requests concurrentes (default: 16)')
+    parser.add_argument('--writes', type=int, default=200, help='Escrituras por hilo (default: 200)')
+    parser.add_argument('--users', type=int, default=4, help='Usuarios entre los que se reparten (default: 4)')
+    parser.add_argument('--synchronous', choices=['NORMAL', 'FULL'], default='NORMAL',
+                        help='PRAGMA synchronous de las conexiones (default: NORMAL, el de la app)')
+    args = parser.parse_args()
+
+    print(f"✍️ {args.threads} hilos x {args.writes} escrituras, synchronous={args.synchronous}")
+    print(f"{'camino':>8} {'escr/s':>10} {'p50 ms':>9} {'p99 ms':>9}")
+    direct = measure('directo', direct_path, args)
+    queued = measure('cola', queued_path, args)
+    print(f"📈 cola / directo: {queued / direct:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,17 +1,41 @@
 #!/usr/bin/env python3
 """
 Script de build para Vercel
-Compila Tailwind CSS antes del deploy
+Compila Tailwind CSS y genera los bundles de assets antes del deploy:
+minificados, con hash de contenido en el nombre, hermanos .gz/.br y un manifest
+(static/dist/manifest.json) que la app resuelve con asset_url().
 """
 
+import argparse
+import gzip
+import hashlib
+import json
+import re
 import subprocess
 import sys
 import os
 
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+try:
+    import rjsmin
+    import rcssmin
+    MINIFIERS_AVAILABLE = True
+except ImportError:
+    MINIFIERS_AVAILABLE = False
+
+from assets import ASSET_DIR, BUNDLES, MANIFEST_PATH, STATIC_DIR
+
+HASH_LENGTH = 10
+
 def build_css():
     """Compila Tailwind CSS"""
     print("🎨 Compilando Tailwind CSS...")
-    
+
     # Verificar si Node.js está disponible
     try:
         subprocess.run(['node', '--version'], check=True, capture_output=True)
@@ -22,18 +46,19 @@ def build_css():
         except subprocess.CalledProcessError:
             print("❌ Error instalando dependencias de Node.js")
             return False
-    
+
     try:
-        # Compilar CSS
+        # Compilar CSS (ya minificado: el bundle final solo le agrega hash y compresión)
         result = subprocess.run([
-            'npx', '@tailwindcss/cli', 
-            '-i', './static/css/src/input.css', 
-            '-o', './static/css/dist/output.css'
+            'npx', '@tailwindcss/cli',
+            '-i', './static/css/src/input.css',
+            '-o', './static/css/dist/output.css',
+            '--minify'
         ], check=True, capture_output=True, text=True)
-        
+
         print("✅ Tailwind CSS compilado exitosamente")
         return True
-        
+
     except subprocess.CalledProcessError as e:
         print(f"❌ Error compilando CSS: {e}")
         print(f"Error output: {e.stderr}")
@@ -42,20 +67,109 @@ def build_css():
         print(f"❌ Comando no encontrado: {e}")
         return False
 
+def minify_js(source):
+    """Minify JavaScript; without rjsmin only whole-line comments and indentation go away"""
+    if MINIFIERS_AVAILABLE:
+        return rjsmin.jsmin(source)
+    # Conservador: se mantienen los saltos de línea para no romper la inserción automática de ';'
+    lines = (line.strip() for line in source.splitlines())
+    return '\n'.join(line for line in lines if line and not line.startswith('//')) + '\n'
+
+def minify_css(source):
+    """Minify CSS; without rcssmin comments and redundant whitespace are removed"""
+    if MINIFIERS_AVAILABLE:
+        return rcssmin.cssmin(source)
+    source = re.sub(r'/\*.*?\*/', '', source, flags=re.S)
+    source = re.sub(r'\s+', ' ', source)
+    return re.sub(r'\s*([{};])\s*', r'\1', source).strip()
+
+MINIFIERS = {'.css': minify_css, '.js': minify_js}
+
+def write_bundle(name, content):
+    """Write <name>.<hash><ext> plus .gz/.br siblings; returns the hashed name"""
+    stem, ext = os.path.splitext(name)
+    digest = hashlib.sha256(content).hexdigest()[:HASH_LENGTH]
+    hashed = f'{stem}.{digest}{ext}'
+    path = os.path.join(ASSET_DIR, hashed)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    with open(path, 'wb') as f:
+        f.write(content)
+    # mtime=0: el mismo contenido produce siempre el mismo .gz (builds reproducibles)
+    with open(path + '.gz', 'wb') as f:
+        f.write(gzip.compress(content, compresslevel=9, mtime=0))
+    sizes = [f"{len(content) / 1024:.1f} KB", f"gzip {os.path.getsize(path + '.gz') / 1024:.1f} KB"]
+    if BROTLI_AVAILABLE:
+        with open(path + '.br', 'wb') as f:
+            f.write(brotli.compress(content, quality=11))
+        sizes.append(f"br {os.path.getsize(path + '.br') / 1024:.1f} KB")
+    print(f"📦 {hashed} ({', '.join(sizes)})")
+    return hashed
+
+def remove_stale_assets(keep):
+    """Delete hashed files from previous builds that the new manifest no longer references"""
+    keep_paths = {os.path.join(ASSET_DIR, name + suffix) for name in keep for suffix in ('', '.gz', '.br')}
+    keep_paths.add(MANIFEST_PATH)
+    for root, _, files in os.walk(ASSET_DIR):
+        for filename in files:
+            path = os.path.join(root, filename)
+            if path not in keep_paths:
+                os.remove(path)
+
+def build_assets():
+    """Minify, hash and compress every bundle, then write the manifest"""
+    print("🧱 Generando bundles de assets...")
+    if not MINIFIERS_AVAILABLE:
+        print("ℹ️ rjsmin/rcssmin no instalados: se usa la minificación básica")
+    if not BROTLI_AVAILABLE:
+        print("ℹ️ brotli no instalado: solo se generan archivos .gz")
+
+    manifest = {}
+    for name, sources in BUNDLES.items():
+        parts = []
+        for source in sources:
+            try:
+                with open(os.path.join(STATIC_DIR, source), encoding='utf-8') as f:
+                    parts.append(f.read())
+            except FileNotFoundError:
+                print(f"❌ Falta {source} (¿se compiló Tailwind?)")
+                return False
+        minify = MINIFIERS[os.path.splitext(name)[1]]
+        content = minify('\n'.join(parts)).encode('utf-8')
+        manifest[name] = write_bundle(name, content)
+
+    # Se reemplaza de una vez: la app nunca lee un manifest a medio escribir
+    tmp_path = MANIFEST_PATH + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, MANIFEST_PATH)
+    remove_stale_assets(manifest.values())
+    print(f"✅ Manifest escrito en {os.path.relpath(MANIFEST_PATH)}")
+    return True
+
 def main():
     """Función principal"""
+    parser = argparse.ArgumentParser(description='Build de CSS y assets')
+    parser.add_argument('--skip-tailwind', action='store_true',
+                        help='Reutilizar static/css/dist/output.css sin recompilar Tailwind')
+    args = parser.parse_args()
+
     print("🚀 Iniciando build para Vercel...")
-    
+
     # Verificar que estamos en el directorio correcto
     if not os.path.exists('app.py'):
         print("❌ No se encontró app.py. Asegúrate de estar en el directorio correcto.")
         sys.exit(1)
-    
+
     # Compilar CSS
-    if not build_css():
+    if not args.skip_tailwind and not build_css():
+        print("❌ Build falló")
+        sys.exit(1)
+
+    if not build_assets():
         print("❌ Build falló")
         sys.exit(1)
-    
+
     print("✅ Build completado exitosamente")
 
 if __name__ == '__main__':
@@ -0,0 +1,261 @@
+"""
+Capa de conexiones SQLite: pool de conexiones pre-configuradas (WAL, busy_timeout,
+cache y mmap) que se reutilizan entre requests en lugar de abrir una por cada uno.
+
+Las páginas que solo leen usan un pool aparte de conexiones de solo lectura (mode=ro y
+query_only): con WAL los lectores no bloquean al escritor ni esperan por él, y ese pool
+puede ser más grande y con más caché que el de escritura.
+"""
+
+import os
+import queue
+import sqlite3
+import threading
+import time
+from urllib.request import pathname2url
+
+# Ajustes de conexión (pueden sobreescribirse por variables de entorno)
+DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 8))
+DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', 10))  # segundos esperando una conexión libre
+DB_BUSY_TIMEOUT_MS = int(os.environ.get('DB_BUSY_TIMEOUT_MS', 5000))
+DB_CACHE_SIZE_KB = int(os.environ.get('DB_CACHE_SIZE_KB', 16384))  # 16 MB de page cache por conexión
+DB_MMAP_SIZE = int(os.environ.get('DB_MMAP_SIZE', 256 * 1024 * 1024))
+DB_READ_POOL_ENABLED = os.environ.get('DB_READ_POOL', '1') == '1'
+DB_READ_POOL_SIZE = int(os.environ.get('DB_READ_POOL_SIZE', 16))
+DB_READ_CACHE_SIZE_KB = int(os.environ.get('DB_READ_CACHE_SIZE_KB', 65536))  # 64 MB por conexión de lectura
+# Después de escribir, las lecturas del mismo usuario van al pool de escritura durante estos segundos
+READ_YOUR_WRITES_SECONDS = float(os.environ.get('READ_YOUR_WRITES_SECONDS', 5))
+DB_LOCK_RETRIES = 3
+
+
+def _is_locked_error(error):
+    message = str(error).lower()
+    return 'database is locked' in message or 'database is busy' in message
+
+
+class ProfiledCursor(sqlite3.Cursor):
+    """Cursor that adds execute/fetch time and row counts to the connection profiler's record"""
+
+    record = None
+
+    def _timed(self, operation, *args):
+        started = time.perf_counter()
+        try:
+            return operation(*args)
+        finally:
+            if self.record is not None:
+                self.record.seconds += time.perf_counter() - started
+
+    def execute(self, sql, parameters=()):
+        self.record = self.connection.profiler(sql)
+        result = self._timed(super().execute, sql, parameters)
+        if self.record is not None and self.rowcount > 0:
+            self.record.rows += self.rowcount  # filas afectadas por INSERT/UPDATE/DELETE
+        return result
+
+    def executemany(self, sql, seq_of_parameters):
+        self.record = self.connection.profiler(sql)
+        result = self._timed(super().executemany, sql, seq_of_parameters)
+        if self.record is not None and self.rowcount > 0:
+            self.record.rows += self.rowcount
+        return result
+
+    # SQLite ejecuta la consulta a medida que se leen las filas: el fetch también cuenta
+    def fetchone(self):
+        row = self._timed(super().fetchone)
+        if row is not None and self.record is not None:
+            self.record.rows += 1
+        return row
+
+    def fetchmany(self, *args):
+        rows = self._timed(super().fetchmany, *args)
+        if self.record is not None:
+            self.record.rows += len(rows)
+        return rows
+
+    def fetchall(self):
+        rows = self._timed(super().fetchall)
+        if self.record is not None:
+            self.record.rows += len(rows)
+        return rows
+
+    def __next__(self):
+        row = self._timed(super().__next__)
+        if self.record is not None:
+            self.record.rows += 1
+        return row
+
+
+class PooledConnection(sqlite3.Connection):
+    """sqlite3 connection that retries statements failing with 'database is locked'"""
+
+    pool = None
+    # callable(sql) -> registro con .seconds/.rows (o None); lo instala profiling.py
+    profiler = None
+
+    def _retry(self, operation, *args):
+        attempt = 0
+        while True:
+            try:
+                return operation(*args)
+            except sqlite3.OperationalError as e:
+                if not _is_locked_error(e) or attempt >= DB_LOCK_RETRIES:
+                    raise
+                attempt += 1
+                if self.pool is not None:
+                    self.pool.count('lock_retries')
+                time.sleep(0.01 * (2 ** attempt))
+
+    def cursor(self, factory=None):
+        if factory is None:
+            factory = ProfiledCursor if self.profiler is not None else sqlite3.Cursor
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        if self.profiler is not None:
+            return self._retry(self.cursor().execute, sql, parameters)
+        return self._retry(super().execute, sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        if self.profiler is not None:
+            return self._retry(self.cursor().executemany, sql, seq_of_parameters)
+        return self._retry(super().executemany, sql, seq_of_parameters)
+
+    def commit(self):
+        return self._retry(super().commit)
+
+
+def configure_connection(conn, cache_size_kb=DB_CACHE_SIZE_KB, mmap_size=DB_MMAP_SIZE, foreign_keys=True,
+                         read_only=False):
+    """Apply the PRAGMAs every connection of the app should run with"""
+    conn.row_factory = sqlite3.Row
+    conn.execute(f'PRAGMA busy_timeout = {DB_BUSY_TIMEOUT_MS}')
+    if read_only:
+        # El modo WAL lo fija el pool de escritura (queda guardado en el archivo)
+        conn.execute('PRAGMA query_only = ON')
+    else:
+        conn.execute('PRAGMA journal_mode = WAL')
+        conn.execute('PRAGMA synchronous = NORMAL')
+    conn.execute(f'PRAGMA cache_size = -{cache_size_kb}')
+    conn.execute(f'PRAGMA mmap_size = {mmap_size}')
+    conn.execute('PRAGMA temp_store = MEMORY')
+    conn.execute(f"PRAGMA foreign_keys = {'ON' if foreign_keys else 'OFF'}")
+    return conn
+
+
+class ConnectionPool:
+    """Thread-safe pool of tuned SQLite connections for one database file"""
+
+    def __init__(self, database, size=DB_POOL_SIZE, timeout=DB_POOL_TIMEOUT, foreign_keys=True,
+                 read_only=False, cache_size_kb=DB_CACHE_SIZE_KB):
+        self.database = database
+        self.size = size
+        self.timeout = timeout
+        # Los shards no tienen la tabla users: sus claves foráneas no se pueden verificar ahí
+        self.foreign_keys = foreign_keys
+        self.read_only = read_only
+        self.cache_size_kb = cache_size_kb
+        self._lock = threading.Lock()
+        self._stats = {'checkouts': 0, 'waits': 0, 'wait_time': 0.0, 'lock_retries': 0,
+                       'created': 0, 'discarded': 0}
+        self._reset()
+
+    def _reset(self):
+        # Las conexiones SQLite no sobreviven a un fork: cada proceso tiene su propio pool
+        self._pid = os.getpid()
+        self._idle = queue.LifoQueue()
+        self._open = 0
+
+    def count(self, name, amount=1):
+        with self._lock:
+            self._stats[name] += amount
+
+    def connect(self):
+        """Open a new tuned connection that is not tracked by the pool"""
+        database, uri = self.database, False
+        if self.read_only:
+            # mode=ro: SQLite rechaza cualquier escritura y nunca toma el lock de escritura
+            database, uri = f'file:{pathname2url(os.path.abspath(self.database))}?mode=ro', True
+        conn = sqlite3.connect(database, timeout=DB_BUSY_TIMEOUT_MS / 1000, uri=uri,
+                               check_same_thread=False, factory=PooledConnection)
+        conn.pool = self
+        return configure_connection(conn, cache_size_kb=self.cache_size_kb, foreign_keys=self.foreign_keys,
+                                    read_only=self.read_only)
+
+    def acquire(self):
+        """Check out a connection, opening one if the pool is not full yet"""
+        if self._pid != os.getpid():
+            self._reset()
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            conn = None
+            with self._lock:
+                if self._open < self.size:
+                    self._open += 1
+                    self._stats['created'] += 1
+                    create = True
+                else:
+                    create = False
+            if create:
+                try:
+                    conn = self.connect()
+                except Exception:
+                    with self._lock:
+                        self._open -= 1
+                    raise
+            else:
+                started = time.perf_counter()
+                try:
+                    conn = self._idle.get(timeout=self.timeout)
+                except queue.Empty:
+                    raise sqlite3.OperationalError('connection pool exhausted')
+                finally:
+                    self.count('waits')
+                    self.count('wait_time', time.perf_counter() - started)
+        self.count('checkouts')
+        return conn
+
+    def release(self, conn):
+        """Return a connection to the pool, rolling back anything left uncommitted"""
+        if self._pid != os.getpid():
+            return
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            # Conexión inutilizable: se descarta y se libera su hueco en el pool
+            with self._lock:
+                self._open -= 1
+                self._stats['discarded'] += 1
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+            return
+        self._idle.put(conn)
+
+    def prefill(self, count):
+        """Open up to count connections ahead of the first requests (worker warm-up)"""
+        conns = [self.acquire() for _ in range(min(count, self.size))]
+        for conn in conns:
+            self.release(conn)
+
+    def close_all(self):
+        """Close every idle connection (used at shutdown and in tests)"""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._open -= 1
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['open'] = self._open
+        stats['idle'] = self._idle.qsize()
+        stats['size'] = self.size
+        return stats
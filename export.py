@@ -0,0 +1,164 @@
+"""
+Exportación de transacciones a CSV o XLSX en streaming. Las filas se leen del cursor por
+bloques y se escriben en trozos de tamaño fijo, así que la memoria no crece con el rango
+exportado; el XLSX se arma con zipfile sobre un destino no buscable, sin dependencias.
+"""
+
+import csv
+import io
+import re
+import zipfile
+import zlib
+from xml.sax.saxutils import escape
+
+EXPORT_FETCH_SIZE = 500  # filas por fetchmany
+EXPORT_CHUNK_SIZE = 64 * 1024  # bytes acumulados antes de entregar un trozo
+EXPORT_COLUMNS = ('year', 'month', 'day', 'amount', 'description', 'created_at')
+XLSX_MIMETYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+_PERIOD = re.compile(r'^(\d{4})-(\d{1,2})$')
+# Caracteres de control que XML 1.0 no admite (ni escapados)
+_XML_INVALID = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+
+def parse_period(value):
+    """'2024-03' -> (2024, 3)"""
+    match = _PERIOD.match(value or '')
+    if not match or not 1 <= int(match.group(2)) <= 12:
+        raise ValueError(f'Periodo inválido: {value!r} (se espera AAAA-MM)')
+    return int(match.group(1)), int(match.group(2))
+
+
+def iter_transactions(conn, user_id, start, end):
+    """Yield the user's transactions between two (year, month) periods, inclusive"""
+    cursor = conn.execute(f'''
+        SELECT {', '.join(EXPORT_COLUMNS)}
+        FROM transactions
+        WHERE user_id = ? AND (year, month) >= (?, ?) AND (year, month) <= (?, ?)
+        ORDER BY year, month, day, id
+    ''', (user_id, start[0], start[1], end[0], end[1]))
+    try:
+        while True:
+            rows = cursor.fetchmany(EXPORT_FETCH_SIZE)
+            if not rows:
+                break
+            yield from rows
+    finally:
+        cursor.close()
+
+
+def stream_csv(rows):
+    """CSV chunks (UTF-8 with BOM so Excel detects the encoding); same header as the importer"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    buffer.write('\ufeff')
+    writer.writerow(EXPORT_COLUMNS)
+    for row in rows:
+        writer.writerow(tuple(row))
+        if buffer.tell() >= EXPORT_CHUNK_SIZE:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode('utf-8')
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only, unseekable file that collects what zipfile writes until it is drained"""
+
+    def __init__(self):
+        self._chunks = []
+        self.size = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self.size += len(data)
+        return len(data)
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        self.size = 0
+        return data
+
+
+_XLSX_PARTS = {
+    '[Content_Types].xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>'
+    ),
+    '_rels/.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+        'Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    ),
+    'xl/workbook.xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="Transacciones" sheetId="1" r:id="rId1"/></sheets>'
+        '</workbook>'
+    ),
+    'xl/_rels/workbook.xml.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+        'Target="worksheets/sheet1.xml"/>'
+        '</Relationships>'
+    ),
+}
+
+
+def _xlsx_cell(value):
+    if isinstance(value, (int, float)):
+        return f'<c><v>{value!r}</v></c>'
+    if value is None:
+        return '<c/>'
+    return f'<c t="inlineStr"><is><t>{escape(_XML_INVALID.sub("", str(value)))}</t></is></c>'
+
+
+def _xlsx_row(values):
+    return '<row>' + ''.join(_xlsx_cell(value) for value in values) + '</row>'
+
+
+def stream_xlsx(rows):
+    """XLSX chunks: a minimal workbook with one sheet of inline-string/number cells"""
+    sink = _ChunkSink()
+    with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, content in _XLSX_PARTS.items():
+            archive.writestr(name, content)
+        with archive.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as sheet:
+            sheet.write(
+                b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+            )
+            sheet.write(_xlsx_row(EXPORT_COLUMNS).encode('utf-8'))
+            for row in rows:
+                sheet.write(_xlsx_row(tuple(row)).encode('utf-8'))
+                if sink.size >= EXPORT_CHUNK_SIZE:
+                    yield sink.drain()
+            sheet.write(b'</sheetData></worksheet>')
+    yield sink.drain()
+
+
+def gzip_chunks(chunks, level=6):
+    """Compress an iterable of byte chunks incrementally as a gzip stream"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
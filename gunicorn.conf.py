@@ -0,0 +1,39 @@
+"""
+Configuración de gunicorn: gunicorn -c gunicorn.conf.py wsgi:app
+
+preload_app hace que wsgi.py (create_app: migraciones bajo lock, plantillas y cachés) corra una
+sola vez en el maestro; los workers nacen con fork y cada uno abre su propio pool SQLite en post_fork.
+"""
+
+import gc
+import multiprocessing
+import os
+
+bind = os.environ.get('BIND', f"0.0.0.0:{os.environ.get('PORT', 8000)}")
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+# Hilos por worker: bcrypt y SQLite liberan el GIL, así que un worker atiende varios requests
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+preload_app = True
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+graceful_timeout = 30
+keepalive = 5
+# Reciclar workers de a poco acota la memoria sin reiniciar todos a la vez
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 5000))
+max_requests_jitter = max_requests // 10
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG', '-')
+
+
+def when_ready(server):
+    # Lo que cargó el maestro (módulos, plantillas) pasa a la generación permanente: el
+    # recolector de los workers no lo recorre ni lo toca, así las páginas siguen compartidas
+    gc.freeze()
+    server.log.info("App precargada; %s workers con %s hilos", workers, threads)
+
+
+def post_fork(server, worker):
+    # Las conexiones del maestro se cerraron antes del fork: cada worker abre las suyas (una por
+    # hilo) ahora y no con sus primeros requests
+    from app import warm_up_worker
+    warm_up_worker(threads)
+    server.log.info("Worker %s listo (pool SQLite propio)", worker.pid)
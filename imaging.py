@@ -0,0 +1,213 @@
+"""
+Procesamiento de logos fuera del request. La subida se valida por tamaño y se copia a un
+archivo temporal; de la imagen solo se lee la cabecera (formato y dimensiones) antes de
+aceptarla, así una bomba de descompresión se rechaza sin decodificar un solo píxel. Un pool
+acotado de hilos genera después las variantes 1x/2x/3x en PNG y WebP y las guarda con
+store_logo(); mientras tanto el usuario queda con logo_status = 'pending'.
+"""
+
+import io
+import os
+import secrets
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from PIL import Image, UnidentifiedImageError, features
+    PIL_AVAILABLE = True
+    WEBP_AVAILABLE = features.check('webp')
+except ImportError:
+    PIL_AVAILABLE = False
+    WEBP_AVAILABLE = False
+    print("PIL not available. Logo upload feature will be disabled.")
+
+from logos import store_logo
+
+LOGO_SIZE = 64  # lado del logo 1x en píxeles
+LOGO_SCALES = (1, 2, 3)
+LOGO_FORMATS = ('PNG', 'JPEG', 'GIF', 'WEBP')
+LOGO_MAX_UPLOAD_BYTES = int(os.environ.get('LOGO_MAX_UPLOAD_BYTES', 5 * 1024 * 1024))
+LOGO_MAX_PIXELS = int(os.environ.get('LOGO_MAX_PIXELS', 4096 * 4096))
+LOGO_WORKERS = int(os.environ.get('LOGO_WORKERS', 2))
+LOGO_QUEUE_LIMIT = int(os.environ.get('LOGO_QUEUE_LIMIT', LOGO_WORKERS * 4))  # logos en curso + en cola
+LOGO_UPLOAD_DIR = os.environ.get('LOGO_UPLOAD_DIR') or tempfile.gettempdir()
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+if PIL_AVAILABLE:
+    # Pillow rechaza por su cuenta imágenes de más del doble de este límite al abrirlas
+    Image.MAX_IMAGE_PIXELS = LOGO_MAX_PIXELS
+
+
+class InvalidLogo(Exception):
+    """Upload rejected before processing (size, format or dimensions)"""
+
+
+class LogoPipelineSaturated(Exception):
+    """Raised when too many logos are already being processed"""
+
+
+def spool_upload(stream, limit=LOGO_MAX_UPLOAD_BYTES, directory=LOGO_UPLOAD_DIR):
+    """Copy an upload to a temporary file in chunks, giving up past `limit` bytes; returns its path"""
+    fd, path = tempfile.mkstemp(prefix='logo-', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            size = 0
+            while True:
+                chunk = stream.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > limit:
+                    raise InvalidLogo(f'El logo no puede superar {limit // (1024 * 1024)} MB')
+                f.write(chunk)
+    except BaseException:
+        os.unlink(path)
+        raise
+    return path
+
+
+def inspect_logo(path):
+    """Check format and pixel count from the image header only (nothing is decoded)"""
+    try:
+        with Image.open(path) as image:
+            fmt, (width, height) = image.format, image.size
+    except Image.DecompressionBombError:
+        raise InvalidLogo('La imagen es demasiado grande')
+    except (UnidentifiedImageError, OSError, SyntaxError):
+        raise InvalidLogo('El archivo no es una imagen válida')
+    if fmt not in LOGO_FORMATS:
+        raise InvalidLogo('Formato de archivo no permitido. Use PNG, JPG, JPEG, GIF o WEBP')
+    if width * height > LOGO_MAX_PIXELS:
+        raise InvalidLogo(f'La imagen es demasiado grande ({width}x{height} píxeles)')
+    return fmt, width, height
+
+
+def render_variants(path):
+    """{variant: (mime, bytes)} with the logo centered on a transparent square at every scale"""
+    inspect_logo(path)
+    largest = LOGO_SIZE * max(LOGO_SCALES)
+    with Image.open(path) as image:
+        # JPEG: el decodificador reduce por DCT y no arma la imagen completa
+        image.draft('RGB', (largest, largest))
+        image = image.convert('RGBA')
+    image.thumbnail((largest, largest), Image.Resampling.LANCZOS, reducing_gap=3.0)
+
+    variants = {}
+    for scale in LOGO_SCALES:
+        side = LOGO_SIZE * scale
+        scaled = image.copy()
+        scaled.thumbnail((side, side), Image.Resampling.LANCZOS)
+        frame = Image.new('RGBA', (side, side), (0, 0, 0, 0))
+        frame.paste(scaled, ((side - scaled.size[0]) // 2, (side - scaled.size[1]) // 2), scaled)
+
+        buffer = io.BytesIO()
+        frame.save(buffer, format='PNG', optimize=True)
+        variants[f'{scale}x.png'] = ('image/png', buffer.getvalue())
+        if WEBP_AVAILABLE:
+            buffer = io.BytesIO()
+            frame.save(buffer, format='WEBP', quality=90, method=4)
+            variants[f'{scale}x.webp'] = ('image/webp', buffer.getvalue())
+    return variants
+
+
+def set_logo_job(conn, user_id, job, status):
+    conn.execute('UPDATE users SET logo_job = ?, logo_status = ? WHERE id = ?', (job, status, user_id))
+
+
+class LogoPipeline:
+    """Bounded worker pool that turns spooled uploads into stored logo variants"""
+
+    def __init__(self, pool, workers=LOGO_WORKERS, queue_limit=LOGO_QUEUE_LIMIT):
+        self.pool = pool
+        self.workers = workers
+        self.queue_limit = queue_limit
+        self._lock = threading.Lock()
+        self._stats = {'submitted': 0, 'completed': 0, 'failed': 0, 'superseded': 0, 'rejected': 0,
+                       'total_time': 0.0, 'max_time': 0.0}
+        self._reset()
+
+    def _reset(self):
+        # Los hilos del executor no sobreviven a un fork: cada proceso crea el suyo
+        self._pid = os.getpid()
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='logos')
+        self._slots = threading.BoundedSemaphore(self.queue_limit)
+        self._in_flight = 0
+
+    def count(self, name, amount=1):
+        with self._lock:
+            self._stats[name] += amount
+
+    def submit(self, conn, user_id, path, filename):
+        """Mark the user's logo as pending (committing on conn) and queue the upload at path"""
+        if self._pid != os.getpid():
+            self._reset()
+        if not self._slots.acquire(blocking=False):
+            self.count('rejected')
+            os.unlink(path)
+            raise LogoPipelineSaturated()
+        job = secrets.token_hex(8)
+        try:
+            set_logo_job(conn, user_id, job, 'pending')
+            conn.commit()
+            with self._lock:
+                self._in_flight += 1
+            self._executor.submit(self._process, user_id, job, path, filename)
+        except BaseException:
+            self._slots.release()
+            os.unlink(path)
+            raise
+        self.count('submitted')
+        return job
+
+    def _process(self, user_id, job, path, filename):
+        started = time.perf_counter()
+        try:
+            try:
+                variants = render_variants(path)
+            except Exception as e:
+                print(f"❌ Logo del usuario {user_id}: {e}")
+                variants = None
+            self._finish(user_id, job, variants, filename)
+        except Exception as e:
+            print(f"❌ No se pudo guardar el logo del usuario {user_id}: {e}")
+        finally:
+            os.unlink(path)
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self._in_flight -= 1
+                self._stats['total_time'] += elapsed
+                self._stats['max_time'] = max(self._stats['max_time'], elapsed)
+            self._slots.release()
+
+    def _finish(self, user_id, job, variants, filename):
+        conn = self.pool.acquire()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            row = conn.execute('SELECT logo_job FROM users WHERE id = ?', (user_id,)).fetchone()
+            if row is None or row[0] != job:
+                # Otra subida (o un borrado) reemplazó este trabajo mientras se procesaba
+                conn.rollback()
+                self.count('superseded')
+                return
+            if variants:
+                store_logo(conn, user_id, variants, filename)
+                set_logo_job(conn, user_id, None, None)
+            else:
+                set_logo_job(conn, user_id, None, 'failed')
+            conn.commit()
+        finally:
+            self.pool.release(conn)
+        self.count('completed' if variants else 'failed')
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['in_flight'] = self._in_flight
+        done = stats['completed'] + stats['failed'] + stats['superseded']
+        stats['avg_ms'] = stats.pop('total_time') / done * 1000 if done else 0.0
+        stats['max_ms'] = stats.pop('max_time') * 1000
+        stats['workers'] = self.workers
+        stats['queue_limit'] = self.queue_limit
+        return stats
@@ -0,0 +1,133 @@
+"""
+Importación masiva de transacciones desde CSV o NDJSON. El archivo se lee como stream,
+las filas válidas se insertan con executemany en bloques dentro de una sola transacción
+y los rollups se actualizan una vez por día al final, no por fila.
+"""
+
+import calendar
+import csv
+import io
+import json
+
+from rollups import apply_delta
+
+IMPORT_CHUNK_SIZE = 1000
+IMPORT_MAX_ERRORS = 1000  # errores reportados en la respuesta (el conteo total no se limita)
+CSV_FIELDS = ('year', 'month', 'day', 'amount', 'description')
+
+
+def parse_transaction(data):
+    """Validate one transaction payload; returns (year, month, day, amount, description)"""
+    try:
+        year = int(data.get('year'))
+        month = int(data.get('month'))
+        day = int(data.get('day'))
+        amount = float(data.get('amount', 0))
+    except (TypeError, ValueError):
+        raise ValueError('Datos inválidos. Verifica los valores ingresados.')
+    description = (data.get('description') or '').strip()
+
+    # Años fuera de 1..9999 no tienen número de día (rollups.day_number) y fallarían recién al escribir
+    if year < 1 or year > 9999 or month < 1 or month > 12 or day < 1 or day > calendar.monthrange(year, month)[1]:
+        raise ValueError('Fecha inválida')
+    if amount <= 0:
+        raise ValueError('El monto debe ser mayor a 0')
+    return year, month, day, amount, description
+
+
+def iter_csv(stream):
+    reader = csv.DictReader(stream)
+    # Archivos sin encabezado: se asume el orden year,month,day,amount,description
+    if reader.fieldnames and 'amount' not in [f.strip().lower() for f in reader.fieldnames]:
+        first = reader.fieldnames
+        reader = csv.DictReader(stream, fieldnames=CSV_FIELDS)
+        yield 1, dict(zip(CSV_FIELDS, first))
+    else:
+        reader.fieldnames = [f.strip().lower() for f in reader.fieldnames or []]
+    for line_number, row in enumerate(reader, start=2):
+        yield line_number, row
+
+
+def iter_ndjson(stream):
+    for line_number, line in enumerate(stream, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            yield line_number, None
+            continue
+        yield line_number, row if isinstance(row, dict) else None
+
+
+def detect_format(content_type, filename):
+    name = (filename or '').lower()
+    if 'json' in (content_type or '') or name.endswith(('.ndjson', '.jsonl', '.json')):
+        return 'ndjson'
+    return 'csv'
+
+
+def import_transactions(conn, user_id, binary_stream, fmt, strict=False):
+    """Import rows from a binary stream; returns a summary dict with per-row errors"""
+    text = io.TextIOWrapper(binary_stream, encoding='utf-8-sig', newline='')
+    rows = iter_ndjson(text) if fmt == 'ndjson' else iter_csv(text)
+
+    imported = 0
+    failed = 0
+    errors = []
+    deltas = {}
+    chunk = []
+
+    def flush():
+        conn.executemany('''
+            INSERT INTO transactions (user_id, year, month, day, amount, description)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', chunk)
+        chunk.clear()
+
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        for line_number, row in rows:
+            try:
+                if row is None:
+                    raise ValueError('JSON inválido')
+                year, month, day, amount, description = parse_transaction(row)
+            except ValueError as e:
+                failed += 1
+                if len(errors) < IMPORT_MAX_ERRORS:
+                    errors.append({'row': line_number, 'error': str(e)})
+                continue
+
+            chunk.append((user_id, year, month, day, amount, description))
+            delta = deltas.setdefault((year, month, day), [0.0, 0])
+            delta[0] += amount
+            delta[1] += 1
+            imported += 1
+            if len(chunk) >= IMPORT_CHUNK_SIZE:
+                flush()
+        if chunk:
+            flush()
+
+        if strict and failed:
+            conn.rollback()
+            imported = 0
+            deltas.clear()  # nada cambió: ningún periodo que refrescar
+        else:
+            for (year, month, day), (amount, count) in deltas.items():
+                apply_delta(conn, user_id, year, month, day, amount, count)
+            conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        text.detach()
+
+    return {
+        'success': not (strict and failed),
+        'imported': imported,
+        'failed': failed,
+        'errors': errors,
+        'errors_truncated': failed > len(errors),
+        'periods': sorted({(year, month) for year, month, _ in deltas}),
+    }
@@ -0,0 +1,86 @@
+"""
+Almacenamiento de logos de usuario como BLOBs direccionados por contenido.
+El hash forma parte de la URL, así que cada versión del logo se puede cachear para siempre.
+"""
+
+import base64
+import hashlib
+import re
+
+DEFAULT_VARIANT = '1x.png'
+LOGO_VARIANT = re.compile(r'^[123]x\.(png|webp)$')  # nombres de variantes que genera imaging.py
+
+
+def create_logo_tables(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS user_logos (
+            user_id INTEGER NOT NULL,
+            variant TEXT NOT NULL,
+            mime TEXT NOT NULL,
+            data BLOB NOT NULL,
+            PRIMARY KEY (user_id, variant),
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+    ''')
+
+
+def store_logo(conn, user_id, variants, filename=None):
+    """Replace the user's logo with {variant: (mime, bytes)}; returns the new hash"""
+    digest = hashlib.sha256()
+    for variant in sorted(variants):
+        digest.update(variants[variant][1])
+    logo_hash = digest.hexdigest()[:16]
+    conn.execute('DELETE FROM user_logos WHERE user_id = ?', (user_id,))
+    conn.executemany(
+        'INSERT INTO user_logos (user_id, variant, mime, data) VALUES (?, ?, ?, ?)',
+        [(user_id, variant, mime, data) for variant, (mime, data) in variants.items()]
+    )
+    conn.execute(
+        'UPDATE users SET logo_filename = ?, logo_hash = ?, logo_data = NULL WHERE id = ?',
+        (filename, logo_hash, user_id)
+    )
+    return logo_hash
+
+
+def remove_logo(conn, user_id):
+    conn.execute('DELETE FROM user_logos WHERE user_id = ?', (user_id,))
+    conn.execute(
+        'UPDATE users SET logo_filename = NULL, logo_hash = NULL, logo_data = NULL WHERE id = ?',
+        (user_id,)
+    )
+
+
+def load_logo(conn, user_id, logo_hash, variant=DEFAULT_VARIANT):
+    """Return (mime, bytes) if logo_hash is still the user's current logo"""
+    # Los logos anteriores a las variantes solo tienen la 1x PNG: se sirve esa
+    return conn.execute('''
+        SELECT l.mime, l.data
+        FROM user_logos l JOIN users u ON u.id = l.user_id
+        WHERE l.user_id = ? AND l.variant IN (?, ?) AND u.logo_hash = ?
+        ORDER BY l.variant = ? DESC
+        LIMIT 1
+    ''', (user_id, variant, DEFAULT_VARIANT, logo_hash, variant)).fetchone()
+
+
+def decode_data_uri(value):
+    """Split a 'data:<mime>;base64,<payload>' string into (mime, bytes)"""
+    header, _, payload = value.partition(',')
+    if not header.startswith('data:') or ';base64' not in header:
+        raise ValueError('not a base64 data URI')
+    return header[5:].split(';', 1)[0] or 'image/png', base64.b64decode(payload)
+
+
+def migrate_inline_logos(conn):
+    """Move logos stored as base64 data URIs in users.logo_data into user_logos"""
+    rows = conn.execute(
+        'SELECT id, logo_filename, logo_data FROM users WHERE logo_data IS NOT NULL'
+    ).fetchall()
+    for user_id, filename, logo_data in rows:
+        try:
+            mime, data = decode_data_uri(logo_data)
+        except ValueError:
+            print(f"Logo inválido del usuario {user_id}, se descarta")
+            remove_logo(conn, user_id)
+            continue
+        store_logo(conn, user_id, {DEFAULT_VARIANT: (mime, data)}, filename)
+    return len(rows)
@@ -0,0 +1,222 @@
+"""
+Migraciones versionadas del esquema. La versión aplicada se guarda en
+PRAGMA user_version y cada migración corre en su propia transacción.
+"""
+
+import re
+import sqlite3
+
+from logos import create_logo_tables, migrate_inline_logos
+from rollups import DAY_NUMBER_SQL, create_rollup_tables, rebuild_rollups
+from sessions import create_session_table
+from sharding import create_shard_tables
+from versions import bump_all_month_versions, create_month_versions_table
+
+
+def _create_base_tables(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE NOT NULL,
+            email TEXT UNIQUE NOT NULL,
+            password_hash TEXT NOT NULL,
+            is_active BOOLEAN DEFAULT 1,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            last_login TIMESTAMP,
+            failed_login_attempts INTEGER DEFAULT 0,
+            locked_until TIMESTAMP,
+            logo_filename TEXT,
+            logo_data TEXT
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS transactions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            year INTEGER NOT NULL,
+            month INTEGER NOT NULL,
+            day INTEGER NOT NULL,
+            amount REAL NOT NULL,
+            description TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+    ''')
+    # Tabla de sesiones activas (opcional, para mayor seguridad)
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS user_sessions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            session_token TEXT UNIQUE NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            expires_at TIMESTAMP NOT NULL,
+            ip_address TEXT,
+            user_agent TEXT,
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+    ''')
+
+
+def _add_transaction_indexes(conn):
+    # Cubre los filtros user_id + year/month y las columnas agregadas (day, amount)
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_transactions_user_period
+        ON transactions (user_id, year, month, day, id, amount)
+    ''')
+
+
+def _add_rollup_tables(conn):
+    create_rollup_tables(conn)
+    rebuild_rollups(conn)
+
+
+def _move_logos_to_blobs(conn):
+    conn.execute('ALTER TABLE users ADD COLUMN logo_hash TEXT')
+    create_logo_tables(conn)
+    migrate_inline_logos(conn)
+
+
+def _server_side_sessions(conn):
+    # La tabla original nunca se escribió (las sesiones vivían en la cookie firmada), así que
+    # se reemplaza sin copiar filas: sin user_id obligatorio y con los datos de la sesión
+    conn.execute('DROP TABLE IF EXISTS user_sessions')
+    create_session_table(conn)
+
+
+def _add_month_versions(conn):
+    # Sin filas iniciales: un mes sin registro tiene versión 0 hasta su próxima escritura
+    create_month_versions_table(conn)
+
+
+def _add_day_numbers(conn):
+    # Las bases creadas desde esta versión ya tienen la columna (create_rollup_tables)
+    columns = [row[1] for row in conn.execute('PRAGMA table_info(daily_totals)')]
+    if 'day_number' not in columns:
+        conn.execute('ALTER TABLE daily_totals ADD COLUMN day_number INTEGER')
+    conn.execute(f'UPDATE daily_totals SET day_number = {DAY_NUMBER_SQL} WHERE day_number IS NULL')
+    # Cubre los rangos de fechas de analytics.py sin leer la tabla
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_daily_totals_user_day
+        ON daily_totals (user_id, day_number, total, tx_count)
+    ''')
+
+
+def _add_shard_map(conn):
+    # Vacío: sin buckets asignados todos los usuarios siguen en esta base
+    create_shard_tables(conn)
+
+
+def _add_logo_jobs(conn):
+    # Logo en proceso (imaging.py): id del trabajo vigente y estado 'pending' o 'failed'
+    conn.execute('ALTER TABLE users ADD COLUMN logo_job TEXT')
+    conn.execute('ALTER TABLE users ADD COLUMN logo_status TEXT')
+
+
+# (versión, descripción, función). Nunca reordenar ni editar una migración ya publicada:
+# los cambios nuevos se agregan al final con la siguiente versión.
+MIGRATIONS = [
+    (1, 'base tables', _create_base_tables),
+    (2, 'transactions covering index', _add_transaction_indexes),
+    (3, 'daily/monthly rollup tables', _add_rollup_tables),
+    (4, 'logos as content-addressed blobs', _move_logos_to_blobs),
+    (5, 'server-side sessions', _server_side_sessions),
+    (6, 'per-month data versions', _add_month_versions),
+    (7, 'daily_totals day numbers', _add_day_numbers),
+    (8, 'shard map', _add_shard_map),
+    (9, 'background logo jobs', _add_logo_jobs),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def get_schema_version(conn):
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+
+def migrate(conn):
+    """Apply every pending migration, returning the list of versions applied"""
+    applied = []
+    current = get_schema_version(conn)
+    for version, description, upgrade in MIGRATIONS:
+        if version <= current:
+            continue
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            upgrade(conn)
+            conn.execute(f'PRAGMA user_version = {version}')
+            conn.commit()
+        except sqlite3.Error:
+            conn.rollback()
+            raise
+        print(f"Migration {version} applied: {description}")
+        applied.append(version)
+    return applied
+
+
+def import_legacy_data(conn):
+    """Copy rows from the old single-user tables into transactions, once"""
+    legacy_tables = {
+        'ingresos': "'Migrated automatically'",
+        'transacciones': 'descripcion',
+    }
+    for table, description in legacy_tables.items():
+        exists = conn.execute(
+            "SELECT name FROM sqlite_master WHERE type='table' AND name=?", (table,)
+        ).fetchone()
+        if not exists:
+            continue
+        # Sin usuarios los datos se conservan en la tabla vieja hasta que exista uno
+        first_user = conn.execute('SELECT id FROM users ORDER BY created_at ASC LIMIT 1').fetchone()
+        if not first_user:
+            continue
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            conn.execute(f'''
+                INSERT INTO transactions (user_id, year, month, day, amount, description, created_at)
+                SELECT ?, año, mes, dia, monto, {description}, fecha_registro
+                FROM {table}
+                WHERE monto > 0
+            ''', (first_user[0],))
+            # Renombrar la tabla evita volver a importar (y duplicar) en el próximo arranque
+            conn.execute(f'ALTER TABLE {table} RENAME TO {table}_migrated')
+            rebuild_rollups(conn, first_user[0])
+            bump_all_month_versions(conn, first_user[0])
+            conn.commit()
+            print(f"Data migrated successfully from '{table}' to 'transactions'")
+        except sqlite3.Error as e:
+            conn.rollback()
+            print(f"Migration error: {e}")
+
+
+# Consultas calientes de las rutas que nunca deberían recorrer toda la tabla
+HOT_QUERIES = {
+    'dashboard': ('''SELECT year, month, total, tx_count FROM monthly_totals WHERE user_id = ?
+                     ORDER BY year DESC, month DESC''', (1,)),
+    'month_transactions': ('''SELECT id, day, amount, COALESCE(NULLIF(description, ''), ?), created_at
+                              FROM transactions WHERE user_id = ? AND year = ? AND month = ?
+                              ORDER BY day, id''', ('', 1, 2024, 1)),
+    'view_reports_count': ('SELECT COUNT(*) FROM monthly_totals WHERE user_id = ?', (1,)),
+    'view_reports': ('''SELECT year, month, total, tx_count, active_days FROM monthly_totals
+                        WHERE user_id = ? ORDER BY year DESC, month DESC LIMIT ? OFFSET ?''', (1, 10, 0)),
+    'view_reports_cursor': ('''SELECT year, month, total, tx_count, active_days FROM monthly_totals
+                               WHERE user_id = ? AND (year, month) < (?, ?)
+                               ORDER BY year DESC, month DESC LIMIT ?''', (1, 2024, 1, 11)),
+    'analytics_range': ('''SELECT day_number, total, tx_count FROM daily_totals
+                           WHERE user_id = ? AND day_number BETWEEN ? AND ?''', (1, 738000, 739000)),
+    'export_range': ('''SELECT year, month, day, amount, description, created_at FROM transactions
+                        WHERE user_id = ? AND (year, month) >= (?, ?) AND (year, month) <= (?, ?)
+                        ORDER BY year, month, day, id''', (1, 2020, 1, 2024, 12)),
+}
+
+_FULL_SCAN = re.compile(r'^SCAN (\w+)(?! USING)')
+
+
+def check_query_plans(conn, queries=None):
+    """Run EXPLAIN QUERY PLAN on the hot queries and return those doing a full table scan"""
+    problems = {}
+    for name, (sql, params) in (queries or HOT_QUERIES).items():
+        plan = [row[3] for row in conn.execute(f'EXPLAIN QUERY PLAN {sql}', params).fetchall()]
+        scans = [detail for detail in plan if _FULL_SCAN.match(detail)]
+        if scans:
+            problems[name] = plan
+    return problems
@@ -0,0 +1,150 @@
+"""
+Paginación del listado de reportes: por número de página (OFFSET) para las primeras
+páginas y por cursor (keyset sobre year, month) para navegar historiales largos.
+"""
+
+import base64
+import json
+
+KEYSET_PAGE_LIMIT = 20  # a partir de esta página los enlaces pasan a usar cursor
+REPORTS_COUNT_CAP = 1000  # el total se cuenta hasta este tope y se muestra como aproximado
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(key, direction):
+    """Opaque token for the page after ('n') or before ('p') the given (year, month)"""
+    payload = json.dumps({'k': list(key) if key else None, 'd': direction}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        key = tuple(int(v) for v in payload['k']) if payload['k'] is not None else None
+        direction = payload['d']
+    except (ValueError, KeyError, TypeError):
+        raise InvalidCursor(token)
+    if direction not in ('n', 'p') or (key is not None and len(key) != 2):
+        raise InvalidCursor(token)
+    return key, direction
+
+
+class Pagination:
+    """Page-number pagination over an already fetched page of items"""
+
+    mode = 'page'
+
+    def __init__(self, page, per_page, total, items, total_is_estimate=False):
+        self.page = page
+        self.per_page = per_page
+        self.total = total
+        self.total_is_estimate = total_is_estimate
+        self.items = items
+        self.pages = (total + per_page - 1) // per_page  # Ceiling division
+        self.has_prev = page > 1
+        self.has_next = page < self.pages
+        self.prev_num = page - 1 if self.has_prev else None
+        self.next_num = page + 1 if self.has_next else None
+        # Más allá del límite se sigue con cursores desde el último elemento de esta página
+        self.next_cursor = None
+        self.prev_cursor = None
+        self.last_cursor = encode_cursor(None, 'p') if self.pages > KEYSET_PAGE_LIMIT else None
+        if self.has_next and self.next_num > KEYSET_PAGE_LIMIT and items:
+            self.next_cursor = encode_cursor((items[-1]['year'], items[-1]['month']), 'n')
+
+    def iter_pages(self, left_edge=2, left_current=2, right_current=3, right_edge=2):
+        """Generate page numbers for pagination display (None marks a gap)"""
+        last = min(self.pages, KEYSET_PAGE_LIMIT)
+        windows = [
+            range(1, min(left_edge, last) + 1),
+            range(max(self.page - left_current, 1), min(self.page + right_current, last + 1)),
+        ]
+        if self.pages <= KEYSET_PAGE_LIMIT:
+            windows.append(range(max(last - right_edge + 1, 1), last + 1))
+        previous = 0
+        for num in sorted(set(n for window in windows for n in window)):
+            if num > previous + 1:
+                yield None
+            yield num
+            previous = num
+
+
+class KeysetPagination:
+    """Cursor pagination: items come from a seek query, not from an OFFSET"""
+
+    mode = 'cursor'
+    page = None
+    pages = None
+
+    def __init__(self, per_page, total, items, next_key, prev_key, total_is_estimate=False):
+        self.per_page = per_page
+        self.total = total
+        self.total_is_estimate = total_is_estimate
+        self.items = items
+        self.has_next = next_key is not None
+        self.has_prev = prev_key is not None
+        self.next_cursor = encode_cursor(next_key, 'n') if self.has_next else None
+        self.prev_cursor = encode_cursor(prev_key, 'p') if self.has_prev else None
+        self.last_cursor = encode_cursor(None, 'p')
+
+    def iter_pages(self, **kwargs):
+        return iter(())
+
+
+def count_reports(conn, user_id):
+    """Number of months with data, counted up to REPORTS_COUNT_CAP + 1"""
+    return conn.execute('''
+        SELECT COUNT(*) FROM (SELECT 1 FROM monthly_totals WHERE user_id = ? LIMIT ?)
+    ''', (user_id, REPORTS_COUNT_CAP + 1)).fetchone()[0]
+
+
+def fetch_reports_page(conn, user_id, per_page, page=None, cursor=None, total=None):
+    """Return one page of monthly_totals rows as a Pagination or KeysetPagination"""
+    if total is None:
+        total = count_reports(conn, user_id)
+    total_is_estimate = total > REPORTS_COUNT_CAP
+    total = min(total, REPORTS_COUNT_CAP)
+    columns = 'year, month, total, tx_count as total_transactions, active_days as dias_registrados'
+
+    if cursor is None:
+        rows = conn.execute(f'''
+            SELECT {columns}
+            FROM monthly_totals
+            WHERE user_id = ?
+            ORDER BY year DESC, month DESC
+            LIMIT ? OFFSET ?
+        ''', (user_id, per_page, (page - 1) * per_page)).fetchall()
+        return Pagination(page, per_page, total, rows, total_is_estimate)
+
+    key, direction = decode_cursor(cursor)
+    if direction == 'n':
+        rows = conn.execute(f'''
+            SELECT {columns}
+            FROM monthly_totals
+            WHERE user_id = ? AND (year, month) < (?, ?)
+            ORDER BY year DESC, month DESC
+            LIMIT ?
+        ''', (user_id, key[0], key[1], per_page + 1)).fetchall()
+        has_more = len(rows) > per_page
+        rows = rows[:per_page]
+        has_prev = True
+    else:
+        # Hacia atrás se lee en orden ascendente y se invierte; sin clave = última página
+        bound = 'AND (year, month) > (?, ?)' if key else ''
+        rows = conn.execute(f'''
+            SELECT {columns}
+            FROM monthly_totals
+            WHERE user_id = ? {bound}
+            ORDER BY year ASC, month ASC
+            LIMIT ?
+        ''', (user_id,) + (tuple(key) if key else ()) + (per_page + 1,)).fetchall()
+        has_prev = len(rows) > per_page
+        rows = rows[:per_page][::-1]
+        has_more = key is not None
+    next_key = (rows[-1]['year'], rows[-1]['month']) if rows and has_more else None
+    prev_key = (rows[0]['year'], rows[0]['month']) if rows and has_prev else None
+    return KeysetPagination(per_page, total, rows, next_key, prev_key, total_is_estimate)
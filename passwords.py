@@ -0,0 +1,118 @@
+"""
+Hashing de contraseñas con bcrypt en un pool de hilos acotado. bcrypt libera el GIL, así que
+los hashes corren en paralelo con el resto de las rutas, pero el hilo del request igual queda
+esperando su hash: el pool no libera hilos de request, solo limita cuántos bcrypt corren a la
+vez (HASH_WORKERS) y cuántos requests pueden estar esperando uno (HASH_QUEUE_LIMIT). Pasado ese
+límite se rechaza enseguida en lugar de sumar otro hilo bloqueado detrás de la cola.
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+import bcrypt
+
+BCRYPT_ROUNDS = int(os.environ.get('BCRYPT_ROUNDS', 12))
+HASH_WORKERS = int(os.environ.get('HASH_WORKERS', os.cpu_count() or 2))
+HASH_QUEUE_LIMIT = int(os.environ.get('HASH_QUEUE_LIMIT', HASH_WORKERS * 4))  # requests esperando un hash (en curso + en cola)
+HASH_TIMEOUT = float(os.environ.get('HASH_TIMEOUT', 10))  # segundos
+
+
+class HashPoolSaturated(Exception):
+    """Raised when too many hash operations are already queued"""
+
+
+class HashTimeout(Exception):
+    """Raised when a queued hash operation does not finish within the timeout"""
+
+
+def hash_rounds(hashed):
+    """Cost factor encoded in a bcrypt hash ('$2b$12$...' -> 12)"""
+    try:
+        return int(hashed.split('$')[2])
+    except (IndexError, ValueError):
+        return 0
+
+
+class PasswordHasher:
+    """Runs bcrypt hash/verify on a bounded worker pool and records timings; the caller still waits for the result"""
+
+    def __init__(self, workers=HASH_WORKERS, queue_limit=HASH_QUEUE_LIMIT, rounds=BCRYPT_ROUNDS,
+                 timeout=HASH_TIMEOUT):
+        self.workers = workers
+        self.queue_limit = queue_limit
+        self.rounds = rounds
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._stats = {'hash': [0, 0.0, 0.0], 'verify': [0, 0.0, 0.0]}  # count, total, max (s)
+        self._rejected = 0
+        self._timeouts = 0
+        self._reset()
+
+    def _reset(self):
+        # Los hilos del executor no sobreviven a un fork: cada proceso crea el suyo
+        self._pid = os.getpid()
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='bcrypt')
+        self._slots = threading.BoundedSemaphore(self.queue_limit)
+
+    def _record(self, operation, elapsed):
+        with self._lock:
+            stats = self._stats[operation]
+            stats[0] += 1
+            stats[1] += elapsed
+            stats[2] = max(stats[2], elapsed)
+
+    def _timed(self, operation, fn, *args):
+        started = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            self._record(operation, time.perf_counter() - started)
+
+    def _run(self, operation, fn, *args):
+        if self._pid != os.getpid():
+            self._reset()
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._rejected += 1
+            raise HashPoolSaturated()
+        try:
+            future = self._executor.submit(self._timed, operation, fn, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout:
+            # Si todavía no empezó no ocupa un hilo: nadie va a esperar su resultado
+            future.cancel()
+            with self._lock:
+                self._timeouts += 1
+            raise HashTimeout()
+
+    def hash(self, password):
+        salt = bcrypt.gensalt(rounds=self.rounds)
+        return self._run('hash', bcrypt.hashpw, password.encode('utf-8'), salt).decode('utf-8')
+
+    def verify(self, password, hashed):
+        return self._run('verify', bcrypt.checkpw, password.encode('utf-8'), hashed.encode('utf-8'))
+
+    def needs_rehash(self, hashed):
+        return hash_rounds(hashed) < self.rounds
+
+    def stats(self):
+        with self._lock:
+            stats = {
+                operation: {
+                    'count': count,
+                    'avg_ms': total / count * 1000 if count else 0.0,
+                    'max_ms': longest * 1000,
+                }
+                for operation, (count, total, longest) in self._stats.items()
+            }
+            stats['rejected'] = self._rejected
+            stats['timeouts'] = self._timeouts
+        stats.update(workers=self.workers, queue_limit=self.queue_limit, rounds=self.rounds)
+        return stats
@@ -0,0 +1,277 @@
+"""
+Instrumentación opcional por request (PROFILING=1): tiempo y filas de cada consulta SQL,
+tiempo de render de plantillas y de bcrypt, cabecera Server-Timing, histogramas por endpoint
+en formato Prometheus y, con PROFILE_SAMPLING=1, un muestreador de stacks que guarda en
+formato "folded" (flamegraph.pl, speedscope) los requests más lentos que PROFILE_SLOW_MS.
+
+Las métricas son por proceso: con varios workers cada uno expone las suyas.
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+
+from flask import before_render_template, request, template_rendered
+
+PROFILING_ENABLED = os.environ.get('PROFILING', '').lower() in ('1', 'true', 'yes')
+PROFILE_SAMPLING = os.environ.get('PROFILE_SAMPLING', '').lower() in ('1', 'true', 'yes')
+PROFILE_SLOW_MS = float(os.environ.get('PROFILE_SLOW_MS', 500))
+PROFILE_INTERVAL = float(os.environ.get('PROFILE_INTERVAL', 0.005))  # segundos entre muestras
+PROFILE_DIR = os.environ.get('PROFILE_DIR', 'profiles')
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN')  # /_metrics y /_stats exigen "Bearer <token>"; sin él, 404
+
+HISTOGRAM_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+METRIC_PREFIX = 'ingresos'
+
+_local = threading.local()
+
+
+class QueryRecord:
+    """Time spent executing and fetching one statement, and the rows it returned/affected"""
+
+    __slots__ = ('sql', 'seconds', 'rows')
+
+    def __init__(self, sql):
+        self.sql = sql
+        self.seconds = 0.0
+        self.rows = 0
+
+
+class RequestProfile:
+    """Everything measured during one request"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = []
+        self.spans = Counter()  # render, bcrypt, ... -> segundos
+
+    @property
+    def db_seconds(self):
+        return sum(query.seconds for query in self.queries)
+
+    @property
+    def db_rows(self):
+        return sum(query.rows for query in self.queries)
+
+
+def current_profile():
+    return getattr(_local, 'profile', None)
+
+
+def record_query(sql):
+    """Connection profiler hook: a new QueryRecord for the current request, if any"""
+    profile = current_profile()
+    if profile is None:
+        return None
+    record = QueryRecord(sql)
+    profile.queries.append(record)
+    return record
+
+
+@contextmanager
+def profile_span(name):
+    """Add the time spent in the block to the current request under `name` (no-op if off)"""
+    profile = current_profile()
+    if profile is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.spans[name] += time.perf_counter() - started
+
+
+class Histogram:
+    """Cumulative-bucket histogram per label value, Prometheus style"""
+
+    def __init__(self, name, help_text, buckets=HISTOGRAM_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        self._series = {}  # label -> [conteos por bucket..., +Inf, suma]
+
+    def observe(self, label, value):
+        series = self._series.get(label)
+        if series is None:
+            series = self._series[label] = [0] * (len(self.buckets) + 1) + [0.0]
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[index] += 1
+        series[-2] += 1
+        series[-1] += value
+
+    def render(self, label_name):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        for label, series in sorted(self._series.items()):
+            for bound, count in zip(self.buckets, series):
+                lines.append(f'{self.name}_bucket{{{label_name}="{label}",le="{bound}"}} {count}')
+            lines.append(f'{self.name}_bucket{{{label_name}="{label}",le="+Inf"}} {series[-2]}')
+            lines.append(f'{self.name}_sum{{{label_name}="{label}"}} {series[-1]}')
+            lines.append(f'{self.name}_count{{{label_name}="{label}"}} {series[-2]}')
+        return lines
+
+
+class Metrics:
+    """Per-endpoint request, SQL and render histograms plus query/row counters"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.request_seconds = Histogram(f'{METRIC_PREFIX}_request_duration_seconds',
+                                         'Request duration by endpoint')
+        self.db_seconds = Histogram(f'{METRIC_PREFIX}_db_duration_seconds',
+                                    'Time spent in SQL (execute + fetch) per request')
+        self.render_seconds = Histogram(f'{METRIC_PREFIX}_render_duration_seconds',
+                                        'Time spent rendering templates per request')
+        self.queries = Counter()
+        self.rows = Counter()
+        self.slow_requests = Counter()
+
+    def observe(self, endpoint, elapsed, profile, slow=False):
+        with self._lock:
+            self.request_seconds.observe(endpoint, elapsed)
+            self.db_seconds.observe(endpoint, profile.db_seconds)
+            self.render_seconds.observe(endpoint, profile.spans.get('render', 0.0))
+            self.queries[endpoint] += len(profile.queries)
+            self.rows[endpoint] += profile.db_rows
+            if slow:
+                self.slow_requests[endpoint] += 1
+
+    def render(self, gauges=None):
+        """Prometheus text exposition format (version 0.0.4)"""
+        with self._lock:
+            lines = []
+            for histogram in (self.request_seconds, self.db_seconds, self.render_seconds):
+                lines.extend(histogram.render('endpoint'))
+            for name, counter, help_text in (
+                ('db_queries_total', self.queries, 'SQL statements executed'),
+                ('db_rows_total', self.rows, 'Rows fetched or affected'),
+                ('slow_requests_total', self.slow_requests, f'Requests slower than {PROFILE_SLOW_MS} ms'),
+            ):
+                lines.append(f'# HELP {METRIC_PREFIX}_{name} {help_text}')
+                lines.append(f'# TYPE {METRIC_PREFIX}_{name} counter')
+                for endpoint, value in sorted(counter.items()):
+                    lines.append(f'{METRIC_PREFIX}_{name}{{endpoint="{endpoint}"}} {value}')
+        for name, value in sorted((gauges or {}).items()):
+            lines.append(f'# TYPE {METRIC_PREFIX}_{name} gauge')
+            lines.append(f'{METRIC_PREFIX}_{name} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+class StackSampler:
+    """Background thread that samples the stacks of watched threads every `interval` seconds"""
+
+    def __init__(self, interval=PROFILE_INTERVAL):
+        self.interval = interval
+        self._watched = {}  # thread id -> Counter de stacks "a;b;c"
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    def _ensure_running(self):
+        # El hilo no sobrevive a un fork: cada worker arranca el suyo al primer request
+        if self._thread is None or self._pid != os.getpid() or not self._thread.is_alive():
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+            self._thread.start()
+
+    def watch(self, thread_id):
+        with self._lock:
+            self._watched[thread_id] = Counter()
+            self._ensure_running()
+
+    def unwatch(self, thread_id):
+        with self._lock:
+            return self._watched.pop(thread_id, None) or Counter()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            frames = sys._current_frames()
+            with self._lock:
+                for thread_id, stacks in self._watched.items():
+                    frame = frames.get(thread_id)
+                    if frame is not None:
+                        stacks[_fold(frame)] += 1
+
+
+def _fold(frame):
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})')
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+
+def dump_stacks(stacks, endpoint, elapsed, directory=PROFILE_DIR):
+    """Write folded stacks ("frame;frame;frame count" per line); returns the file path"""
+    os.makedirs(directory, exist_ok=True)
+    stamp = datetime.now().strftime('%Y%m%d-%H%M%S-%f')
+    path = os.path.join(directory, f'{stamp}-{endpoint}-{elapsed * 1000:.0f}ms.folded')
+    with open(path, 'w') as f:
+        for stack, count in stacks.most_common():
+            f.write(f'{stack} {count}\n')
+    return path
+
+
+class Profiler:
+    """Wires the request hooks, the connection profiler and template timing into a Flask app"""
+
+    def __init__(self, app, connection_class, sampling=PROFILE_SAMPLING, slow_ms=PROFILE_SLOW_MS):
+        self.metrics = Metrics()
+        self.sampler = StackSampler() if sampling else None
+        self.slow_seconds = slow_ms / 1000
+        connection_class.profiler = staticmethod(record_query)
+
+        app.before_request(self._start)
+        app.after_request(self._finish)
+        app.teardown_request(self._clear)
+        before_render_template.connect(self._render_started, app)
+        template_rendered.connect(self._render_finished, app)
+
+    def _start(self):
+        _local.profile = RequestProfile()
+        _local.render_started = None
+        if self.sampler is not None:
+            self.sampler.watch(threading.get_ident())
+
+    def _render_started(self, sender, **extra):
+        _local.render_started = time.perf_counter()
+
+    def _render_finished(self, sender, **extra):
+        profile = current_profile()
+        started = getattr(_local, 'render_started', None)
+        if profile is not None and started is not None:
+            profile.spans['render'] += time.perf_counter() - started
+            _local.render_started = None
+
+    def _finish(self, response):
+        profile = current_profile()
+        if profile is None:
+            return response
+        elapsed = time.perf_counter() - profile.started
+        endpoint = request.endpoint or 'unknown'
+        slow = elapsed >= self.slow_seconds
+
+        timings = [f'db;dur={profile.db_seconds * 1000:.2f};desc="{len(profile.queries)} queries"']
+        timings.extend(f'{name};dur={seconds * 1000:.2f}' for name, seconds in sorted(profile.spans.items()))
+        timings.append(f'app;dur={elapsed * 1000:.2f}')
+        response.headers['Server-Timing'] = ', '.join(timings)
+
+        self.metrics.observe(endpoint, elapsed, profile, slow)
+        if self.sampler is not None:
+            stacks = self.sampler.unwatch(threading.get_ident())
+            if slow and stacks:
+                path = dump_stacks(stacks, endpoint, elapsed)
+                print(f"🐢 {endpoint} tardó {elapsed * 1000:.0f} ms, stacks en {path}")
+        return response
+
+    def _clear(self, exception=None):
+        if self.sampler is not None:
+            self.sampler.unwatch(threading.get_ident())
+        _local.profile = None
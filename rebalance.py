@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+Herramienta offline para repartir los datos de los usuarios entre shards (sharding.py).
+Se corre con la app detenida; los workers leen el mapa nuevo al volver a arrancar.
+
+    python rebalance.py status
+    python rebalance.py split main --into 4          # la base principal reparte sus buckets en 4 shards nuevos
+    python rebalance.py move shard01 shard05 --buckets 0-255
+    python rebalance.py move shard05 main            # de vuelta a la base principal
+    python rebalance.py prune                        # borra copias huérfanas de un movimiento interrumpido
+
+Mover buckets copia las filas de sus usuarios al destino, actualiza el mapa en la base
+principal y recién después las borra del origen. Si se interrumpe, repetir el mismo comando
+(o prune) deja todo consistente: las filas que cuentan son siempre las del shard del mapa.
+Las transacciones copiadas reciben ids nuevos del destino y las versiones de sus meses se
+incrementan para que ningún navegador reutilice páginas con los ids anteriores.
+"""
+
+import argparse
+import os
+import re
+import sys
+from collections import defaultdict
+
+from db import ConnectionPool
+from migrations import migrate
+from sharding import MAIN_SHARD, SHARD_BUCKETS, SHARD_DIR, SHARDED_TABLES, bucket_for, read_shard_map
+
+DATABASE = 'ingresos.db'
+_SHARD_NAME = re.compile(r'^[a-z][a-z0-9_]*$')  # también se usa en nombres de métricas
+
+
+class Layout:
+    """Main database plus the shards registered in it"""
+
+    def __init__(self, database):
+        self.database = os.path.abspath(database)
+        self.base_dir = os.path.dirname(self.database)
+        self.main = ConnectionPool(self.database).connect()
+        migrate(self.main)
+        self.reload()
+
+    def reload(self):
+        self.bucket_map, self.paths = read_shard_map(self.main)
+
+    def owner(self, bucket):
+        return self.bucket_map.get(bucket, MAIN_SHARD)
+
+    def names(self):
+        return [MAIN_SHARD] + sorted(self.paths)
+
+    def path(self, name):
+        if name == MAIN_SHARD:
+            return self.database
+        return os.path.join(self.base_dir, self.paths[name])
+
+    def connect(self, name):
+        # Las claves foráneas de transactions apuntan a users, que en los shards está vacía
+        return ConnectionPool(self.path(name), foreign_keys=False).connect()
+
+    def users(self, buckets=None):
+        """User ids of the directory, optionally only those in some buckets"""
+        ids = [row[0] for row in self.main.execute('SELECT id FROM users ORDER BY id')]
+        if buckets is None:
+            return ids
+        return [user_id for user_id in ids if bucket_for(user_id) in buckets]
+
+    def create_shard(self, name):
+        if not _SHARD_NAME.match(name) or name == MAIN_SHARD:
+            raise ValueError(f'Nombre de shard inválido: {name!r} (minúsculas, dígitos y _)')
+        path = os.path.join(SHARD_DIR, f'ingresos-{name}.db')
+        os.makedirs(os.path.join(self.base_dir, SHARD_DIR), exist_ok=True)
+        self.main.execute('INSERT INTO shards (name, path) VALUES (?, ?)', (name, path))
+        self.main.commit()
+        self.reload()
+        conn = self.connect(name)
+        try:
+            migrate(conn)
+        finally:
+            conn.close()
+        print(f"🧩 Shard {name} creado en {path}")
+
+    def next_shard_name(self):
+        number = 1
+        while f'shard{number:02d}' in self.paths:
+            number += 1
+        return f'shard{number:02d}'
+
+    def close(self):
+        self.main.close()
+
+
+def _fill_moving(conn, user_ids):
+    conn.execute('CREATE TEMP TABLE IF NOT EXISTS moving (user_id INTEGER PRIMARY KEY)')
+    conn.execute('DELETE FROM temp.moving')
+    conn.executemany('INSERT INTO temp.moving (user_id) VALUES (?)', ((user_id,) for user_id in user_ids))
+    conn.commit()
+
+
+def _columns(conn, table):
+    # Las transacciones reciben ids nuevos: el destino tiene su propia secuencia
+    return [row[1] for row in conn.execute(f'PRAGMA main.table_info({table})') if row[1] != 'id']
+
+
+def copy_users(layout, source, target, user_ids):
+    """Replace the target's rows of these users with a copy of the source's, in one transaction"""
+    conn = layout.connect(source)
+    try:
+        _fill_moving(conn, user_ids)
+        conn.execute('ATTACH DATABASE ? AS target', (layout.path(target),))
+        conn.execute('BEGIN IMMEDIATE')
+        for table in SHARDED_TABLES:
+            columns = ', '.join(_columns(conn, table))
+            order = 'ORDER BY id' if table == 'transactions' else ''
+            conn.execute(f'DELETE FROM target.{table} WHERE user_id IN (SELECT user_id FROM temp.moving)')
+            conn.execute(f'''
+                INSERT INTO target.{table} ({columns})
+                SELECT {columns} FROM main.{table}
+                WHERE user_id IN (SELECT user_id FROM temp.moving) {order}
+            ''')
+        conn.execute('''
+            UPDATE target.month_versions SET version = version + 1
+            WHERE user_id IN (SELECT user_id FROM temp.moving)
+        ''')
+        conn.commit()
+        conn.execute('DETACH DATABASE target')
+    finally:
+        conn.close()
+
+
+def delete_users(layout, name, user_ids):
+    """Delete every sharded row of these users from one database"""
+    conn = layout.connect(name)
+    try:
+        _fill_moving(conn, user_ids)
+        conn.execute('BEGIN IMMEDIATE')
+        for table in SHARDED_TABLES:
+            conn.execute(f'DELETE FROM main.{table} WHERE user_id IN (SELECT user_id FROM temp.moving)')
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def assign_buckets(layout, buckets, target):
+    if target == MAIN_SHARD:
+        layout.main.executemany('DELETE FROM shard_buckets WHERE bucket = ?', ((bucket,) for bucket in buckets))
+    else:
+        layout.main.executemany('INSERT OR REPLACE INTO shard_buckets (bucket, shard) VALUES (?, ?)',
+                                ((bucket, target) for bucket in buckets))
+    layout.main.commit()
+    layout.reload()
+
+
+def move_buckets(layout, buckets, target):
+    """Move some buckets (and their users' data) to target, whatever shard they are in now"""
+    by_source = defaultdict(set)
+    for bucket in buckets:
+        if layout.owner(bucket) != target:
+            by_source[layout.owner(bucket)].add(bucket)
+    for source, source_buckets in sorted(by_source.items()):
+        user_ids = layout.users(source_buckets)
+        copy_users(layout, source, target, user_ids)  # 1. el destino tiene una copia
+        assign_buckets(layout, source_buckets, target)  # 2. el mapa apunta al destino
+        delete_users(layout, source, user_ids)  # 3. el origen ya no tiene los datos
+        print(f"📦 {len(source_buckets)} buckets ({len(user_ids)} usuarios): {source} → {target}")
+
+
+def split_shard(layout, source, parts):
+    """Spread every bucket of a shard across `parts` new shards"""
+    buckets = [bucket for bucket in range(SHARD_BUCKETS) if layout.owner(bucket) == source]
+    if not buckets:
+        raise ValueError(f'El shard {source} no tiene buckets')
+    for index in range(parts):
+        name = layout.next_shard_name()
+        layout.create_shard(name)
+        move_buckets(layout, buckets[index * len(buckets) // parts:(index + 1) * len(buckets) // parts], name)
+
+
+def orphans(layout, name):
+    """Users with rows in a database that the map assigns to another shard"""
+    conn = layout.connect(name)
+    try:
+        user_ids = {row[0] for table in SHARDED_TABLES
+                    for row in conn.execute(f'SELECT DISTINCT user_id FROM {table}')}
+    finally:
+        conn.close()
+    return sorted(user_id for user_id in user_ids if layout.owner(bucket_for(user_id)) != name)
+
+
+def status(layout):
+    users_by_shard = defaultdict(int)
+    for user_id in layout.users():
+        users_by_shard[layout.owner(bucket_for(user_id))] += 1
+    buckets_by_shard = defaultdict(int)
+    for bucket in range(SHARD_BUCKETS):
+        buckets_by_shard[layout.owner(bucket)] += 1
+
+    print(f"{'shard':>10} {'buckets':>8} {'usuarios':>9} {'transacciones':>14} {'huérfanos':>10} {'MB':>8}  archivo")
+    for name in layout.names():
+        conn = layout.connect(name)
+        try:
+            count = conn.execute('SELECT COUNT(*) FROM transactions').fetchone()[0]
+        finally:
+            conn.close()
+        size = os.path.getsize(layout.path(name)) / 1024 / 1024
+        print(f"{name:>10} {buckets_by_shard[name]:>8} {users_by_shard[name]:>9} {count:>14} "
+              f"{len(orphans(layout, name)):>10} {size:>8.1f}  {os.path.relpath(layout.path(name))}")
+
+
+def parse_buckets(value):
+    """'0-255,300' -> {0, ..., 255, 300}"""
+    buckets = set()
+    for part in value.split(','):
+        low, _, high = part.partition('-')
+        low, high = int(low), int(high or low)
+        if not 0 <= low <= high < SHARD_BUCKETS:
+            raise argparse.ArgumentTypeError(f'Buckets fuera de rango 0-{SHARD_BUCKETS - 1}: {part}')
+        buckets.update(range(low, high + 1))
+    return buckets
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Reparto de usuarios entre shards (con la app detenida)')
+    parser.add_argument('--database', default=DATABASE, help=f'Base principal (default: {DATABASE})')
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('status', help='Buckets, usuarios y transacciones por shard')
+    split = commands.add_parser('split', help='Repartir los buckets de un shard en shards nuevos')
+    split.add_argument('shard')
+    split.add_argument('--into', type=int, default=2, help='Shards nuevos (default: 2)')
+    move = commands.add_parser('move', help='Mover buckets de un shard a otro (se crea si no existe)')
+    move.add_argument('source')
+    move.add_argument('target')
+    move.add_argument('--buckets', type=parse_buckets, help='Rango, p. ej. 0-255 (default: todos los del origen)')
+    commands.add_parser('prune', help='Borrar filas de usuarios que el mapa asigna a otro shard')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.database):
+        print(f"❌ No existe {args.database}")
+        sys.exit(1)
+    layout = Layout(args.database)
+    try:
+        for name in (getattr(args, 'shard', None), getattr(args, 'source', None)):
+            if name is not None and name not in layout.names():
+                raise ValueError(f'No existe el shard {name}')
+        if args.command == 'split':
+            split_shard(layout, args.shard, args.into)
+        elif args.command == 'move':
+            if args.target != MAIN_SHARD and args.target not in layout.paths:
+                layout.create_shard(args.target)
+            source_buckets = {bucket for bucket in range(SHARD_BUCKETS) if layout.owner(bucket) == args.source}
+            move_buckets(layout, source_buckets & args.buckets if args.buckets else source_buckets, args.target)
+        elif args.command == 'prune':
+            for name in layout.names():
+                user_ids = orphans(layout, name)
+                if user_ids:
+                    delete_users(layout, name, user_ids)
+                    print(f"🧹 {name}: filas de {len(user_ids)} usuarios huérfanos eliminadas")
+        status(layout)
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    finally:
+        layout.close()
+
+
+if __name__ == '__main__':
+    main()
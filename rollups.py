@@ -0,0 +1,151 @@
+"""
+Tablas de totales materializados (por día y por mes) que se mantienen en la misma
+transacción que cada escritura en transactions, para que el dashboard y los reportes
+lean O(meses) filas en lugar de agregar todo el historial.
+"""
+
+from datetime import date
+
+from versions import bump_month_version
+
+ROLLUP_TOLERANCE = 0.005  # diferencia aceptable por redondeo de floats
+
+# day_number es el ordinal de date.toordinal() (1 = 0001-01-01): una clave entera que ordena
+# y se puede acotar entre meses y años. Esta expresión SQL calcula lo mismo que day_number()
+DAY_NUMBER_SQL = "CAST(julianday(printf('%04d-%02d-01', year, month)) - 1721425.5 AS INTEGER) + day"
+
+
+def create_rollup_tables(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS daily_totals (
+            user_id INTEGER NOT NULL,
+            year INTEGER NOT NULL,
+            month INTEGER NOT NULL,
+            day INTEGER NOT NULL,
+            total REAL NOT NULL DEFAULT 0,
+            tx_count INTEGER NOT NULL DEFAULT 0,
+            day_number INTEGER,
+            PRIMARY KEY (user_id, year, month, day)
+        ) WITHOUT ROWID
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS monthly_totals (
+            user_id INTEGER NOT NULL,
+            year INTEGER NOT NULL,
+            month INTEGER NOT NULL,
+            total REAL NOT NULL DEFAULT 0,
+            tx_count INTEGER NOT NULL DEFAULT 0,
+            active_days INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (user_id, year, month)
+        ) WITHOUT ROWID
+    ''')
+
+
+def day_number(year, month, day):
+    """Ordinal day number of a date, as stored in daily_totals.day_number"""
+    return date(year, month, 1).toordinal() + day - 1
+
+
+def apply_delta(conn, user_id, year, month, day, amount, count):
+    """Add amount/count to the rollups of one day and bump the month's version; must run inside the write's transaction"""
+    key = (user_id, year, month, day)
+    conn.execute('''
+        INSERT INTO daily_totals (user_id, year, month, day, total, tx_count, day_number)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (user_id, year, month, day)
+        DO UPDATE SET total = total + excluded.total, tx_count = tx_count + excluded.tx_count
+    ''', key + (amount, count, day_number(year, month, day)))
+    day_count = conn.execute('''
+        SELECT tx_count FROM daily_totals
+        WHERE user_id = ? AND year = ? AND month = ? AND day = ?
+    ''', key).fetchone()[0]
+
+    # Un día entra o sale de active_days cuando su contador pasa por cero
+    day_delta = 0
+    if day_count <= 0:
+        conn.execute('''
+            DELETE FROM daily_totals
+            WHERE user_id = ? AND year = ? AND month = ? AND day = ?
+        ''', key)
+        day_delta = -1 if count < 0 else 0
+    elif count > 0 and day_count == count:
+        day_delta = 1
+
+    conn.execute('''
+        INSERT INTO monthly_totals (user_id, year, month, total, tx_count, active_days)
+        VALUES (?, ?, ?, ?, ?, ?)
+        ON CONFLICT (user_id, year, month)
+        DO UPDATE SET total = total + excluded.total,
+                      tx_count = tx_count + excluded.tx_count,
+                      active_days = active_days + excluded.active_days
+    ''', (user_id, year, month, amount, count, day_delta))
+    conn.execute('''
+        DELETE FROM monthly_totals
+        WHERE user_id = ? AND year = ? AND month = ? AND tx_count <= 0
+    ''', (user_id, year, month))
+    # Toda escritura pasa por aquí (también las ediciones que solo cambian la descripción)
+    bump_month_version(conn, user_id, year, month)
+
+
+def rebuild_rollups(conn, user_id=None):
+    """Recompute the rollup tables from transactions (all users or just one)"""
+    where, params = ('WHERE user_id = ?', (user_id,)) if user_id is not None else ('', ())
+    conn.execute(f'DELETE FROM daily_totals {where}', params)
+    conn.execute(f'''
+        INSERT INTO daily_totals (user_id, year, month, day, total, tx_count, day_number)
+        SELECT user_id, year, month, day, SUM(amount), COUNT(*), {DAY_NUMBER_SQL}
+        FROM transactions {where}
+        GROUP BY user_id, year, month, day
+    ''', params)
+    rebuild_monthly_totals(conn, user_id)
+
+
+def rebuild_monthly_totals(conn, user_id=None):
+    """Recompute monthly_totals from daily_totals (all users or just one)"""
+    where, params = ('WHERE user_id = ?', (user_id,)) if user_id is not None else ('', ())
+    conn.execute(f'DELETE FROM monthly_totals {where}', params)
+    conn.execute(f'''
+        INSERT INTO monthly_totals (user_id, year, month, total, tx_count, active_days)
+        SELECT user_id, year, month, SUM(total), SUM(tx_count), COUNT(*)
+        FROM daily_totals {where}
+        GROUP BY user_id, year, month
+    ''', params)
+
+
+def _differences(expected, actual):
+    mismatches = []
+    for key in sorted(set(expected) | set(actual)):
+        want, got = expected.get(key), actual.get(key)
+        if want is None or got is None:
+            mismatches.append((key, want, got))
+        elif abs(want[0] - got[0]) > ROLLUP_TOLERANCE or want[1:] != got[1:]:
+            mismatches.append((key, want, got))
+    return mismatches
+
+
+def verify_rollups(conn):
+    """Compare the rollup tables with the raw transactions; returns a list of mismatches"""
+    raw_daily = {
+        tuple(row[:4]): tuple(row[4:]) for row in conn.execute(f'''
+            SELECT user_id, year, month, day, SUM(amount), COUNT(*), {DAY_NUMBER_SQL}
+            FROM transactions GROUP BY user_id, year, month, day
+        ''')
+    }
+    daily = {
+        tuple(row[:4]): tuple(row[4:]) for row in conn.execute(
+            'SELECT user_id, year, month, day, total, tx_count, day_number FROM daily_totals'
+        )
+    }
+    raw_monthly = {
+        tuple(row[:3]): tuple(row[3:]) for row in conn.execute('''
+            SELECT user_id, year, month, SUM(amount), COUNT(*), COUNT(DISTINCT day)
+            FROM transactions GROUP BY user_id, year, month
+        ''')
+    }
+    monthly = {
+        tuple(row[:3]): tuple(row[3:]) for row in conn.execute(
+            'SELECT user_id, year, month, total, tx_count, active_days FROM monthly_totals'
+        )
+    }
+    return [('daily',) + m for m in _differences(raw_daily, daily)] + \
+           [('monthly',) + m for m in _differences(raw_monthly, monthly)]
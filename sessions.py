@@ -0,0 +1,280 @@
+"""
+Sesiones del lado del servidor sobre la tabla user_sessions, con una LRU en memoria por
+proceso y escritura inmediata (write-through) en SQLite para que cualquier worker pueda
+atender cualquier request.
+
+La cookie solo lleva "<token>.<versión>". Cada guardado incrementa la versión en la base
+y reescribe la cookie: si la versión de la cookie coincide con la que el worker tiene en
+memoria la sesión se sirve sin tocar SQLite; si otro worker la cambió después, la versión
+difiere y se relee la fila. En la base se guarda el sha256 del token, no el token.
+"""
+
+import hashlib
+import os
+import secrets
+import threading
+import time
+
+from flask import request
+from flask.json.tag import TaggedJSONSerializer
+from flask.sessions import SecureCookieSession, SessionInterface
+
+from cache import TTLCache
+
+SESSION_TTL = int(os.environ.get('SESSION_TTL', 24 * 3600))  # segundos sin guardar antes de expirar
+ANON_SESSION_TTL = int(os.environ.get('ANON_SESSION_TTL', 600))  # sesiones sin login (solo flashes)
+SESSION_CACHE_SIZE = int(os.environ.get('SESSION_CACHE_SIZE', 10000))
+SESSION_SWEEP_INTERVAL = float(os.environ.get('SESSION_SWEEP_INTERVAL', 300))  # segundos
+SESSION_SWEEP_BATCH = int(os.environ.get('SESSION_SWEEP_BATCH', 500))
+SECRET_KEY_FILE = os.environ.get('SECRET_KEY_FILE', '.secret_key')
+USER_AGENT_MAX_LENGTH = 200
+
+
+def create_session_table(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS user_sessions (
+            session_token TEXT PRIMARY KEY,
+            user_id INTEGER,
+            data TEXT NOT NULL,
+            version INTEGER NOT NULL DEFAULT 1,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            expires_at REAL NOT NULL,
+            ip_address TEXT,
+            user_agent TEXT,
+            FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
+        ) WITHOUT ROWID
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_user_sessions_expires ON user_sessions (expires_at)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_user_sessions_user ON user_sessions (user_id)')
+
+
+def recent_session_users(conn, limit, now=None):
+    """Ids of the users with unexpired sessions, most recently active first"""
+    rows = conn.execute('''
+        SELECT user_id FROM user_sessions
+        WHERE user_id IS NOT NULL AND expires_at > ?
+        GROUP BY user_id
+        ORDER BY MAX(expires_at) DESC
+        LIMIT ?
+    ''', (time.time() if now is None else now, limit)).fetchall()
+    return [row[0] for row in rows]
+
+
+def load_secret_key(path=SECRET_KEY_FILE):
+    """SECRET_KEY from the environment, or a key file created once and shared by every worker"""
+    key = os.environ.get('SECRET_KEY')
+    if key:
+        return key
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        pass
+    # Se escribe aparte y se enlaza: si dos workers arrancan a la vez, gana uno y el otro lee su clave
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, 'w') as f:
+        f.write(secrets.token_hex(32))
+    try:
+        os.link(tmp_path, path)
+    except FileExistsError:
+        pass
+    finally:
+        os.unlink(tmp_path)
+    with open(path) as f:
+        return f.read().strip()
+
+
+def _token_key(token):
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def _parse_cookie(value):
+    """'<token>.<version>' -> (token, version); malformed cookies count as no session"""
+    if not value:
+        return None, None
+    token, _, version = value.rpartition('.')
+    if not token or not version.isdigit():
+        return None, None
+    return token, int(version)
+
+
+class ServerSession(SecureCookieSession):
+    """Session dict plus the token and version it was loaded with"""
+
+    def __init__(self, initial=None, token=None, version=0):
+        super().__init__(initial)
+        self.token = token
+        self.version = version
+        self.loaded_user_id = (initial or {}).get('user_id')
+
+
+class SQLiteSessionInterface(SessionInterface):
+    """Flask session backend on user_sessions with a per-process LRU in front"""
+
+    serializer = TaggedJSONSerializer()
+    session_class = ServerSession
+
+    def __init__(self, pool, cache_size=SESSION_CACHE_SIZE, sweep_interval=SESSION_SWEEP_INTERVAL,
+                 sweep_batch=SESSION_SWEEP_BATCH):
+        self.pool = pool
+        # (versión, expires_at, datos serializados); se guarda el texto para que cada request
+        # deserialice su propia copia y nunca mutee la entrada compartida
+        self.cache = TTLCache(cache_size, SESSION_TTL)
+        self.sweep_interval = sweep_interval
+        self.sweep_batch = sweep_batch
+        self.swept = 0
+        self._sweeper = None
+        self._sweeper_pid = None
+        self._lock = threading.Lock()
+
+    # --- lectura / escritura ---
+
+    def _load(self, key):
+        conn = self.pool.acquire()
+        try:
+            row = conn.execute(
+                'SELECT version, expires_at, data FROM user_sessions WHERE session_token = ?', (key,)
+            ).fetchone()
+        finally:
+            self.pool.release(conn)
+        return tuple(row) if row else None
+
+    def _store(self, key, session, expires_at):
+        payload = self.serializer.dumps(dict(session))
+        user_agent = request.headers.get('User-Agent', '')[:USER_AGENT_MAX_LENGTH]
+        conn = self.pool.acquire()
+        try:
+            # La versión la incrementa SQLite: dos workers guardando a la vez nunca repiten número
+            version = conn.execute('''
+                INSERT INTO user_sessions (session_token, user_id, data, expires_at, ip_address, user_agent)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (session_token) DO UPDATE SET
+                    user_id = excluded.user_id,
+                    data = excluded.data,
+                    expires_at = excluded.expires_at,
+                    version = version + 1
+                RETURNING version
+            ''', (key, session.get('user_id'), payload, expires_at,
+                  request.remote_addr, user_agent)).fetchone()[0]
+            conn.commit()
+        finally:
+            self.pool.release(conn)
+        self.cache.set(key, (version, expires_at, payload))
+        return version
+
+    def _delete(self, key):
+        self.cache.invalidate(key)
+        conn = self.pool.acquire()
+        try:
+            conn.execute('DELETE FROM user_sessions WHERE session_token = ?', (key,))
+            conn.commit()
+        finally:
+            self.pool.release(conn)
+
+    # --- SessionInterface ---
+
+    def open_session(self, app, request):
+        self._ensure_sweeper()
+        token, version = _parse_cookie(request.cookies.get(self.get_cookie_name(app)))
+        if token is None:
+            return self.session_class()
+        key = _token_key(token)
+        entry = self.cache.get(key)
+        if entry is None or entry[0] != version:
+            entry = self._load(key)
+            if entry is None:
+                return self.session_class()
+            self.cache.set(key, entry)
+        stored_version, expires_at, payload = entry
+        if expires_at < time.time():
+            return self.session_class()
+        return self.session_class(self.serializer.loads(payload), token, stored_version)
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+
+        if session.accessed:
+            response.vary.add('Cookie')
+
+        if not session:
+            if session.modified and session.token:
+                self._delete(_token_key(session.token))
+                response.delete_cookie(name, domain=domain, path=path,
+                                       secure=self.get_cookie_secure(app),
+                                       samesite=self.get_cookie_samesite(app),
+                                       httponly=self.get_cookie_httponly(app))
+            return
+        if not session.modified:
+            return
+
+        # Token nuevo al iniciar sesión (o cambiar de usuario): evita la fijación de sesión
+        if session.token is None or session.get('user_id') != session.loaded_user_id:
+            if session.token is not None:
+                self._delete(_token_key(session.token))
+            session.token = secrets.token_urlsafe(32)
+            session.loaded_user_id = session.get('user_id')
+
+        ttl = SESSION_TTL if 'user_id' in session else ANON_SESSION_TTL
+        session.version = self._store(_token_key(session.token), session, time.time() + ttl)
+        response.set_cookie(
+            name, f'{session.token}.{session.version}',
+            expires=self.get_expiration_time(app, session),
+            httponly=self.get_cookie_httponly(app),
+            domain=domain,
+            path=path,
+            secure=self.get_cookie_secure(app),
+            samesite=self.get_cookie_samesite(app),
+        )
+
+    # --- limpieza de sesiones expiradas ---
+
+    def sweep(self, now=None):
+        """Delete expired sessions in batches of sweep_batch rows; returns how many were removed"""
+        now = time.time() if now is None else now
+        removed = 0
+        conn = self.pool.connect()
+        try:
+            while True:
+                # Lotes cortos: cada DELETE toma el lock de escritura solo un instante
+                deleted = conn.execute('''
+                    DELETE FROM user_sessions WHERE session_token IN (
+                        SELECT session_token FROM user_sessions WHERE expires_at < ? LIMIT ?
+                    )
+                ''', (now, self.sweep_batch)).rowcount
+                conn.commit()
+                removed += deleted
+                if deleted < self.sweep_batch:
+                    break
+        finally:
+            conn.close()
+        self.swept += removed
+        return removed
+
+    def _ensure_sweeper(self):
+        # El hilo no sobrevive a un fork: cada worker arranca el suyo al primer request
+        if self.sweep_interval <= 0:
+            return
+        if self._sweeper_pid == os.getpid() and self._sweeper is not None and self._sweeper.is_alive():
+            return
+        with self._lock:
+            if self._sweeper_pid != os.getpid() or self._sweeper is None or not self._sweeper.is_alive():
+                self._sweeper_pid = os.getpid()
+                self._sweeper = threading.Thread(target=self._run_sweeper, name='session-sweeper', daemon=True)
+                self._sweeper.start()
+
+    def _run_sweeper(self):
+        while True:
+            time.sleep(self.sweep_interval)
+            try:
+                removed = self.sweep()
+            except Exception as e:
+                print(f"⚠️ No se pudieron limpiar las sesiones expiradas: {e}")
+                continue
+            if removed:
+                print(f"🧹 {removed} sesiones expiradas eliminadas")
+
+    def stats(self):
+        return dict(self.cache.stats(), swept=self.swept)
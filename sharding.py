@@ -0,0 +1,132 @@
+"""
+Sharding opcional de los datos de cada usuario (transacciones, rollups y versiones de mes).
+
+Cada user_id cae en uno de SHARD_BUCKETS buckets por un hash estable (crc32) y la tabla
+shard_buckets de la base principal dice en qué shard vive cada bucket. Un bucket sin fila
+sigue en la base principal, así que sin mapa (el caso por defecto) todo queda como siempre
+en un solo archivo. users, sesiones y logos nunca salen de la base principal (el directorio).
+
+El mapa se lee una vez por proceso: mover buckets entre shards es una operación offline
+(rebalance.py) que se hace con la app detenida.
+"""
+
+import os
+import sqlite3
+import threading
+import zlib
+
+from db import DB_READ_CACHE_SIZE_KB, DB_READ_POOL_SIZE, ConnectionPool
+
+SHARD_BUCKETS = 1024  # fijo: cambiarlo reubicaría a todos los usuarios
+SHARD_DIR = os.environ.get('SHARD_DIR', 'shards')  # relativo a la carpeta de la base principal
+MAIN_SHARD = 'main'
+# Tablas con datos de un solo usuario (columna user_id) que viven en su shard
+SHARDED_TABLES = ('transactions', 'daily_totals', 'monthly_totals', 'month_versions')
+
+
+def create_shard_tables(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS shards (
+            name TEXT PRIMARY KEY,
+            path TEXT UNIQUE NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS shard_buckets (
+            bucket INTEGER PRIMARY KEY,
+            shard TEXT NOT NULL REFERENCES shards (name)
+        )
+    ''')
+
+
+def bucket_for(user_id):
+    """Stable bucket of a user (the same in every process and Python version)"""
+    return zlib.crc32(b'%d' % user_id) % SHARD_BUCKETS
+
+
+def read_shard_map(conn):
+    """({bucket: shard}, {shard: path}) from the main database; empty before the migration"""
+    try:
+        paths = {row[0]: row[1] for row in conn.execute('SELECT name, path FROM shards')}
+        buckets = {row[0]: row[1] for row in conn.execute('SELECT bucket, shard FROM shard_buckets')}
+    except sqlite3.OperationalError:
+        return {}, {}
+    return buckets, paths
+
+
+class ShardRouter:
+    """Maps a user_id to the database holding their data, with one connection pool per shard"""
+
+    def __init__(self, database):
+        self.base_dir = os.path.dirname(os.path.abspath(database))
+        self._lock = threading.Lock()
+        self._map = None  # bucket -> nombre del shard
+        self._paths = {}
+        self._pools = {}  # (nombre, solo lectura) -> pool
+        self.sharded = False
+
+    @property
+    def loaded(self):
+        return self._map is not None
+
+    def load(self, conn):
+        """Read the bucket map from the main database (conn)"""
+        buckets, paths = read_shard_map(conn)
+        shard_map = [MAIN_SHARD] * SHARD_BUCKETS
+        for bucket, shard in buckets.items():
+            shard_map[bucket] = shard
+        with self._lock:
+            self._paths = paths
+            self._map = shard_map
+            self.sharded = bool(buckets)
+
+    def path(self, name):
+        return os.path.join(self.base_dir, self._paths[name])
+
+    def shard_for(self, user_id):
+        """Name of the shard that holds the user's data"""
+        if not self.sharded:
+            return MAIN_SHARD
+        return self._map[bucket_for(user_id)]
+
+    def pool(self, name, read_only=False):
+        """Connection pool of a shard (created on first use), or its read-only pool"""
+        pool = self._pools.get((name, read_only))
+        if pool is None:
+            with self._lock:
+                pool = self._pools.get((name, read_only))
+                if pool is None:
+                    if read_only:
+                        pool = ConnectionPool(self.path(name), size=DB_READ_POOL_SIZE, read_only=True,
+                                              cache_size_kb=DB_READ_CACHE_SIZE_KB)
+                    else:
+                        pool = ConnectionPool(self.path(name), foreign_keys=False)
+                    self._pools[(name, read_only)] = pool
+        return pool
+
+    def pool_for(self, user_id, read_only=False):
+        """Pool of the user's shard, or None when the data is in the main database"""
+        name = self.shard_for(user_id)
+        return None if name == MAIN_SHARD else self.pool(name, read_only)
+
+    def shards(self):
+        """Names of every registered shard (besides the main database)"""
+        return sorted(self._paths)
+
+    def close_all(self):
+        for pool in list(self._pools.values()):
+            pool.close_all()
+
+    def reset(self):
+        """Forget the map and the pools (tests and benchmarks that switch databases)"""
+        self.close_all()
+        with self._lock:
+            self._map = None
+            self._paths = {}
+            self._pools = {}
+            self.sharded = False
+
+    def stats(self):
+        return {f'{name}_read' if read_only else name: pool.stats()
+                for (name, read_only), pool in sorted(self._pools.items())}
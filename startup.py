@@ -0,0 +1,80 @@
+"""
+Arranque de la app en producción: migraciones una sola vez bajo un lock de archivo y
+calentamiento antes de que el servidor (gunicorn, uwsgi) cree los workers con fork.
+
+Con preload el proceso maestro hace todo esto una vez y los workers heredan las plantillas
+compiladas y los cachés del dashboard y de las grillas del mes ya llenos para los usuarios con
+sesión activa (WARM_UP_USERS); como esos cachés se validan contra month_versions, lo heredado
+nunca se sirve viejo. Las conexiones no cruzan el fork: cada worker abre las suyas en post_fork.
+Sin preload cada worker llama a create_app() y el lock hace que solo el primero aplique
+migraciones mientras los demás esperan y encuentran el esquema al día.
+"""
+
+import os
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    FCNTL_AVAILABLE = False
+
+from migrations import LATEST_VERSION, check_query_plans, get_schema_version, import_legacy_data, migrate
+
+WARM_UP_USERS = int(os.environ.get('WARM_UP_USERS', 200))  # usuarios con sesión activa a precalentar
+
+
+@contextmanager
+def startup_lock(path):
+    """Exclusive lock shared by every process that starts against the same database"""
+    if not FCNTL_AVAILABLE:
+        # Sin fcntl (Windows) no hay workers con fork: alcanza con un solo proceso
+        yield
+        return
+    with open(path, 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def migrate_shards(router, conn):
+    """Load the shard map from the main database (conn) and bring every shard to the latest schema"""
+    router.load(conn)
+    for name in router.shards():
+        shard = router.pool(name).connect()
+        try:
+            if get_schema_version(shard) < LATEST_VERSION:
+                print(f"🧩 Shard {name}:")
+                migrate(shard)
+        finally:
+            shard.close()
+
+
+def prepare_database(pool, lock_path, router):
+    """Apply pending migrations and the legacy import once, serialized across processes"""
+    with startup_lock(lock_path):
+        conn = pool.connect()
+        try:
+            if get_schema_version(conn) < LATEST_VERSION:
+                migrate(conn)
+            # Idempotente: las tablas viejas se renombran al importarlas
+            import_legacy_data(conn)
+            migrate_shards(router, conn)
+            problems = check_query_plans(conn)
+        finally:
+            conn.close()
+    for name in problems:
+        print(f"⚠️ La consulta {name} recorre una tabla completa (flask check-query-plans)")
+
+
+def warm_up(app):
+    """Compile every template so forked workers inherit them instead of compiling on first hit"""
+    started = time.perf_counter()
+    templates = app.jinja_env.list_templates()
+    for name in templates:
+        app.jinja_env.get_template(name)
+    print(f"🔥 {len(templates)} plantillas compiladas en {(time.perf_counter() - started) * 1000:.0f} ms "
+          f"(pid {os.getpid()})")
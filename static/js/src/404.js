@@ -0,0 +1,47 @@
+// Página no encontrada: volver atrás y atajo al dashboard
+// Valor que la plantilla pasa en los data-* del <script>
+const DASHBOARD_URL = document.currentScript.dataset.dashboardUrl;
+
+// Go back function
+function goBack() {
+    if (window.history.length > 1) {
+        window.history.back();
+    } else {
+        window.location.href = DASHBOARD_URL;
+    }
+}
+
+// Add some interactive elements
+document.addEventListener('DOMContentLoaded', function () {
+    // Add click effect to floating icon
+    const floatingIcon = document.querySelector('.float-animation');
+    if (floatingIcon) {
+        floatingIcon.addEventListener('click', function () {
+            this.style.transform = 'scale(1.1) translateY(-20px)';
+            setTimeout(() => {
+                this.style.transform = '';
+            }, 200);
+        });
+    }
+
+    // Add keyboard shortcut to go to dashboard
+    document.addEventListener('keydown', function (e) {
+        if (e.key === 'h' || e.key === 'H') {
+            window.location.href = DASHBOARD_URL;
+        }
+    });
+});
+
+// Show a subtle notification about keyboard shortcut
+setTimeout(() => {
+    const notification = document.createElement('div');
+    notification.className = 'fixed bottom-4 right-4 bg-gray-800 text-white px-4 py-2 rounded-lg text-sm opacity-0 transition-opacity duration-300';
+    notification.innerHTML = '💡 Presiona "H" para ir al dashboard';
+    document.body.appendChild(notification);
+
+    setTimeout(() => notification.style.opacity = '0.9', 100);
+    setTimeout(() => {
+        notification.style.opacity = '0';
+        setTimeout(() => notification.remove(), 300);
+    }, 3000);
+}, 2000);
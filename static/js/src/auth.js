@@ -0,0 +1,32 @@
+// Login y registro: foco inicial, validación de contraseñas y estado del botón al enviar
+document.addEventListener('DOMContentLoaded', function () {
+    const username = document.getElementById('username');
+    if (username) {
+        username.focus();
+    }
+
+    const password = document.getElementById('password');
+    const confirmPassword = document.getElementById('confirm_password');
+    if (password && confirmPassword) {
+        function validatePassword() {
+            if (password.value !== confirmPassword.value) {
+                confirmPassword.setCustomValidity('Las contraseñas no coinciden');
+            } else {
+                confirmPassword.setCustomValidity('');
+            }
+        }
+
+        password.addEventListener('change', validatePassword);
+        confirmPassword.addEventListener('keyup', validatePassword);
+    }
+
+    const form = document.querySelector('form');
+    if (form) {
+        form.addEventListener('submit', function () {
+            const button = this.querySelector('button[type="submit"]');
+            const label = button.dataset.loadingText || 'Enviando...';
+            button.innerHTML = '<span class="flex items-center justify-center"><span class="mr-2">⏳</span>' + label + '</span>';
+            button.disabled = true;
+        });
+    }
+});
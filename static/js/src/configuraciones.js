@@ -0,0 +1,134 @@
+// Configuraciones: preferencias locales, logo y confirmaciones
+// Configuraciones por defecto
+const defaultSettings = {
+    confirmDelete: true,
+    showNotifications: true,
+    autoRecalc: true
+};
+
+// Cargar configuraciones al iniciar
+document.addEventListener('DOMContentLoaded', function () {
+    loadSettings();
+});
+
+function loadSettings() {
+    const settings = JSON.parse(localStorage.getItem('appSettings') || JSON.stringify(defaultSettings));
+
+    document.getElementById('confirmDelete').checked = settings.confirmDelete;
+    document.getElementById('showNotifications').checked = settings.showNotifications;
+    document.getElementById('autoRecalc').checked = settings.autoRecalc;
+}
+
+function saveSettings() {
+    const settings = {
+        confirmDelete: document.getElementById('confirmDelete').checked,
+        showNotifications: document.getElementById('showNotifications').checked,
+        autoRecalc: document.getElementById('autoRecalc').checked
+    };
+
+    localStorage.setItem('appSettings', JSON.stringify(settings));
+    showNotification('✅ Configuraciones guardadas exitosamente', 'success');
+}
+
+function resetToDefaults() {
+    showConfirmDialog(
+        '¿Restaurar configuraciones por defecto?',
+        'Esta acción restaurará todas las configuraciones a sus valores originales.',
+        function () {
+            document.getElementById('confirmDelete').checked = defaultSettings.confirmDelete;
+            document.getElementById('showNotifications').checked = defaultSettings.showNotifications;
+            document.getElementById('autoRecalc').checked = defaultSettings.autoRecalc;
+            saveSettings();
+            showNotification('🔄 Configuraciones restauradas a valores por defecto', 'info');
+        }
+    );
+}
+
+function exportData() {
+    showNotification('📤 Función de exportación en desarrollo', 'info');
+}
+
+function clearAllData() {
+    showNotification('🗑️ Función de limpieza en desarrollo', 'info');
+}
+
+// Sistema de confirmación moderno
+let confirmCallback = null;
+
+function showConfirmDialog(title, message, callback) {
+    document.getElementById('confirmMessage').textContent = message;
+    document.getElementById('confirmModal').classList.remove('hidden');
+    confirmCallback = callback;
+}
+
+function confirmAction() {
+    if (confirmCallback) {
+        confirmCallback();
+        confirmCallback = null;
+    }
+    closeConfirmModal();
+}
+
+function closeConfirmModal() {
+    document.getElementById('confirmModal').classList.add('hidden');
+    confirmCallback = null;
+}
+
+// Sistema de notificaciones
+function showNotification(message, type = 'info') {
+    const existing = document.getElementById('notification');
+    if (existing) existing.remove();
+
+    const notification = document.createElement('div');
+    notification.id = 'notification';
+    notification.className = `fixed top-20 right-4 z-50 p-4 rounded-lg shadow-lg transition-all duration-300 ${type === 'success' ? 'bg-green-500 text-white' :
+        type === 'error' ? 'bg-red-500 text-white' :
+            'bg-blue-500 text-white'
+        }`;
+
+    notification.innerHTML = `
+        <div class="flex items-center">
+            <span class="text-sm font-medium">${message}</span>
+        </div>
+    `;
+
+    document.body.appendChild(notification);
+
+    setTimeout(() => {
+        if (notification.parentElement) {
+            notification.style.opacity = '0';
+            notification.style.transform = 'translateX(100%)';
+            setTimeout(() => notification.remove(), 300);
+        }
+    }, 3000);
+}
+
+// Preview del logo antes de subir
+if ('pilAvailable' in document.currentScript.dataset) {
+    document.getElementById('logo').addEventListener('change', function (e) {
+        const file = e.target.files[0];
+        if (file) {
+            const reader = new FileReader();
+            reader.onload = function (e) {
+                console.log('Archivo seleccionado:', file.name);
+            };
+            reader.readAsDataURL(file);
+        }
+    });
+
+    // Animación de envío
+    document.querySelector('form').addEventListener('submit', function (e) {
+        const submitBtn = this.querySelector('button[type="submit"]:not([name="remove_logo"])');
+        if (submitBtn && !this.querySelector('[name="remove_logo"]:checked')) {
+            submitBtn.innerHTML = '<span class="flex items-center justify-center">⏳ Procesando...</span>';
+            submitBtn.disabled = true;
+        }
+    });
+}
+
+// Cerrar modal con Escape
+document.addEventListener('keydown', function (e) {
+    if (e.key === 'Escape') {
+        closeConfirmModal();
+    }
+});
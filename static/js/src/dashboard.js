@@ -0,0 +1,338 @@
+// Dashboard: formulario rápido, métricas y estadísticas
+
+// Valores que la plantilla pasa en los data-* del <script>
+const TOTAL_TRANSACTIONS = document.currentScript.dataset.totalTransactions;
+
+// Actualizar reloj en tiempo real
+function updateTime() {
+    const now = new Date();
+    const timeString = now.toLocaleTimeString('es-ES', {
+        hour: '2-digit',
+        minute: '2-digit'
+    });
+    const timeElement = document.getElementById('current-time');
+    if (timeElement) {
+        timeElement.textContent = `⏰ ${timeString}`;
+    }
+}
+
+// Actualizar cada minuto
+setInterval(updateTime, 60000);
+updateTime(); // Ejecutar inmediatamente
+
+// Toggle para el formulario de agregar rápido
+function toggleQuickAdd() {
+    const form = document.getElementById('quick-add-form');
+    if (form.classList.contains('hidden')) {
+        form.classList.remove('hidden');
+        form.style.display = 'block';
+        form.style.animation = 'fadeInUp 0.3s ease-out';
+    } else {
+        form.style.animation = 'fadeOut 0.3s ease-out';
+        setTimeout(() => {
+            form.classList.add('hidden');
+        }, 300);
+    }
+}
+
+// Agregar transacción rápida
+function addQuickTransaction() {
+    const amount = document.getElementById('quick-amount').value;
+    const description = document.getElementById('quick-description').value;
+
+    if (!amount || amount <= 0) {
+        showNotification('Por favor ingresa un monto válido', 'error');
+        return;
+    }
+
+    const today = new Date();
+    const data = {
+        year: today.getFullYear(),
+        month: today.getMonth() + 1,
+        day: today.getDate(),
+        amount: parseFloat(amount),
+        description: description
+    };
+
+    fetch('/add-transaction', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify(data)
+    })
+        .then(response => response.json())
+        .then(data => {
+            if (data.success) {
+                showNotification('Transacción agregada exitosamente', 'success');
+                document.getElementById('quick-amount').value = '';
+                document.getElementById('quick-description').value = '';
+                setTimeout(() => {
+                    location.reload(); // Recargar para actualizar las métricas
+                }, 1000);
+            } else {
+                showNotification(data.message || 'Error al agregar transacción', 'error');
+            }
+        })
+        .catch(error => {
+            showNotification('Error de conexión', 'error');
+        });
+}
+
+// Agregar monto predefinido
+function addPresetAmount(amount) {
+    const today = new Date();
+    const data = {
+        year: today.getFullYear(),
+        month: today.getMonth() + 1,
+        day: today.getDate(),
+        amount: amount,
+        description: `Ingreso rápido de $${amount}`
+    };
+
+    fetch('/add-transaction', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify(data)
+    })
+        .then(response => response.json())
+        .then(data => {
+            if (data.success) {
+                showNotification(`$${amount} agregado exitosamente`, 'success');
+                // Animar el botón
+                const button = event.target;
+                button.style.transform = 'scale(0.95)';
+                setTimeout(() => {
+                    button.style.transform = 'scale(1)';
+                }, 150);
+
+                setTimeout(() => {
+                    location.reload();
+                }, 1000);
+            } else {
+                showNotification(data.message || 'Error al agregar transacción', 'error');
+            }
+        })
+        .catch(error => {
+            showNotification('Error de conexión', 'error');
+        });
+}
+
+// Sistema de notificaciones
+function showNotification(message, type = 'info') {
+    // Remover notificación existente
+    const existing = document.getElementById('notification');
+    if (existing) {
+        existing.remove();
+    }
+
+    const notification = document.createElement('div');
+    notification.id = 'notification';
+    notification.className = `fixed top-4 right-4 z-50 p-4 rounded-lg shadow-lg transition-all duration-300 ${type === 'success' ? 'bg-green-500 text-white' :
+        type === 'error' ? 'bg-red-500 text-white' :
+            'bg-blue-500 text-white'
+        }`;
+
+    notification.innerHTML = `
+        <div class="flex items-center">
+            <span class="mr-2">${type === 'success' ? '✅' :
+            type === 'error' ? '❌' :
+                'ℹ️'
+        }</span>
+            <span>${message}</span>
+            <button onclick="this.parentElement.parentElement.remove()" class="ml-4 text-white hover:text-gray-200">
+                ✕
+            </button>
+        </div>
+    `;
+
+    document.body.appendChild(notification);
+
+    // Auto-remover después de 5 segundos
+    setTimeout(() => {
+        if (notification.parentElement) {
+            notification.style.opacity = '0';
+            notification.style.transform = 'translateX(100%)';
+            setTimeout(() => {
+                notification.remove();
+            }, 300);
+        }
+    }, 5000);
+}    // Manejar Enter en el formulario rápido
+document.addEventListener('DOMContentLoaded', function () {
+    setupDashboardEvents(); // Usar la nueva función centralizada
+});// Función para mostrar estadísticas
+function showStatsAlert() {
+    const totalIncome = document.getElementById('total-income').textContent;
+    const currentMonth = document.getElementById('current-month-income').textContent;
+    const transactionCount = TOTAL_TRANSACTIONS;
+
+    showNotification(`📊 Estadísticas: Total ${totalIncome}, Este mes ${currentMonth}, ${transactionCount} transacciones`, 'info');
+}    // Sistema de actualización automática después de agregar transacciones
+function refreshDashboardData(aggregates) {
+    // Las respuestas de /add-transaction ya traen las métricas; si no, se piden como JSON
+    const metricsRequest = aggregates
+        ? Promise.resolve(aggregates.dashboard)
+        : fetch('/api/dashboard', { headers: { 'Accept': 'application/json' } }).then(response => response.json());
+
+    metricsRequest
+        .then(applyDashboardMetrics)
+        .catch(error => {
+            console.log('Error al actualizar datos del dashboard:', error);
+            // En caso de error, recargar
+            window.location.reload();
+        });
+}
+
+// Actualizar métricas y tabla de meses recientes con los datos del servidor
+function applyDashboardMetrics(metrics) {
+    const rows = document.querySelectorAll('tr[data-period]');
+    const periods = metrics.recent_months.map(m => `${m.year}-${m.month}`);
+
+    // Si aparece un mes nuevo en la tabla (o es el primer ingreso) se necesita el HTML completo
+    if (rows.length !== periods.length || periods.some(p => !document.querySelector(`tr[data-period="${p}"]`))) {
+        window.location.reload();
+        return;
+    }
+
+    const values = {
+        'total-income': `$${metrics.total_income.toFixed(2)}`,
+        'current-month-income': `$${metrics.current_month_income.toFixed(2)}`,
+        'daily-average': `$${metrics.daily_average.toFixed(2)}`,
+        'total-transactions': `${metrics.total_transactions}`
+    };
+    Object.entries(values).forEach(([id, text]) => {
+        const element = document.getElementById(id);
+        if (element && element.textContent.trim() !== text) {
+            // Animación de cambio
+            element.style.opacity = '0.5';
+            setTimeout(() => {
+                element.textContent = text;
+                element.style.opacity = '1';
+            }, 200);
+        }
+    });
+
+    metrics.recent_months.forEach(m => {
+        const cell = document.querySelector(`tr[data-period="${m.year}-${m.month}"] .month-total`);
+        if (cell) cell.textContent = `$${m.total.toFixed(2)}`;
+    });
+}
+
+// Configurar eventos del dashboard
+function setupDashboardEvents() {
+    // Configurar formularios de transacciones rápidas
+    const quickAmountInput = document.getElementById('quick-amount');
+    const quickDescriptionInput = document.getElementById('quick-description');
+
+    if (quickAmountInput && !quickAmountInput.hasAttribute('data-configured')) {
+        quickAmountInput.setAttribute('data-configured', 'true');
+        quickAmountInput.addEventListener('keypress', function (e) {
+            if (e.key === 'Enter') {
+                addQuickTransaction();
+            }
+        });
+    }
+
+    if (quickDescriptionInput && !quickDescriptionInput.hasAttribute('data-configured')) {
+        quickDescriptionInput.setAttribute('data-configured', 'true');
+        quickDescriptionInput.addEventListener('keypress', function (e) {
+            if (e.key === 'Enter') {
+                addQuickTransaction();
+            }
+        });
+    }
+}
+
+// Inicializar eventos cuando carga la página
+document.addEventListener('DOMContentLoaded', function () {
+    setupDashboardEvents();
+});
+
+// Modificar las funciones existentes para incluir actualización automática
+const originalAddQuickTransaction = addQuickTransaction;
+addQuickTransaction = function () {
+    const amount = document.getElementById('quick-amount').value;
+    const description = document.getElementById('quick-description').value;
+
+    if (!amount || amount <= 0) {
+        showNotification('Por favor ingresa un monto válido', 'error');
+        return;
+    }
+
+    const today = new Date();
+    const data = {
+        year: today.getFullYear(),
+        month: today.getMonth() + 1,
+        day: today.getDate(),
+        amount: parseFloat(amount),
+        description: description
+    };
+
+    fetch('/add-transaction', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify(data)
+    })
+        .then(response => response.json()).then(data => {
+            if (data.success) {
+                showNotification('✅ Transacción agregada exitosamente', 'success');
+                document.getElementById('quick-amount').value = '';
+                document.getElementById('quick-description').value = '';
+
+                // Los totales actualizados vienen en la misma respuesta
+                refreshDashboardData(data.aggregates);
+
+            } else {
+                showNotification(data.message || 'Error al agregar transacción', 'error');
+            }
+        })
+        .catch(error => {
+            showNotification('Error de conexión', 'error');
+        });
+};
+
+const originalAddPresetAmount = addPresetAmount;
+addPresetAmount = function (amount) {
+    const today = new Date();
+    const data = {
+        year: today.getFullYear(),
+        month: today.getMonth() + 1,
+        day: today.getDate(),
+        amount: amount,
+        description: `Ingreso rápido de $${amount}`
+    };
+
+    fetch('/add-transaction', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify(data)
+    })
+        .then(response => response.json()).then(data => {
+            if (data.success) {
+                showNotification(`✅ $${amount} agregado exitosamente`, 'success');
+
+                // Animar el botón
+                const button = event.target;
+                button.style.transform = 'scale(0.95)';
+                setTimeout(() => {
+                    button.style.transform = 'scale(1)';
+                }, 150);
+
+                // Los totales actualizados vienen en la misma respuesta
+                refreshDashboardData(data.aggregates);
+
+            } else {
+                showNotification(data.message || 'Error al agregar transacción', 'error');
+            }
+        })
+        .catch(error => {
+            showNotification('Error de conexión', 'error');
+        });
+};
@@ -0,0 +1,321 @@
+// Nuevo ingreso: selector de fecha tipo rueda y envío del formulario
+// Sistema de Wheel Picker estilo iPhone
+class WheelPicker {
+    constructor(container, inputId) {
+        this.container = container;
+        this.inputId = inputId;
+        this.wheelContent = container.querySelector('.wheel-content');
+        this.items = container.querySelectorAll('.wheel-item');
+        this.currentIndex = -1; // No inicializar en 0, esperar a setValue
+        this.isDragging = false;
+        this.startY = 0;
+        this.currentY = 0;
+        this.velocity = 0;
+        this.lastY = 0;
+        this.lastTime = 0;
+
+        this.itemHeight = window.innerWidth <= 640 ? 36 : 40;
+        this.maxTranslate = -(this.items.length - 1) * this.itemHeight;
+
+        this.init();
+    }
+
+    init() {
+        // Event listeners
+        this.wheelContent.addEventListener('mousedown', this.onStart.bind(this));
+        this.wheelContent.addEventListener('touchstart', this.onStart.bind(this));
+
+        document.addEventListener('mousemove', this.onMove.bind(this));
+        document.addEventListener('touchmove', this.onMove.bind(this));
+
+        document.addEventListener('mouseup', this.onEnd.bind(this));
+        document.addEventListener('touchend', this.onEnd.bind(this));
+
+        // Click en items
+        this.items.forEach((item, index) => {
+            item.addEventListener('click', () => {
+                this.snapToIndex(index);
+            });
+        });
+
+        // Scroll con mouse
+        this.wheelContent.addEventListener('wheel', this.onWheel.bind(this));
+    }
+
+    onStart(e) {
+        this.isDragging = true;
+        this.startY = e.type === 'mousedown' ? e.clientY : e.touches[0].clientY;
+        this.currentY = this.startY;
+        this.lastY = this.startY;
+        this.lastTime = Date.now();
+        this.velocity = 0;
+    }
+
+    onMove(e) {
+        if (!this.isDragging) return;
+        e.preventDefault();
+
+        this.currentY = e.type === 'mousemove' ? e.clientY : e.touches[0].clientY;
+        const deltaY = this.currentY - this.startY;
+        const translateY = Math.max(this.maxTranslate, Math.min(0, deltaY));
+
+        this.wheelContent.style.transform = `translateY(${translateY}px)`;
+    }
+
+    onEnd(e) {
+        if (!this.isDragging) return;
+        this.isDragging = false;
+
+        const deltaY = this.currentY - this.startY;
+        const velocity = deltaY / (Date.now() - this.lastTime);
+
+        // Calcular el índice basado en la posición final
+        const currentTranslate = this.getCurrentTranslate();
+        const targetIndex = Math.round(-currentTranslate / this.itemHeight);
+        const clampedIndex = Math.max(0, Math.min(this.items.length - 1, targetIndex));
+
+        this.snapToIndex(clampedIndex);
+    }
+
+    onWheel(e) {
+        e.preventDefault();
+        const direction = e.deltaY > 0 ? 1 : -1;
+        const newIndex = Math.max(0, Math.min(this.currentIndex + direction, this.items.length - 1));
+        this.snapToIndex(newIndex);
+    }
+
+    snapToIndex(index) {
+        this.currentIndex = index;
+        this.updatePosition();
+        this.updateSelection();
+    }
+
+    updatePosition() {
+        if (this.currentIndex === -1) {
+            // No se ha establecido un valor inicial, no actualizar posición
+            return;
+        }
+        const translateY = -this.currentIndex * this.itemHeight;
+        this.wheelContent.style.transform = `translateY(${translateY}px)`;
+    }
+
+    updateSelection() {
+        if (this.currentIndex === -1) {
+            // No se ha establecido un valor inicial, no actualizar selección
+            return;
+        }
+        // Actualizar clases
+        this.items.forEach((item, index) => {
+            item.classList.toggle('selected', index === this.currentIndex);
+        });
+
+        // Actualizar input hidden
+        const selectedValue = this.items[this.currentIndex].dataset.value;
+        document.getElementById(this.inputId).value = selectedValue;
+    }
+
+    getCurrentTranslate() {
+        const style = window.getComputedStyle(this.wheelContent);
+        const matrix = new DOMMatrix(style.transform);
+        return matrix.m42;
+    }
+
+    // Método público para establecer valor
+    setValue(value) {
+        console.log(`setValue called with: ${value}, type: ${typeof value}`);
+        const index = Array.from(this.items).findIndex(item => {
+            const itemValue = item.dataset.value;
+            console.log(`Comparing ${itemValue} with ${value}, match: ${itemValue === value.toString()}`);
+            return itemValue === value.toString();
+        });
+
+        console.log(`Found index: ${index} for value: ${value}`);
+
+        if (index !== -1) {
+            this.currentIndex = index;
+            this.updatePosition();
+            this.updateSelection();
+            console.log(`Successfully set value to index ${index}, currentIndex: ${this.currentIndex}`);
+        } else {
+            console.error(`Value ${value} not found in items`);
+        }
+    }
+
+    // Método público para obtener el valor actual
+    getValue() {
+        return this.items[this.currentIndex].dataset.value;
+    }
+
+    // Método para sincronizar la posición visual con el valor actual
+    syncVisualPosition() {
+        // Asegurar que la posición visual coincida con el índice actual
+        this.updatePosition();
+        this.updateSelection();
+    }
+
+    // Método para forzar sincronización completa
+    forceSync() {
+        if (this.currentIndex !== -1) {
+            // Forzar actualización de posición y selección
+            this.updatePosition();
+            this.updateSelection();
+
+            // Verificar que el input hidden tenga el valor correcto
+            const expectedValue = this.items[this.currentIndex].dataset.value;
+            const inputElement = document.getElementById(this.inputId);
+            if (inputElement && inputElement.value !== expectedValue) {
+                inputElement.value = expectedValue;
+                console.log(`Forced sync: Updated ${this.inputId} from ${inputElement.value} to ${expectedValue}`);
+            }
+        }
+    }
+}
+
+// Inicializar wheel pickers
+document.addEventListener('DOMContentLoaded', function () {
+    console.log('DOM loaded, initializing wheel pickers...');
+
+    const yearPicker = new WheelPicker(
+        document.querySelector('[data-input="year"]'),
+        'year'
+    );
+
+    const monthPicker = new WheelPicker(
+        document.querySelector('[data-input="month"]'),
+        'month'
+    );
+
+    // Establecer valores por defecto al año/mes actual
+    const currentDate = new Date();
+    const currentYear = currentDate.getFullYear();
+    const currentMonth = currentDate.getMonth() + 1;
+
+    console.log(`Current date: ${currentDate}`);
+    console.log(`Current year: ${currentYear}, Current month: ${currentMonth}`);
+
+    // IMPORTANTE: Establecer los valores después de que los pickers estén inicializados
+    setTimeout(() => {
+        console.log('Setting initial values - Year:', currentYear, 'Month:', currentMonth);
+
+        // Verificar valores antes de setValue
+        console.log('Year input value before setValue:', document.getElementById('year').value);
+        console.log('Month input value before setValue:', document.getElementById('month').value);
+
+        // ARREGLAR EL OFFSET: Ajustar el índice para que coincida con la posición visual
+        yearPicker.setValue(currentYear);
+        monthPicker.setValue(currentMonth);
+
+        // Sincronizar la posición visual después de establecer los valores
+        yearPicker.syncVisualPosition();
+        monthPicker.syncVisualPosition();
+
+        // Forzar sincronización completa para asegurar que no haya offset
+        yearPicker.forceSync();
+        monthPicker.forceSync();
+
+        // Verificar que los valores se establecieron correctamente
+        console.log('Year input value after setValue:', document.getElementById('year').value);
+        console.log('Month input value after setValue:', document.getElementById('month').value);
+        console.log('Year picker current index:', yearPicker.currentIndex);
+        console.log('Month picker current index:', monthPicker.currentIndex);
+
+        // Test adicional: verificar que los valores coinciden
+        const yearInputValue = document.getElementById('year').value;
+        const monthInputValue = document.getElementById('month').value;
+        const yearPickerValue = yearPicker.getValue();
+        const monthPickerValue = monthPicker.getValue();
+
+        console.log('=== VALIDATION TEST ===');
+        console.log('Year input vs picker:', yearInputValue, '===', yearPickerValue, 'Match:', yearInputValue === yearPickerValue);
+        console.log('Month input vs picker:', monthInputValue, '===', monthPickerValue, 'Match:', monthInputValue === monthPickerValue);
+
+        if (yearInputValue !== yearPickerValue || monthInputValue !== monthPickerValue) {
+            console.error('❌ MISMATCH DETECTED! Values are not synchronized!');
+        } else {
+            console.log('✅ All values are properly synchronized!');
+        }
+    }, 100);
+
+    // Form submission
+    document.getElementById('reporteForm').addEventListener('submit', function (e) {
+        e.preventDefault();
+        const year = document.getElementById('year').value;
+        const month = document.getElementById('month').value;
+
+        // Debug: mostrar los valores seleccionados
+        console.log('=== FORM SUBMISSION DEBUG ===');
+        console.log('Selected year:', year, 'Selected month:', month);
+        console.log('Year type:', typeof year, 'Month type:', typeof month);
+        console.log('Year picker current index:', yearPicker.currentIndex);
+        console.log('Month picker current index:', monthPicker.currentIndex);
+        console.log('Year picker getValue():', yearPicker.getValue());
+        console.log('Month picker getValue():', monthPicker.getValue());
+        console.log('Year input value:', document.getElementById('year').value);
+        console.log('Month input value:', document.getElementById('month').value);
+
+        // Validar que los valores sean válidos
+        if (!year || !month) {
+            alert('Por favor selecciona un año y mes válidos');
+            return;
+        }
+
+        // Verificar que los valores sean números válidos
+        if (isNaN(parseInt(year)) || isNaN(parseInt(month))) {
+            alert('Los valores de año y mes deben ser números válidos');
+            return;
+        }
+
+        const url = `/report/${year}/${month}`;
+        console.log('Redirecting to:', url);
+
+        window.location.href = url;
+    });
+
+    // Botón de debug
+    document.getElementById('debugBtn').addEventListener('click', function() {
+        const year = document.getElementById('year').value;
+        const month = document.getElementById('month').value;
+        const url = `/report/${year}/${month}`;
+
+        document.getElementById('debugYear').textContent = year;
+        document.getElementById('debugMonth').textContent = month;
+        document.getElementById('debugUrl').textContent = url;
+
+        document.getElementById('debugInfo').classList.remove('hidden');
+
+        console.log('=== DEBUG BUTTON CLICKED ===');
+        console.log('Year input value:', year);
+        console.log('Month input value:', month);
+        console.log('Generated URL:', url);
+        console.log('Year picker current index:', yearPicker.currentIndex);
+        console.log('Month picker current index:', monthPicker.currentIndex);
+        console.log('Year picker getValue():', yearPicker.getValue());
+        console.log('Month picker getValue():', monthPicker.getValue());
+    });
+});
+
+// Prevenir copia del texto protegido
+document.addEventListener('keydown', function (e) {
+    if ((e.ctrlKey || e.metaKey) && (e.key === 'a' || e.key === 'c' || e.key === 'v')) {
+        const target = e.target.closest('.no-copy');
+        if (target) {
+            e.preventDefault();
+            e.stopPropagation();
+            return false;
+        }
+    }
+});
+
+document.addEventListener('selectstart', function (e) {
+    if (e.target.closest('.no-copy')) {
+        e.preventDefault();
+        return false;
+    }
+});
+
+document.addEventListener('contextmenu', function (e) {
+    if (e.target.closest('.no-copy')) {
+        e.preventDefault();
+        return false;
+    }
+});
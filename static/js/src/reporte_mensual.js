@@ -0,0 +1,640 @@
+// Reporte mensual: alta, edición y borrado de transacciones por día
+let currentEditId = null;
+let hasRecentChanges = false;
+let autoRecalcTimer = null;
+let lastTransactionCount = 0;
+// Valores que la plantilla pasa en los data-* del <script>
+const YEAR = Number(document.currentScript.dataset.year);
+const MONTH = Number(document.currentScript.dataset.month);
+
+function addTransaction(event, day) {
+    event.preventDefault();
+    const form = event.target;
+    const amount = form.querySelector('input[type="number"]').value;
+    const description = form.querySelector('input[type="text"]').value; if (!amount || parseFloat(amount) <= 0) {
+        showCustomAlert('Por favor ingresa un monto válido', 'error');
+        return;
+    }
+
+    // DETECCIÓN: Verificar si este día estaba vacío antes de agregar
+    const dayWasEmpty = !document.getElementById(`transactions-${day}`);
+
+    const data = {
+        year: YEAR,
+        month: MONTH,
+        day: day,
+        amount: parseFloat(amount),
+        description: description
+    }; fetch('/add-transaction', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify(data)
+    })
+        .then(response => response.json()).then(responseData => {
+            if (responseData.success) {
+                // Limpiar el formulario
+                form.reset(); if (dayWasEmpty) {
+                    // PRIMERA TRANSACCIÓN DEL DÍA: Intento de actualización sin recarga
+                    showNotification('✅ Agregado exitosamente', 'success');
+
+                    try {
+                        // Intentar actualización manual completa
+                        addTransactionToDOM(day, responseData.transaction);
+                        applyAggregates(responseData.aggregates);
+
+                        // Actualizar visualmente el header del día para mostrar el nuevo total
+                        const dayCard = document.querySelectorAll('.grid > div')[day - 1];
+                        if (dayCard) {
+                            const headerSection = dayCard.querySelector('.text-right');
+                            if (headerSection) {
+                                const totalElement = headerSection.querySelector('.text-gray-400');
+                                if (totalElement) {
+                                    totalElement.textContent = `$${parseFloat(responseData.transaction.amount).toFixed(2)}`;
+                                    totalElement.className = 'text-green-600 font-bold text-sm';
+
+                                    // Agregar indicador de items
+                                    const existingCount = headerSection.querySelector('.text-xs.text-gray-500');
+                                    if (!existingCount) {
+                                        const countElement = document.createElement('p');
+                                        countElement.className = 'text-xs text-gray-500';
+                                        countElement.textContent = '1 item';
+                                        headerSection.appendChild(countElement);
+                                    }
+                                }
+                            }
+                        }
+
+                        markRecentChange();
+
+                        // Solo recarga si algo específico falla
+                        setTimeout(() => {
+                            // Verificar si la transacción se agregó correctamente
+                            const addedTransaction = document.querySelector(`[data-id="${responseData.transaction.id}"]`);
+                            if (!addedTransaction) {
+                                console.log('Transacción no encontrada en DOM, recargando...');
+                                window.location.reload();
+                            }
+                        }, 200);
+
+                    } catch (error) {
+                        console.error('Error en actualización manual:', error);
+                        // Solo recargar si hay error real
+                        setTimeout(() => {
+                            window.location.reload();
+                        }, 300);
+                    }
+                } else {
+                    // TRANSACCIONES ADICIONALES: Actualización AJAX
+                    addTransactionToDOM(day, responseData.transaction);
+                    applyAggregates(responseData.aggregates);
+                    markRecentChange();
+                    showNotification('Transacción agregada exitosamente', 'success');
+                }
+            } else {
+                showCustomAlert('Error: ' + responseData.message, 'error');
+            }
+        })
+        .catch(error => {
+            console.error('Error:', error);
+            showCustomAlert('Error al agregar la transacción', 'error');
+        });
+} function deleteTransaction(id) {
+    const settings = JSON.parse(localStorage.getItem('appSettings') || '{"confirmDelete": true}');
+
+    if (settings.confirmDelete) {
+        showConfirmDialog(
+            '¿Eliminar esta transacción?',
+            'Esta acción no se puede deshacer.',
+            function () {
+                executeDeleteTransaction(id);
+            }
+        );
+    } else {
+        executeDeleteTransaction(id);
+    }
+} function executeDeleteTransaction(id) {
+    fetch(`/delete-transaction/${id}`, { method: 'DELETE' })
+        .then(response => response.json())
+        .then(data => {
+            if (data.success) {
+                // Remover el elemento del DOM en lugar de recargar
+                const transactionElement = document.querySelector(`[data-id="${id}"]`);
+                if (transactionElement) {
+                    transactionElement.remove();
+
+                    // Actualizar totales
+                    applyAggregates(data.aggregates);
+
+                    markRecentChange();
+                    showNotification('Transacción eliminada exitosamente', 'success');
+                }
+            } else {
+                showCustomAlert('Error: ' + data.message, 'error');
+            }
+        })
+        .catch(error => {
+            console.error('Error:', error);
+            showCustomAlert('Error al eliminar la transacción', 'error');
+        });
+}
+
+function editTransaction(id, amount, description) {
+    currentEditId = id;
+    document.getElementById('editAmount').value = amount;
+    document.getElementById('editDescription').value = description || '';
+    document.getElementById('editModal').classList.remove('hidden');
+} function saveEdit() {
+    const amount = document.getElementById('editAmount').value;
+    const description = document.getElementById('editDescription').value; if (!amount || parseFloat(amount) <= 0) {
+        showCustomAlert('Por favor ingresa un monto válido', 'error');
+        return;
+    }
+
+    const data = {
+        amount: parseFloat(amount),
+        description: description
+    }; fetch(`/edit-transaction/${currentEditId}`, {
+        method: 'PUT',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify(data)
+    })
+        .then(response => response.json())
+        .then(data => {
+            if (data.success) {
+                closeModal();
+
+                // Actualizar la transacción en el DOM
+                const transactionElement = document.querySelector(`[data-id="${currentEditId}"]`);
+                if (transactionElement) {
+                    const amountElement = transactionElement.querySelector('.text-green-600');
+                    const descElement = transactionElement.querySelector('.text-gray-600, .text-gray-400');
+
+                    if (amountElement) amountElement.textContent = `$${parseFloat(data.amount || amount).toFixed(2)}`;
+                    if (descElement) {
+                        descElement.textContent = description || 'Sin descripción';
+                        descElement.className = description ? 'text-xs text-gray-600 truncate' : 'text-xs text-gray-400 italic';
+                    }
+
+                    // Actualizar totales
+                    applyAggregates(data.aggregates);
+                }
+
+                markRecentChange();
+                showNotification('Transacción editada exitosamente', 'success');
+            } else {
+                showCustomAlert('Error: ' + data.message, 'error');
+            }
+        })
+        .catch(error => {
+            console.error('Error:', error);
+            showCustomAlert('Error al editar la transacción', 'error');
+        });
+}
+
+function closeModal() {
+    document.getElementById('editModal').classList.add('hidden');
+    currentEditId = null;
+}    // Cerrar modal con Escape
+document.addEventListener('keydown', function (e) {
+    if (e.key === 'Escape') closeModal();
+});    // Función para agregar transacción al DOM dinámicamente
+function addTransactionToDOM(day, transaction) {
+    // Buscar el contenedor del día de manera más robusta
+    const dayCards = document.querySelectorAll('.grid > div');
+    let dayContainer = null;
+
+    // Encontrar el contenedor del día correcto
+    dayCards.forEach((card, index) => {
+        if (index + 1 === day) {
+            dayContainer = card.querySelector('.flex-1.overflow-y-auto.p-2');
+        }
+    });
+
+    if (!dayContainer) {
+        console.error(`No se encontró el contenedor para el día ${day}`);
+        // En lugar de forzar recarga inmediata, intentar de nuevo después de un breve delay
+        setTimeout(() => {
+            window.location.reload();
+        }, 300);
+        return;
+    }
+
+    // Verificar si existe el contenedor de transacciones
+    let transactionsContainer = dayContainer.querySelector(`#transactions-${day}`);
+
+    if (!transactionsContainer) {
+        // El día estaba vacío - remover mensaje "Sin ingresos" con animación suave
+        const emptyMessage = dayContainer.querySelector('.text-center');
+        if (emptyMessage) {
+            emptyMessage.style.opacity = '0';
+            emptyMessage.style.transform = 'scale(0.8)';
+            emptyMessage.style.transition = 'all 0.3s ease';
+
+            setTimeout(() => {
+                emptyMessage.remove();
+            }, 300);
+        }
+
+        // Crear nuevo contenedor de transacciones con animación
+        transactionsContainer = document.createElement('div');
+        transactionsContainer.className = 'space-y-1';
+        transactionsContainer.id = `transactions-${day}`;
+        transactionsContainer.style.opacity = '0';
+        transactionsContainer.style.transform = 'translateY(10px)';
+        dayContainer.appendChild(transactionsContainer);
+
+        // Animar entrada del contenedor
+        setTimeout(() => {
+            transactionsContainer.style.transition = 'all 0.3s ease';
+            transactionsContainer.style.opacity = '1';
+            transactionsContainer.style.transform = 'translateY(0)';
+        }, 100);
+    }
+
+    // Crear el elemento de la nueva transacción
+    const transactionElement = document.createElement('div');
+    transactionElement.className = 'bg-white rounded border border-gray-100 p-2 group hover:border-blue-200 transition-colors';
+    transactionElement.setAttribute('data-id', transaction.id);
+
+    transactionElement.innerHTML = `
+        <div class="flex items-start justify-between">
+            <div class="flex-1 min-w-0 mr-1">
+                <p class="text-xs font-semibold text-green-600">$${parseFloat(transaction.amount).toFixed(2)}</p>
+                <p class="text-xs ${transaction.description ? 'text-gray-600 truncate' : 'text-gray-400 italic'}" ${transaction.description ? `title="${transaction.description}"` : ''}>
+                    ${transaction.description || 'Sin descripción'}
+                </p>
+            </div>
+            <div class="flex space-x-1 opacity-0 group-hover:opacity-100 transition-opacity">
+                <button onclick="editTransaction(${transaction.id}, ${transaction.amount}, '${(transaction.description || '').replace(/'/g, "\\'")}')" 
+                        class="text-blue-500 hover:text-blue-700 text-xs p-1" title="Editar">
+                    ✏️
+                </button>
+                <button onclick="deleteTransaction(${transaction.id})" 
+                        class="text-red-500 hover:text-red-700 text-xs p-1" title="Eliminar">
+                    🗑️
+                </button>
+            </div>
+        </div>
+    `;
+
+    // Agregar con animación suave
+    transactionElement.style.opacity = '0';
+    transactionElement.style.transform = 'translateY(-10px)';
+
+    const container = document.getElementById(`transactions-${day}`);
+    container.appendChild(transactionElement);
+
+    // Animar entrada
+    setTimeout(() => {
+        transactionElement.style.transition = 'all 0.3s ease';
+        transactionElement.style.opacity = '1';
+        transactionElement.style.transform = 'translateY(0)';
+    }, 50);
+}
+
+// Función para actualizar el total de un día específico
+function updateDayTotal(day) {
+    const dayHeader = document.querySelector(`[data-day="${day}"] .text-right, .grid > div:nth-child(${day}) .text-right`);
+    if (!dayHeader) return;
+
+    const transactions = document.querySelectorAll(`#transactions-${day} [data-id]`);
+    let total = 0;
+
+    transactions.forEach(transaction => {
+        const amountText = transaction.querySelector('.text-green-600').textContent;
+        const amount = parseFloat(amountText.replace('$', ''));
+        total += amount;
+    });
+
+    // Actualizar el display del total del día
+    const totalSpan = dayHeader.querySelector('.text-green-600, .text-gray-400');
+    const countP = dayHeader.querySelector('.text-xs.text-gray-500');
+
+    if (total > 0) {
+        if (totalSpan) {
+            totalSpan.textContent = `$${total.toFixed(2)}`;
+            totalSpan.className = 'text-green-600 font-bold text-sm';
+        }
+        if (countP) {
+            const count = transactions.length;
+            countP.textContent = `${count} item${count !== 1 ? 's' : ''}`;
+        }
+    } else {
+        if (totalSpan) {
+            totalSpan.textContent = '$0.00';
+            totalSpan.className = 'text-gray-400 text-xs';
+        }
+        if (countP) {
+            countP.textContent = '';
+        }
+    }
+}
+
+// Función para actualizar el total del mes
+function updateMonthTotal() {
+    let total = 0;
+    document.querySelectorAll('[data-id]').forEach(transaction => {
+        const amountText = transaction.querySelector('.text-green-600').textContent;
+        const amount = parseFloat(amountText.replace('$', ''));
+        total += amount;
+    });
+
+    const totalDisplay = document.getElementById('total-mes-display');
+    if (totalDisplay) {
+        totalDisplay.textContent = total.toFixed(2);
+    }
+}
+
+// Aplicar los totales calculados por el servidor (días cambiados y total del mes)
+function applyAggregates(aggregates) {
+    if (!aggregates) {
+        // Respuesta sin totales: recalcular desde el DOM
+        updateAllTotals();
+        return;
+    }
+
+    Object.entries(aggregates.days).forEach(([day, totals]) => {
+        const dayHeader = document.querySelector(`[data-day="${day}"] .text-right, .grid > div:nth-child(${day}) .text-right`);
+        if (!dayHeader) return;
+
+        const totalSpan = dayHeader.querySelector('.text-green-600, .text-gray-400');
+        const countP = dayHeader.querySelector('.text-xs.text-gray-500');
+        if (totals.count > 0) {
+            if (totalSpan) {
+                totalSpan.textContent = `$${totals.total.toFixed(2)}`;
+                totalSpan.className = 'text-green-600 font-bold text-sm';
+            }
+            if (countP) {
+                countP.textContent = `${totals.count} item${totals.count !== 1 ? 's' : ''}`;
+            }
+        } else {
+            if (totalSpan) {
+                totalSpan.textContent = '$0.00';
+                totalSpan.className = 'text-gray-400 text-xs';
+            }
+            if (countP) {
+                countP.textContent = '';
+            }
+        }
+    });
+
+    const totalDisplay = document.getElementById('total-mes-display');
+    if (totalDisplay) {
+        totalDisplay.textContent = aggregates.month_summary.total.toFixed(2);
+    }
+}
+
+// Función para actualizar todos los totales
+function updateAllTotals() {
+    // Actualizar totales por día
+    for (let day = 1; day <= 31; day++) {
+        const dayTransactions = document.getElementById(`transactions-${day}`);
+        if (dayTransactions) {
+            updateDayTotal(day);
+        }
+    }
+
+    // Actualizar total del mes
+    updateMonthTotal();
+}
+
+// Función para recalcular el total
+function calculateTotal() {
+    // Recalcular y actualizar el total mostrado
+    let total = 0;
+    document.querySelectorAll('[data-id]').forEach(transaction => {
+        const amountText = transaction.querySelector('.text-green-600').textContent;
+        const amount = parseFloat(amountText.replace('$', ''));
+        total += amount;
+    });
+
+    const totalDisplay = document.getElementById('total-mes-display');
+    if (totalDisplay) {
+        totalDisplay.textContent = total.toFixed(2);
+    }
+
+    // Mostrar notificación
+    showNotification('Total recalculado: $' + total.toFixed(2), 'success');
+}
+
+// Sistema de notificaciones
+function showNotification(message, type = 'info') {
+    const existing = document.getElementById('notification');
+    if (existing) existing.remove();
+
+    const notification = document.createElement('div');
+    notification.id = 'notification';
+    notification.className = `fixed top-20 right-4 z-50 p-3 rounded-lg shadow-lg transition-all duration-300 ${type === 'success' ? 'bg-green-500 text-white' :
+        type === 'error' ? 'bg-red-500 text-white' :
+            'bg-blue-500 text-white'
+        }`;
+
+    notification.innerHTML = `
+        <div class="flex items-center">
+            <span class="mr-2">${type === 'success' ? '✅' :
+            type === 'error' ? '❌' : 'ℹ️'
+        }</span>
+            <span class="text-sm">${message}</span>
+        </div>
+    `;
+
+    document.body.appendChild(notification);
+
+    setTimeout(() => {
+        if (notification.parentElement) {
+            notification.style.opacity = '0';
+            notification.style.transform = 'translateX(100%)';
+            setTimeout(() => notification.remove(), 300);
+        }
+    }, 3000);
+}
+
+// ========== SISTEMA INTELIGENTE DE RECÁLCULO AUTOMÁTICO ==========
+
+// Marcar que hubo cambios recientes
+function markRecentChange() {
+    hasRecentChanges = true;
+
+    // Limpiar timer anterior si existe
+    if (autoRecalcTimer) {
+        clearTimeout(autoRecalcTimer);
+    }
+
+    // Configurar nuevo timer para recálculo en 30 segundos
+    autoRecalcTimer = setTimeout(() => {
+        if (hasRecentChanges) {
+            autoRecalculate();
+            hasRecentChanges = false;
+        }
+    }, 30000); // 30 segundos
+
+    showNotification('⏱️ Recálculo automático programado en 30s', 'info');
+}
+
+// Recálculo automático inteligente
+function autoRecalculate() {
+    const currentTransactionCount = document.querySelectorAll('[data-id]').length;
+
+    // Solo recalcular si hay cambios reales
+    if (currentTransactionCount !== lastTransactionCount || hasRecentChanges) {
+        calculateTotalSilent(); // Versión silenciosa para auto-recálculo
+        lastTransactionCount = currentTransactionCount;
+        showNotification('🔄 Total actualizado automáticamente', 'success');
+    }
+}
+
+// Detectar cambios en el DOM
+function detectChanges() {
+    const currentTransactionCount = document.querySelectorAll('[data-id]').length;
+
+    if (currentTransactionCount !== lastTransactionCount) {
+        markRecentChange();
+        lastTransactionCount = currentTransactionCount;
+    }
+}
+
+// Versión silenciosa del recálculo (sin notificación)
+function calculateTotalSilent() {
+    let total = 0;
+    document.querySelectorAll('[data-id]').forEach(transaction => {
+        const amountText = transaction.querySelector('.text-green-600').textContent;
+        const amount = parseFloat(amountText.replace('$', ''));
+        total += amount;
+    });
+
+    const totalDisplay = document.getElementById('total-mes-display');
+    if (totalDisplay) {
+        totalDisplay.textContent = total.toFixed(2);
+    }
+}
+
+// Recálculo manual (cancela el automático)
+function calculateTotal() {
+    // Limpiar timer automático ya que se está haciendo manualmente
+    if (autoRecalcTimer) {
+        clearTimeout(autoRecalcTimer);
+        autoRecalcTimer = null;
+        hasRecentChanges = false;
+    }
+
+    calculateTotalSilent();
+    showNotification('💰 Total recalculado manualmente', 'success');
+}
+
+// Inicialización inteligente
+document.addEventListener('DOMContentLoaded', function () {
+    lastTransactionCount = document.querySelectorAll('[data-id]').length;
+
+    // Verificar cambios cada 10 segundos (frecuente para detectar cambios rápido)
+    setInterval(detectChanges, 10000);
+
+    // Mostrar información inicial
+    showNotification(`📊 Sistema de recálculo activo - ${lastTransactionCount} transacciones`, 'info');
+
+    // Configurar observer para cambios en el DOM (más avanzado)
+    const observer = new MutationObserver(function (mutations) {
+        mutations.forEach(function (mutation) {
+            if (mutation.type === 'childList' &&
+                (mutation.addedNodes.length > 0 || mutation.removedNodes.length > 0)) {
+                detectChanges();
+            }
+        });
+    });        // Observar cambios en las areas de transacciones
+    const container = document.querySelector('.grid');
+    if (container) {
+        observer.observe(container, {
+            childList: true,
+            subtree: true
+        });
+    }
+
+    // ========== PROTECCIÓN CONTRA COPIA ==========
+
+    // Prevenir copia del texto protegido
+    document.addEventListener('keydown', function (e) {
+        // Prevenir Ctrl+A, Ctrl+C, Ctrl+V en elementos no copiables
+        if ((e.ctrlKey || e.metaKey) && (e.key === 'a' || e.key === 'c' || e.key === 'v')) {
+            const target = e.target.closest('.no-copy') || e.target.closest('.no-copy-income');
+            if (target) {
+                e.preventDefault();
+                e.stopPropagation();
+                return false;
+            }
+        }
+    });
+
+    // Prevenir selección con doble clic
+    document.addEventListener('selectstart', function (e) {
+        if (e.target.closest('.no-copy') || e.target.closest('.no-copy-income')) {
+            e.preventDefault();
+            return false;
+        }
+    });
+
+    // Prevenir menú contextual
+    document.addEventListener('contextmenu', function (e) {
+        if (e.target.closest('.no-copy') || e.target.closest('.no-copy-income')) {
+            e.preventDefault();
+            return false;
+        }
+    });
+});
+
+// ========== SISTEMA DE MODALES PERSONALIZADOS ==========
+
+// Variables globales para modales
+let confirmCallback = null;
+
+// Mostrar modal de confirmación
+function showConfirmDialog(title, message, callback) {
+    document.getElementById('confirmTitle').textContent = title;
+    document.getElementById('confirmMessage').textContent = message;
+    document.getElementById('confirmModal').classList.remove('hidden');
+    confirmCallback = callback;
+}
+
+// Confirmar acción
+function confirmAction() {
+    if (confirmCallback) {
+        confirmCallback();
+        confirmCallback = null;
+    }
+    closeConfirmModal();
+}
+
+// Cerrar modal de confirmación
+function closeConfirmModal() {
+    document.getElementById('confirmModal').classList.add('hidden');
+    confirmCallback = null;
+}
+
+// Mostrar alerta personalizada
+function showCustomAlert(message, type = 'info') {
+    const alertModal = document.getElementById('alertModal');
+    const alertIcon = document.getElementById('alertIcon');
+    const alertTitle = document.getElementById('alertTitle');
+    const alertMessage = document.getElementById('alertMessage');
+
+    // Configurar contenido según el tipo
+    if (type === 'error') {
+        alertIcon.textContent = '❌';
+        alertTitle.textContent = 'Error';
+        alertTitle.className = 'text-lg font-bold text-red-600 mb-2';
+    } else if (type === 'success') {
+        alertIcon.textContent = '✅';
+        alertTitle.textContent = 'Éxito';
+        alertTitle.className = 'text-lg font-bold text-green-600 mb-2';
+    } else {
+        alertIcon.textContent = 'ℹ️';
+        alertTitle.textContent = 'Información';
+        alertTitle.className = 'text-lg font-bold text-blue-600 mb-2';
+    }
+
+    alertMessage.textContent = message;
+    alertModal.classList.remove('hidden');
+}
+
+// Cerrar modal de alerta
+function closeAlertModal() {
+    document.getElementById('alertModal').classList.add('hidden');
+}
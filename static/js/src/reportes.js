@@ -0,0 +1,513 @@
+// Listado de reportes: paginación, filtros y acciones por mes
+function changePerPage(perPage) {
+    const url = new URL(window.location);
+    url.searchParams.set('per_page', perPage);
+    url.searchParams.set('page', 1); // Reset to first page
+    url.searchParams.delete('cursor');
+    window.location.href = url.toString();
+}    // Sistema de actualización automática para formularios
+async function refreshContent(aggregates) {
+    await refreshReportContent(aggregates);
+}    // Configurar listeners de eventos para compatibilidad
+function setupEventListeners() {
+    // Re-configurar cualquier evento que se haya perdido
+    const forms = document.querySelectorAll('form');
+    forms.forEach(form => {
+        if (!form.hasAttribute('data-configured')) {
+            form.setAttribute('data-configured', 'true');
+            setupFormListener(form);
+        }
+    });
+}
+
+// Configurar listener individual para formulario (mejorado)
+function setupFormListener(form) {
+    form.addEventListener('submit', async function (e) {
+        if (this.action && (this.action.includes('/add') || this.action.includes('/update') || this.action.includes('/save'))) {
+            e.preventDefault();
+
+            const formData = new FormData(this);
+            const submitButton = this.querySelector('button[type="submit"], input[type="submit"]');
+            const originalText = submitButton ? submitButton.innerHTML || submitButton.value : '';
+
+            // Detectar si es primera entrada ANTES del envío  
+            const isFirstEntry = checkIfFirstEntryOfDay(this);
+            console.log('📋 Primera entrada detectada en formulario individual:', isFirstEntry);
+
+            // Mostrar estado de carga
+            if (submitButton) {
+                submitButton.disabled = true;
+                if (submitButton.innerHTML !== undefined) {
+                    submitButton.innerHTML = '<span class="flex items-center justify-center">⏳ Procesando...</span>';
+                } else {
+                    submitButton.value = 'Procesando...';
+                }
+            }
+
+            try {
+                const response = await fetch(this.action, {
+                    method: this.method || 'POST',
+                    headers: { 'Accept': 'application/json' },
+                    body: formData
+                });
+                const aggregates = await readAggregates(response.clone());
+
+                if (response.ok) {
+                    showNotification('✅ Cambios guardados exitosamente', 'success');
+
+                    // Limpiar formulario si es de agregar
+                    if (this.action.includes('/add')) {
+                        this.reset();
+                    }
+
+                    if (isFirstEntry) {
+                        console.log('🔄 Primera entrada del día confirmada (individual) - Forzando recarga');
+                        showNotification('🔄 Primera entrada del día - Actualizando vista...', 'info');
+
+                        setTimeout(() => {
+                            console.log('🔄 Ejecutando recarga para primera entrada (individual)...');
+                            window.location.reload();
+                        }, 1000);
+
+                        // Restaurar botón
+                        if (submitButton) {
+                            setTimeout(() => {
+                                submitButton.disabled = false;
+                                if (submitButton.innerHTML !== undefined) {
+                                    submitButton.innerHTML = originalText;
+                                } else {
+                                    submitButton.value = originalText;
+                                }
+                            }, 800);
+                        }
+                    } else {
+                        console.log('⚡ Entrada adicional (individual) - Actualización AJAX');
+                        // Actualizar contenido inmediatamente para entradas subsecuentes
+                        setTimeout(async () => {
+                            await refreshReportContent(aggregates);
+
+                            // Restaurar botón
+                            if (submitButton) {
+                                submitButton.disabled = false;
+                                if (submitButton.innerHTML !== undefined) {
+                                    submitButton.innerHTML = originalText;
+                                } else {
+                                    submitButton.value = originalText;
+                                }
+                            }
+                        }, 300);
+                    }
+
+                    // Verificación adicional
+                    scheduleReportPostSubmitVerification();
+
+                } else {
+                    throw new Error('Error en el servidor');
+                }
+            } catch (error) {
+                showNotification('❌ Error al procesar la solicitud', 'error');
+
+                // Restaurar botón en caso de error
+                if (submitButton) {
+                    submitButton.disabled = false;
+                    if (submitButton.innerHTML !== undefined) {
+                        submitButton.innerHTML = originalText;
+                    } else {
+                        submitButton.value = originalText;
+                    }
+                }
+            }
+        }
+    });
+}// Detectar si hay formularios que necesitan actualización automática
+document.addEventListener('DOMContentLoaded', function () {
+    // Configurar todos los eventos específicos para reportes
+    setupReportEvents();
+});
+
+// Delegar eventos para formularios dinámicos (funciona mejor para contenido nuevo)
+document.addEventListener('submit', async function (e) {
+    const form = e.target;
+    if (form.tagName === 'FORM' && form.action && (form.action.includes('/add') || form.action.includes('/update') || form.action.includes('/save'))) {
+        e.preventDefault();
+
+        const formData = new FormData(form);
+        const submitButton = form.querySelector('button[type="submit"], input[type="submit"]');
+        const originalText = submitButton ? submitButton.innerHTML || submitButton.value : '';
+
+        // Detectar si es primera entrada ANTES del envío
+        const isFirstEntry = checkIfFirstEntryOfDay(form);
+        console.log('🔍 DETECCIÓN GLOBAL: Primera entrada del día:', isFirstEntry);
+
+        // Mostrar estado de carga
+        if (submitButton) {
+            submitButton.disabled = true;
+            if (submitButton.innerHTML !== undefined) {
+                submitButton.innerHTML = '<span class="flex items-center justify-center">⏳ Procesando...</span>';
+            } else {
+                submitButton.value = 'Procesando...';
+            }
+        }
+
+        try {
+            const response = await fetch(form.action, {
+                method: form.method || 'POST',
+                headers: { 'Accept': 'application/json' },
+                body: formData
+            });
+            const aggregates = await readAggregates(response.clone());
+
+            if (response.ok) {
+                showNotification('✅ Cambios guardados exitosamente', 'success');
+
+                // Limpiar formulario si es de agregar
+                if (form.action.includes('/add')) {
+                    form.reset();
+                }
+
+                if (isFirstEntry) {
+                    console.log('🔄 Primera entrada del día detectada - Recarga inmediata');
+                    showNotification('🔄 Primera entrada del día - Actualizando vista...', 'info');
+
+                    setTimeout(() => {
+                        console.log('🔄 Ejecutando recarga para primera entrada...');
+                        window.location.reload();
+                    }, 1000);
+
+                    // Restaurar botón
+                    if (submitButton) {
+                        setTimeout(() => {
+                            submitButton.disabled = false;
+                            if (submitButton.innerHTML !== undefined) {
+                                submitButton.innerHTML = originalText;
+                            } else {
+                                submitButton.value = originalText;
+                            }
+                        }, 800);
+                    }
+                } else {
+                    console.log('⚡ Entrada adicional - Actualización AJAX');
+                    // Actualizar contenido inmediatamente para entradas subsecuentes
+                    setTimeout(async () => {
+                        await refreshReportContent(aggregates);
+
+                        // Restaurar botón
+                        if (submitButton) {
+                            submitButton.disabled = false;
+                            if (submitButton.innerHTML !== undefined) {
+                                submitButton.innerHTML = originalText;
+                            } else {
+                                submitButton.value = originalText;
+                            }
+                        }
+                    }, 300);
+                }
+
+                // Verificación adicional
+                scheduleReportPostSubmitVerification();
+
+            } else {
+                throw new Error('Error en el servidor');
+            }
+        } catch (error) {
+            showNotification('❌ Error al procesar la solicitud', 'error');
+
+            // Restaurar botón en caso de error
+            if (submitButton) {
+                submitButton.disabled = false;
+                if (submitButton.innerHTML !== undefined) {
+                    submitButton.innerHTML = originalText;
+                } else {
+                    submitButton.value = originalText;
+                }
+            }
+        }
+    }
+});
+
+// Buscar formularios en la página
+const forms = document.querySelectorAll('form');
+
+forms.forEach(form => {
+    form.addEventListener('submit', async function (e) {
+        // Si es un formulario de agregar transacción
+        if (this.action && (this.action.includes('/add') || this.action.includes('/update'))) {
+            e.preventDefault();
+
+            const formData = new FormData(this);
+
+            try {
+                const response = await fetch(this.action, {
+                    method: this.method || 'POST',
+                    headers: { 'Accept': 'application/json' },
+                    body: formData
+                });
+                const aggregates = await readAggregates(response.clone());
+
+                if (response.ok) {
+                    // Mostrar notificación de éxito
+                    showNotification('✅ Cambios guardados exitosamente', 'success');
+
+                    // Limpiar formulario si es necesario
+                    if (this.action.includes('/add')) {
+                        this.reset();
+                    }
+
+                    // Actualizar contenido automáticamente
+                    setTimeout(() => refreshContent(aggregates), 500);
+
+                } else {
+                    showNotification('❌ Error al guardar cambios', 'error');
+                }
+            } catch (error) {
+                showNotification('❌ Error de conexión', 'error');
+            }
+        }
+    });
+});
+
+// Sistema de notificaciones
+function showNotification(message, type = 'info') {
+    // Remover notificación existente
+    const existing = document.getElementById('notification');
+    if (existing) existing.remove();
+
+    // Crear nueva notificación
+    const notification = document.createElement('div');
+    notification.id = 'notification';
+    notification.className = `fixed top-4 right-4 z-50 p-4 rounded-lg shadow-lg transition-all duration-300 transform translate-x-0 ${type === 'success' ? 'bg-green-500 text-white' :
+        type === 'error' ? 'bg-red-500 text-white' :
+            'bg-blue-500 text-white'
+        }`;
+
+    notification.innerHTML = `
+        <div class="flex items-center">
+            <span class="text-sm font-medium">${message}</span>
+            <button onclick="this.parentElement.parentElement.remove()" class="ml-3 text-white hover:text-gray-200">
+                <svg class="w-4 h-4" fill="none" stroke="currentColor" viewBox="0 0 24 24">
+                    <path stroke-linecap="round" stroke-linejoin="round" stroke-width="2" d="M6 18L18 6M6 6l12 12"></path>
+                </svg>
+            </button>
+        </div>
+    `;
+
+    document.body.appendChild(notification);
+
+    // Auto-remover después de 3 segundos
+    setTimeout(() => {
+        if (notification.parentElement) {
+            notification.style.opacity = '0';
+            notification.style.transform = 'translateX(100%)';
+            setTimeout(() => {
+                if (notification.parentElement) {
+                    notification.remove();
+                }
+            }, 300);
+        }
+    }, 3000);
+}
+
+// Sistema específico para creación de reportes - Detectar primera entrada del día
+function checkIfFirstEntryOfDay(dayElement) {
+    console.log('🔍 Verificando si es primera entrada del día...');
+
+    // Buscar el contenedor del día específico
+    const dayCard = dayElement ? dayElement.closest('.bg-white.rounded-2xl, .bg-white.rounded-xl, .border.border-gray-200') : null;
+
+    if (dayCard) {
+        // Verificar si el día tiene datos previos
+        const hasExistingData = dayCard.querySelector('table tbody tr, .transaction-item, [class*="total"], [class*="amount"]');
+        const hasMoneySymbol = dayCard.textContent.includes('$');
+        const dayTotal = dayCard.querySelector('.text-green-600, .font-bold');
+
+        console.log('📊 Día tiene datos existentes:', !!hasExistingData);
+        console.log('📊 Día tiene símbolo $:', hasMoneySymbol);
+        console.log('📊 Día tiene total:', !!dayTotal);
+
+        if (!hasExistingData || !hasMoneySymbol || !dayTotal) {
+            console.log('✅ Primera entrada del día detectada');
+            return true;
+        }
+    }
+
+    // Verificación global si no hay elemento específico
+    const allDayCards = document.querySelectorAll('.bg-white.rounded-2xl, .bg-white.rounded-xl');
+    const cardsWithData = Array.from(allDayCards).filter(card => {
+        return card.textContent.includes('$') || card.querySelector('table tbody tr');
+    });
+
+    console.log('📊 Total cards de días:', allDayCards.length);
+    console.log('📊 Cards con datos:', cardsWithData.length);
+
+    if (cardsWithData.length === 0) {
+        console.log('✅ Primera entrada del reporte detectada');
+        return true;
+    }
+
+    console.log('❌ No es primera entrada - hay datos previos');
+    return false;
+}
+
+// Leer los totales que devuelven los endpoints de escritura (si la respuesta es JSON)
+async function readAggregates(response) {
+    try {
+        const data = await response.json();
+        return data.aggregates || null;
+    } catch (error) {
+        return null;
+    }
+}
+
+// Actualizar la fila del mes afectado con los totales del servidor, sin volver a pedir la página
+async function refreshReportContent(aggregates) {
+    const row = aggregates && document.querySelector(`tr[data-period="${aggregates.year}-${aggregates.month}"]`);
+    if (!row) {
+        // Mes nuevo en el listado o respuesta sin totales: se necesita el HTML completo
+        window.location.reload();
+        return;
+    }
+
+    const summary = aggregates.month_summary;
+    if (summary.total_transactions === 0) {
+        window.location.reload();
+        return;
+    }
+    row.querySelector('.report-total').textContent = `$${summary.total.toFixed(2)}`;
+    row.querySelector('.report-transactions').textContent = `${summary.total_transactions} transacciones`;
+    row.querySelector('.report-days').textContent = `${summary.active_days} días activos`;
+    row.querySelector('.report-average').textContent = `$${summary.daily_average.toFixed(2)}`;
+}
+
+// Verificación post-envío para reportes
+function scheduleReportPostSubmitVerification() {
+    setTimeout(() => {
+        console.log('🔍 Verificación post-envío del reporte...');
+
+        const stillFirstEntry = checkIfFirstEntryOfDay();
+        const hasDaysWithData = document.querySelectorAll('.bg-white.rounded-2xl, .bg-white.rounded-xl').length > 0;
+        const hasContentWithMoney = document.body.textContent.includes('$');
+
+        console.log('🔍 Verificación: Aún primera entrada:', stillFirstEntry);
+        console.log('🔍 Verificación: Tiene días con datos:', hasDaysWithData);
+        console.log('🔍 Verificación: Tiene contenido con $:', hasContentWithMoney);
+
+        if (stillFirstEntry || !hasContentWithMoney) {
+            console.log('⚠️ ALERTA: La entrada del día no apareció');
+            console.log('🔄 Forzando recarga de seguridad...');
+            showNotification('🔄 Sincronizando entrada del día...', 'info');
+            window.location.reload();
+        } else {
+            console.log('✅ Verificación exitosa: La entrada está visible en el reporte');
+        }
+    }, 2500);
+}
+
+// Configurar eventos específicos para reportes
+function setupReportEvents() {
+    const forms = document.querySelectorAll('form');
+
+    forms.forEach(form => {
+        if (!form.hasAttribute('data-report-configured')) {
+            form.setAttribute('data-report-configured', 'true');
+
+            form.addEventListener('submit', async function (e) {
+                if (this.action && (this.action.includes('/add') || this.action.includes('/update') || this.action.includes('/save'))) {
+                    e.preventDefault();
+
+                    const formData = new FormData(this);
+                    const submitButton = this.querySelector('button[type="submit"], input[type="submit"]');
+                    const originalText = submitButton ? submitButton.innerHTML || submitButton.value : '';
+
+                    // Detectar si es primera entrada ANTES del envío
+                    const isFirstEntry = checkIfFirstEntryOfDay(this);
+                    console.log('📋 Resultado detección primera entrada:', isFirstEntry);
+
+                    // Mostrar estado de carga
+                    if (submitButton) {
+                        submitButton.disabled = true;
+                        if (submitButton.innerHTML !== undefined) {
+                            submitButton.innerHTML = '<span class="flex items-center justify-center"><svg class="animate-spin -ml-1 mr-3 h-4 w-4 text-white" xmlns="http://www.w3.org/2000/svg" fill="none" viewBox="0 0 24 24"><circle class="opacity-25" cx="12" cy="12" r="10" stroke="currentColor" stroke-width="4"></circle><path class="opacity-75" fill="currentColor" d="M4 12a8 8 0 018-8V0C5.373 0 0 5.373 0 12h4zm2 5.291A7.962 7.962 0 014 12H0c0 3.042 1.135 5.824 3 7.938l3-2.647z"></path></svg>Guardando...</span>';
+                        } else {
+                            submitButton.value = 'Guardando...';
+                        }
+                    }
+
+                    try {
+                        const response = await fetch(this.action, {
+                            method: this.method || 'POST',
+                            headers: { 'Accept': 'application/json' },
+                            body: formData
+                        });
+                        const aggregates = await readAggregates(response.clone());
+
+                        if (response.ok) {
+                            showNotification('✅ Entrada guardada exitosamente', 'success');
+
+                            // Limpiar formulario si es de agregar
+                            if (this.action.includes('/add')) {
+                                this.reset();
+                            }
+
+                            if (isFirstEntry) {
+                                console.log('🔄 Primera entrada del día confirmada - Forzando recarga');
+                                showNotification('🔄 Primera entrada del día - Actualizando vista...', 'info');
+
+                                setTimeout(() => {
+                                    console.log('🔄 Ejecutando recarga para primera entrada...');
+                                    window.location.reload();
+                                }, 1000);
+
+                                // Restaurar botón después de un momento
+                                if (submitButton) {
+                                    setTimeout(() => {
+                                        submitButton.disabled = false;
+                                        if (submitButton.innerHTML !== undefined) {
+                                            submitButton.innerHTML = originalText;
+                                        } else {
+                                            submitButton.value = originalText;
+                                        }
+                                    }, 800);
+                                }
+                            } else {
+                                console.log('⚡ Entrada adicional - Actualización AJAX');
+                                setTimeout(async () => {
+                                    await refreshReportContent(aggregates);
+
+                                    // Restaurar botón
+                                    if (submitButton) {
+                                        submitButton.disabled = false;
+                                        if (submitButton.innerHTML !== undefined) {
+                                            submitButton.innerHTML = originalText;
+                                        } else {
+                                            submitButton.value = originalText;
+                                        }
+                                    }
+                                }, 300);
+                            }
+
+                            // Verificación adicional
+                            scheduleReportPostSubmitVerification();
+
+                        } else {
+                            throw new Error('Error en el servidor');
+                        }
+                    } catch (error) {
+                        showNotification('❌ Error al guardar la entrada', 'error');
+
+                        // Restaurar botón en caso de error
+                        if (submitButton) {
+                            submitButton.disabled = false;
+                            if (submitButton.innerHTML !== undefined) {
+                                submitButton.innerHTML = originalText;
+                            } else {
+                                submitButton.value = originalText;
+                            }
+                        }
+                    }
+                }
+            });
+        }
+    });
+}
+
+// ...existing code...
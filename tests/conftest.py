@@ -0,0 +1,38 @@
+"""
+La app contra una base nueva en un directorio temporal (DATABASE y los archivos de sesión y
+throttle son rutas relativas) y un cliente con su propio usuario ya logueado por test.
+"""
+
+import itertools
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('BCRYPT_ROUNDS', '4')  # el costo real haría lento cada registro
+
+_user_numbers = itertools.count(1)
+
+
+@pytest.fixture(scope='session')
+def appmod(tmp_path_factory):
+    os.chdir(tmp_path_factory.mktemp('app'))
+    import app as appmod
+    appmod.app.config['TESTING'] = True
+    appmod.create_app()
+    return appmod
+
+
+@pytest.fixture
+def client(appmod):
+    client = appmod.app.test_client()
+    username = f'user{next(_user_numbers)}'
+    client.post('/register', data={'username': username, 'email': f'{username}@example.com',
+                                   'password': 'Passw0rd!', 'confirm_password': 'Passw0rd!'})
+    response = client.post('/login', data={'username': username, 'password': 'Passw0rd!'})
+    assert response.status_code == 302
+    with client.session_transaction() as session:
+        client.user_id = session['user_id']
+    client.username = username
+    return client
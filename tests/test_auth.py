@@ -0,0 +1,14 @@
+import pytest
+
+from passwords import HashPoolSaturated, HashTimeout
+
+
+@pytest.mark.parametrize('error', [HashPoolSaturated, HashTimeout])
+def test_login_answers_503_when_hashing_is_busy(appmod, client, monkeypatch, error):
+    def busy(*args):
+        raise error()
+
+    monkeypatch.setattr(appmod.password_hasher, 'verify', busy)
+    response = appmod.app.test_client().post('/login', data={'username': client.username, 'password': 'Passw0rd!'})
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '1'
@@ -0,0 +1,26 @@
+def import_csv(client, body, **params):
+    return client.post('/import-transactions', data=body, content_type='text/csv', query_string=params)
+
+
+def test_import_reports_year_out_of_range_per_row(client):
+    body = 'year,month,day,amount\n2023,1,5,10\n0,1,5,10\n10000,1,5,10\n'
+    result = import_csv(client, body).get_json()
+    assert result['imported'] == 1
+    assert result['errors'] == [{'row': 3, 'error': 'Fecha inválida'}, {'row': 4, 'error': 'Fecha inválida'}]
+    assert result['periods'] == [[2023, 1]]
+
+
+def test_strict_import_with_a_bad_row_writes_nothing(appmod, client):
+    body = 'year,month,day,amount\n2023,1,5,10\n2023,2,30,10\n2023,3,1,10\n'
+    result = import_csv(client, body, strict='1').get_json()
+    assert not result['success']
+    assert result['imported'] == 0
+    assert result['failed'] == 1
+    assert result['periods'] == []
+    conn = appmod.db_pool.connect()
+    try:
+        for table in ('transactions', 'daily_totals', 'monthly_totals'):
+            count = conn.execute(f'SELECT COUNT(*) FROM {table} WHERE user_id = ?', (client.user_id,)).fetchone()[0]
+            assert count == 0, table
+    finally:
+        conn.close()
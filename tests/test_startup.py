@@ -0,0 +1,20 @@
+from datetime import datetime
+
+
+def test_warm_caches_fills_caches_of_users_with_sessions(appmod, client):
+    now = datetime.now()
+    client.post('/add-transaction', json={'year': now.year, 'month': now.month, 'day': 1, 'amount': 10})
+    appmod.dashboard_cache.invalidate(client.user_id)
+    appmod.fragment_cache.clear()
+
+    assert appmod.warm_caches() >= 1
+    assert appmod.dashboard_cache.get(client.user_id)['total_income'] == 10
+    hits = appmod.fragment_cache.stats()['hits']
+    assert client.get(f'/reporte/{now.year}/{now.month}').status_code == 200
+    assert appmod.fragment_cache.stats()['hits'] == hits + 1
+
+
+def test_warm_up_worker_opens_pool_connections(appmod):
+    appmod.db_pool.close_all()
+    appmod.warm_up_worker(2)
+    assert appmod.db_pool.stats()['idle'] >= 2
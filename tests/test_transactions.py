@@ -0,0 +1,31 @@
+import pytest
+
+
+@pytest.mark.parametrize('year', [0, 10000])
+def test_add_rejects_year_out_of_range(client, year):
+    response = client.post('/add-transaction', json={'year': year, 'month': 1, 'day': 1, 'amount': 10})
+    assert response.status_code == 200
+    assert response.get_json() == {'success': False, 'message': 'Fecha inválida'}
+
+
+def test_add_accepts_year_limits(client):
+    for year in (1, 9999):
+        response = client.post('/add-transaction', json={'year': year, 'month': 12, 'day': 31, 'amount': 10})
+        assert response.get_json()['success']
+
+
+def test_failed_write_rolls_back_and_is_not_noted(appmod, client):
+    def failing_insert(conn, user_id):
+        conn.execute('INSERT INTO transactions (user_id, year, month, day, amount, description) '
+                     'VALUES (?, 2023, 1, 1, 5, ?)', (user_id, 'no debe quedar'))
+        raise ValueError('Fecha inválida')
+
+    with appmod.app.test_request_context():
+        appmod.session['user_id'] = client.user_id
+        with pytest.raises(ValueError):
+            appmod.run_write(failing_insert, client.user_id)
+        conn = appmod.get_user_db(client.user_id)
+        assert not conn.in_transaction
+        assert 'last_write' not in appmod.session
+        count = conn.execute('SELECT COUNT(*) FROM transactions WHERE user_id = ?', (client.user_id,)).fetchone()[0]
+        assert count == 0
@@ -0,0 +1,184 @@
+"""
+Límite de intentos de login con token buckets por usuario y por IP, en memoria compartida
+entre los workers: una tabla hash de tamaño fijo dentro de un archivo mapeado con mmap
+(THROTTLE_FILE), protegida por locks fcntl sobre franjas de la tabla.
+
+Cada intento fallido consume un token del bucket del usuario y otro del de la IP; los
+buckets se rellenan solos a lo largo de LOGIN_THROTTLE_WINDOW. Con un bucket vacío el login
+se rechaza antes de tocar SQLite o bcrypt. En la base solo se escribe cuando un usuario
+cruza el umbral (queda bloqueado), no en cada intento fallido.
+
+Una entrada con el bucket ya lleno equivale a una vacía, así que la tabla nunca necesita
+limpieza: al llenarse un grupo se reutiliza la entrada que más tiempo lleva sin uso.
+"""
+
+import hashlib
+import mmap
+import os
+import struct
+import threading
+import time
+
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    FCNTL_AVAILABLE = False
+
+LOGIN_THROTTLE_ENABLED = os.environ.get('LOGIN_THROTTLE', '1') == '1'
+LOGIN_USER_ATTEMPTS = int(os.environ.get('LOGIN_USER_ATTEMPTS', 5))  # fallos seguidos por usuario
+LOGIN_IP_ATTEMPTS = int(os.environ.get('LOGIN_IP_ATTEMPTS', 30))  # fallos seguidos por IP
+LOGIN_THROTTLE_WINDOW = float(os.environ.get('LOGIN_THROTTLE_WINDOW', 900))  # segundos para rellenar un bucket
+LOGIN_LOCKOUT_MINUTES = int(os.environ.get('LOGIN_LOCKOUT_MINUTES', 15))  # bloqueo de la cuenta al cruzar el umbral
+THROTTLE_SLOTS = int(os.environ.get('THROTTLE_SLOTS', 65536))
+
+_SLOT = struct.Struct('<Qdd')  # hash de la clave, tokens, última actualización
+_GROUP = 8  # entradas contiguas donde puede caer una clave
+_STRIPES = 64  # franjas con lock propio
+
+
+def _key_hash(kind, value):
+    digest = hashlib.blake2b(f'{kind}:{value}'.encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'little') or 1  # 0 marca una entrada libre
+
+
+class LoginThrottle:
+    """Token buckets keyed by username and client IP, shared by every process that maps the same file"""
+
+    def __init__(self, path, slots=THROTTLE_SLOTS, window=LOGIN_THROTTLE_WINDOW, limits=None):
+        self.path = path
+        self.groups = max(1, slots // _GROUP)
+        self.window = window
+        # tipo de clave -> capacidad del bucket
+        self.limits = limits or {'user': LOGIN_USER_ATTEMPTS, 'ip': LOGIN_IP_ATTEMPTS}
+        self._stats = {'checks': 0, 'rejected': 0, 'failures': 0, 'lockouts': 0, 'evictions': 0}
+        self._stats_lock = threading.Lock()
+        self._pid = None
+
+    def _ensure_open(self):
+        if self._pid != os.getpid():
+            with self._stats_lock:
+                if self._pid != os.getpid():
+                    self._open()
+
+    def _open(self):
+        # Los locks de hilos no sobreviven a un fork; el mapeo sí, pero se reabre por simplicidad
+        size = self.groups * _GROUP * _SLOT.size
+        if FCNTL_AVAILABLE:
+            self._file = open(self.path, 'a+b')
+            if os.fstat(self._file.fileno()).st_size < size:
+                self._file.truncate(size)
+            self._map = mmap.mmap(self._file.fileno(), size)
+        else:
+            # Sin fcntl no hay workers con fork: alcanza con memoria del proceso
+            self._file = None
+            self._map = mmap.mmap(-1, size)
+        self._locks = [threading.Lock() for _ in range(_STRIPES)]
+        self._pid = os.getpid()
+
+    def count(self, name, amount=1):
+        with self._stats_lock:
+            self._stats[name] += amount
+
+    def _locked(self, group):
+        return _StripeLock(self, group % _STRIPES)
+
+    def _refill(self, capacity, tokens, updated, now):
+        return min(capacity, tokens + (now - updated) * capacity / self.window)
+
+    def _find(self, key, capacity, now):
+        """Offset of the key's slot in its group, claiming a free or stale one if needed"""
+        base = (key % self.groups) * _GROUP * _SLOT.size
+        free, oldest, oldest_updated = None, None, None
+        for index in range(_GROUP):
+            offset = base + index * _SLOT.size
+            slot_key, tokens, updated = _SLOT.unpack_from(self._map, offset)
+            if slot_key == key:
+                return offset, self._refill(capacity, tokens, updated, now)
+            if slot_key == 0 or now - updated >= self.window:
+                # Libre, o con el bucket ya lleno de nuevo: da lo mismo que no exista
+                if free is None:
+                    free = offset
+            elif oldest_updated is None or updated < oldest_updated:
+                oldest, oldest_updated = offset, updated
+        if free is None:
+            free = oldest
+            self.count('evictions')
+        return free, float(capacity)
+
+    def retry_after(self, keys, now=None):
+        """Seconds until every (kind, value) key has a token again; 0 when the attempt may proceed"""
+        self._ensure_open()
+        now = time.time() if now is None else now
+        self.count('checks')
+        wait = 0.0
+        for kind, value in keys:
+            capacity = self.limits[kind]
+            key = _key_hash(kind, value)
+            with self._locked(key % self.groups):
+                _, tokens = self._find(key, capacity, now)
+            if tokens < 1:
+                wait = max(wait, (1 - tokens) * self.window / capacity)
+        if wait:
+            self.count('rejected')
+        return wait
+
+    def fail(self, keys, now=None):
+        """Take a token from every key's bucket; returns {kind: (tokens left, just emptied)}"""
+        self._ensure_open()
+        now = time.time() if now is None else now
+        self.count('failures')
+        result = {}
+        for kind, value in keys:
+            capacity = self.limits[kind]
+            key = _key_hash(kind, value)
+            with self._locked(key % self.groups):
+                offset, before = self._find(key, capacity, now)
+                tokens = max(0.0, before - 1)
+                _SLOT.pack_into(self._map, offset, key, tokens, now)
+            # Solo el intento que cruza el umbral informa el bloqueo (y lo escribe en la base)
+            crossed = before >= 1 > tokens
+            if crossed:
+                self.count('lockouts')
+            result[kind] = (tokens, crossed)
+        return result
+
+    def reset(self, kind, value):
+        """Forget a key (its bucket is full again), e.g. after a successful login"""
+        self._ensure_open()
+        key = _key_hash(kind, value)
+        with self._locked(key % self.groups):
+            base = (key % self.groups) * _GROUP * _SLOT.size
+            for index in range(_GROUP):
+                offset = base + index * _SLOT.size
+                if _SLOT.unpack_from(self._map, offset)[0] == key:
+                    _SLOT.pack_into(self._map, offset, 0, 0.0, 0.0)
+
+    def stats(self):
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats['slots'] = self.groups * _GROUP
+        stats['window'] = self.window
+        for kind, capacity in self.limits.items():
+            stats[f'{kind}_attempts'] = capacity
+        return stats
+
+
+class _StripeLock:
+    """Thread lock of a stripe plus an fcntl lock on one byte of the file (for other processes)"""
+
+    __slots__ = ('throttle', 'stripe')
+
+    def __init__(self, throttle, stripe):
+        self.throttle = throttle
+        self.stripe = stripe
+
+    def __enter__(self):
+        self.throttle._locks[self.stripe].acquire()
+        if self.throttle._file is not None:
+            fcntl.lockf(self.throttle._file, fcntl.LOCK_EX, 1, self.stripe)
+
+    def __exit__(self, *exc):
+        if self.throttle._file is not None:
+            fcntl.lockf(self.throttle._file, fcntl.LOCK_UN, 1, self.stripe)
+        self.throttle._locks[self.stripe].release()
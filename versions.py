@@ -0,0 +1,62 @@
+"""
+Contador de cambios por usuario y mes (month_versions). Cada escritura en transactions lo
+incrementa dentro de su misma transacción, así que cualquier worker puede saber con una
+lectura por clave primaria si lo que tiene en caché para un mes sigue vigente.
+"""
+
+import time
+
+
+def create_month_versions_table(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS month_versions (
+            user_id INTEGER NOT NULL,
+            year INTEGER NOT NULL,
+            month INTEGER NOT NULL,
+            version INTEGER NOT NULL DEFAULT 0,
+            updated_at REAL NOT NULL,
+            PRIMARY KEY (user_id, year, month)
+        ) WITHOUT ROWID
+    ''')
+
+
+def bump_month_version(conn, user_id, year, month):
+    """Mark a month as changed; must run inside the write's transaction"""
+    conn.execute('''
+        INSERT INTO month_versions (user_id, year, month, version, updated_at)
+        VALUES (?, ?, ?, 1, ?)
+        ON CONFLICT (user_id, year, month)
+        DO UPDATE SET version = version + 1, updated_at = excluded.updated_at
+    ''', (user_id, year, month, time.time()))
+
+
+def bump_all_month_versions(conn, user_id=None):
+    """Mark every month with data (of all users or just one) as changed, e.g. after a rebuild"""
+    where, params = ('WHERE user_id = ?', (user_id,)) if user_id is not None else ('', ())
+    now = time.time()
+    # También los meses que ya no tienen datos: su contenido en caché dejó de ser válido
+    conn.execute(f'UPDATE month_versions SET version = version + 1, updated_at = ? {where}',
+                 (now,) + params)
+    conn.execute(f'''
+        INSERT OR IGNORE INTO month_versions (user_id, year, month, version, updated_at)
+        SELECT user_id, year, month, 1, ? FROM monthly_totals {where}
+    ''', (now,) + params)
+
+
+def get_month_validator(conn, user_id, year, month):
+    """(version, updated_at epoch or None) of one month"""
+    row = conn.execute(
+        'SELECT version, updated_at FROM month_versions WHERE user_id = ? AND year = ? AND month = ?',
+        (user_id, year, month)
+    ).fetchone()
+    return (row[0], row[1]) if row else (0, None)
+
+
+def get_user_validator(conn, user_id):
+    """(version, updated_at) across all of a user's months, for pages that list every month"""
+    # Las filas nunca se borran y cada escritura suma 1, así que la suma solo puede crecer
+    row = conn.execute(
+        'SELECT COALESCE(SUM(version), 0), MAX(updated_at) FROM month_versions WHERE user_id = ?',
+        (user_id,)
+    ).fetchone()
+    return row[0], row[1]
@@ -0,0 +1,206 @@
+"""
+Cola de escrituras con commit agrupado (opcional, WRITE_QUEUE=1).
+
+Los requests no escriben en SQLite: encolan una operación y esperan su Future. Un único
+hilo escritor por proceso toma todo lo pendiente, lo ejecuta dentro de una sola
+transacción (un SAVEPOINT por operación, así un error solo deshace la suya) y hace un
+COMMIT para todo el lote. Cada Future recibe su resultado (p. ej. lastrowid) o su
+excepción recién después del COMMIT, así que la respuesta de cada request no cambia.
+"""
+
+import os
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+
+from rollups import apply_delta
+
+WRITE_QUEUE_ENABLED = os.environ.get('WRITE_QUEUE', '').lower() in ('1', 'true', 'yes')
+# Espera extra para juntar un lote; con 0 el lote es lo que se acumuló durante el COMMIT anterior
+WRITE_QUEUE_WINDOW_MS = float(os.environ.get('WRITE_QUEUE_WINDOW_MS', 0))
+WRITE_QUEUE_MAX_BATCH = int(os.environ.get('WRITE_QUEUE_MAX_BATCH', 256))
+WRITE_QUEUE_TIMEOUT = float(os.environ.get('WRITE_QUEUE_TIMEOUT', 10))  # segundos esperando el resultado
+
+
+class WriteQueueTimeout(Exception):
+    """Raised when a queued write was cancelled before running: nothing was written"""
+
+
+class WriteQueue:
+    """Single writer thread that runs queued operations in group commits"""
+
+    def __init__(self, pool, window_ms=WRITE_QUEUE_WINDOW_MS, max_batch=WRITE_QUEUE_MAX_BATCH):
+        self.pool = pool
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self._lock = threading.Lock()
+        self._stats = {'operations': 0, 'failed': 0, 'cancelled': 0, 'batches': 0, 'commit_errors': 0,
+                       'max_batch_seen': 0, 'commit_time': 0.0}
+        self._pid = None
+        self._queue = None
+        self._thread = None
+
+    def _ensure_running(self):
+        # El hilo no sobrevive a un fork: cada worker arranca el suyo con la primera escritura
+        if self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._pid != os.getpid() or not self._thread.is_alive():
+                self._pid = os.getpid()
+                self._queue = queue.Queue()
+                self._thread = threading.Thread(target=self._run, name='write-queue', daemon=True)
+                self._thread.start()
+
+    def submit(self, operation, *args):
+        """Queue operation(conn, *args); the Future resolves once its batch is committed"""
+        self._ensure_running()
+        future = Future()
+        self._queue.put((future, operation, args))
+        return future
+
+    def run(self, operation, *args, timeout=WRITE_QUEUE_TIMEOUT):
+        """submit() and wait: returns the operation's result or raises its exception"""
+        future = self.submit(operation, *args)
+        try:
+            return future.result(timeout)
+        except FutureTimeout:
+            # Si el escritor todavía no la tomó se cancela y nunca se ejecuta: reintentar es seguro
+            if future.cancel():
+                with self._lock:
+                    self._stats['cancelled'] += 1
+                raise WriteQueueTimeout('La cola de escrituras está ocupada: no se guardó nada, intenta nuevamente')
+            # Ya está en un lote que puede terminar en COMMIT: abandonarla haría que un reintento la duplique
+            return future.result()
+
+    def close(self):
+        """Let the writer finish what is queued and stop (benchmarks and tests)"""
+        if self._pid == os.getpid() and self._thread is not None and self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+
+    def _collect(self):
+        """Block for the first operation, then take whatever else is queued (waiting up to `window`)"""
+        first = self._queue.get()
+        if first is None:
+            return None
+        batch = [first]
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                self._queue.put(None)  # se procesa este lote y después se termina
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        conn = self.pool.connect()
+        try:
+            while True:
+                batch = self._collect()
+                if batch is None:
+                    return
+                self._commit_batch(conn, batch)
+        finally:
+            conn.close()
+
+    def _commit_batch(self, conn, batch):
+        results = []
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            for future, operation, args in batch:
+                if not future.set_running_or_notify_cancel():
+                    continue
+                conn.execute('SAVEPOINT queued_write')
+                try:
+                    result = operation(conn, *args)
+                except BaseException as e:
+                    conn.execute('ROLLBACK TO queued_write')
+                    conn.execute('RELEASE queued_write')
+                    results.append((future, None, e))
+                else:
+                    conn.execute('RELEASE queued_write')
+                    results.append((future, result, None))
+            started = time.perf_counter()
+            conn.commit()
+            commit_time = time.perf_counter() - started
+        except sqlite3.Error as e:
+            # Sin COMMIT no se escribió nada del lote: todas las operaciones fallan con este error
+            if conn.in_transaction:
+                conn.rollback()
+            with self._lock:
+                self._stats['commit_errors'] += 1
+                self._stats['failed'] += len(batch)
+            for future, _, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        failed = 0
+        for future, result, error in results:
+            if error is None:
+                future.set_result(result)
+            else:
+                failed += 1
+                future.set_exception(error)
+        with self._lock:
+            self._stats['operations'] += len(results)
+            self._stats['failed'] += failed
+            self._stats['batches'] += 1
+            self._stats['commit_time'] += commit_time
+            self._stats['max_batch_seen'] = max(self._stats['max_batch_seen'], len(batch))
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats['pending'] = self._queue.qsize() if self._queue is not None else 0
+        stats['avg_batch'] = stats['operations'] / stats['batches'] if stats['batches'] else 0.0
+        return stats
+
+
+# Operaciones de escritura: reciben la conexión (del escritor o del request) y no hacen commit
+
+def insert_transaction(conn, user_id, year, month, day, amount, description):
+    """Insert one transaction and update rollups; returns its id"""
+    cursor = conn.execute('''
+        INSERT INTO transactions (user_id, year, month, day, amount, description)
+        VALUES (?, ?, ?, ?, ?, ?)
+    ''', (user_id, year, month, day, amount, description))
+    apply_delta(conn, user_id, year, month, day, amount, 1)
+    return cursor.lastrowid
+
+
+def update_transaction(conn, user_id, transaction_id, amount, description):
+    """Change amount/description of a user's transaction; returns (year, month, day) or None"""
+    trans = conn.execute(
+        'SELECT year, month, day, amount FROM transactions WHERE id = ? AND user_id = ?',
+        (transaction_id, user_id)
+    ).fetchone()
+    if not trans:
+        return None
+    conn.execute('''
+        UPDATE transactions
+        SET amount = ?, description = ?
+        WHERE id = ? AND user_id = ?
+    ''', (amount, description, transaction_id, user_id))
+    apply_delta(conn, user_id, trans['year'], trans['month'], trans['day'], amount - trans['amount'], 0)
+    return trans['year'], trans['month'], trans['day']
+
+
+def delete_transaction(conn, user_id, transaction_id):
+    """Delete a user's transaction; returns its (year, month, day) or None"""
+    trans = conn.execute(
+        'SELECT year, month, day, amount FROM transactions WHERE id = ? AND user_id = ?',
+        (transaction_id, user_id)
+    ).fetchone()
+    if not trans:
+        return None
+    conn.execute('DELETE FROM transactions WHERE id = ? AND user_id = ?', (transaction_id, user_id))
+    apply_delta(conn, user_id, trans['year'], trans['month'], trans['day'], -trans['amount'], -1)
+    return trans['year'], trans['month'], trans['day']
@@ -0,0 +1,10 @@
+"""
+Punto de entrada WSGI para producción:
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+    uwsgi --master --module wsgi:app --processes 4
+"""
+
+from app import create_app
+
+app = create_app()